@@ -0,0 +1,63 @@
+import threading
+
+import numpy as np
+import pygame
+
+
+class LatestFrame:
+    """Tampon à une seule place : le callback dépose, la boucle principale récupère.
+
+    Une image non encore affichée est simplement remplacée par la suivante,
+    le callback capteur ne bloque donc jamais.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self.received = 0
+        self.overwritten = 0
+
+    def put(self, frame):
+        with self._lock:
+            if self._frame is not None:
+                self.overwritten += 1
+            self._frame = frame
+            self.received += 1
+
+    def take(self):
+        """Renvoie la dernière image (ou None si rien de nouveau) et vide le tampon"""
+        with self._lock:
+            frame, self._frame = self._frame, None
+        return frame
+
+
+class CameraView:
+    """Surface préallouée au format BGRA de CARLA, réutilisée pour chaque image.
+
+    La surface cible a le même format que carla.Image (B, G, R, A en
+    mémoire, alpha ignoré) : chaque image est copiée d'un bloc dans ses
+    pixels, sans transposition, sans suppression du canal alpha et sans
+    créer de nouvelle surface.
+    """
+
+    def __init__(self, width, height):
+        self.size = (width, height)
+        self.surface = pygame.Surface(self.size, 0, 32, (0x00FF0000, 0x0000FF00, 0x000000FF, 0))
+        self.frames = 0
+        # Copie directe possible seulement si les lignes de la surface ne sont pas complétées
+        self._contiguous = self.surface.get_pitch() == width * 4
+
+    def update(self, raw_data):
+        """Copie les octets BGRA d'une image dans la surface préallouée"""
+        if self._contiguous:
+            proxy = self.surface.get_buffer()  # La surface reste verrouillée tant que le tampon existe
+            np.frombuffer(proxy, dtype=np.uint8)[:] = np.frombuffer(raw_data, dtype=np.uint8)
+            del proxy
+        else:
+            frame = pygame.image.frombuffer(raw_data, self.size, 'BGRA')
+            frame.set_alpha(None)  # alpha toujours opaque : copie directe sans mélange
+            self.surface.blit(frame, (0, 0))
+        self.frames += 1
+
+    def blit(self, display):
+        display.blit(self.surface, (0, 0))
@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict
+
+import pygame
+
+WHITE = (255, 255, 255)
+
+
+class TextCache:
+    """Surfaces de texte déjà rendues, indexées par leur contenu.
+
+    `font.render` n'est appelé que pour un texte jamais vu (ou sorti du
+    cache) ; les valeurs qui changent souvent (vitesse, distance) ne gardent
+    que les `maxsize` rendus les plus récents.
+    """
+
+    def __init__(self, font, color=WHITE, maxsize=512):
+        self.font = font
+        self.color = color
+        self.maxsize = maxsize
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        surface = self._surfaces.get(text)
+        if surface is not None:
+            self._surfaces.move_to_end(text)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self._surfaces[text] = self.font.render(text, True, self.color)
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surface
+
+
+class Panel:
+    """Cadre semi-transparent réutilisé : recomposé seulement quand une de ses lignes change"""
+
+    def __init__(self, size, position, background=(0, 0, 0, 200)):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.position = position
+        self.background = background
+        self._lines = None
+        self.redraws = 0
+
+    def draw(self, display, lines):
+        """`lines` : liste de (TextCache, texte, (x, y)) dans le repère du cadre"""
+        if lines != self._lines:
+            self.surface.fill(self.background)
+            for cache, text, offset in lines:
+                self.surface.blit(cache.get(text), offset)
+            self._lines = lines
+            self.redraws += 1
+        display.blit(self.surface, self.position)
+
+
+# Classe HUD pour afficher des informations avancées
+class HUD:
+    def __init__(self, width, height):
+        self.dim = (width, height)
+        self.font = pygame.font.Font(pygame.font.get_default_font(), 20)
+        self._font_mono = pygame.font.Font(pygame.font.get_default_font(), 14)
+        self.text = TextCache(self.font)
+        self.text_mono = TextCache(self._font_mono)
+        self.notification = ""
+        self.notification_end = 0
+        self.info_panel = Panel((350, 450), (10, 20))  # Cadre à gauche
+        self.profile_panel = None
+
+    def set_notification(self, text, seconds=4.0):
+        self.notification = text
+        self.notification_end = time.time() + seconds
+
+    def tick(self):
+        current_time = time.time()
+        if current_time > self.notification_end:
+            self.notification = ""
+
+    def render(self, display):
+        # Pas de surface plein écran à effacer : la notification est dessinée directement
+        if self.notification:
+            display.blit(self.text_mono.get(self.notification), (10, 10))
+
+    def render_weather_and_metrics(self, display, weather, speed, distance, ttc, stopping_distance):
+        # Afficher les informations météo
+        y_offset = 50  # Commencer après le titre
+        weather_lines = [
+            f"Vitesse: {speed:.2f} km/h",
+            f"Nuages: {weather.cloudiness:.1f}%",
+            f"Précipitation: {weather.precipitation:.1f}%",
+            f"Précipitation Déposée: {weather.precipitation_deposits:.1f}%",
+            f"Vent: {weather.wind_intensity:.1f}%",
+            f"Altitude Soleil: {weather.sun_altitude_angle:.1f}",
+            f"Densité Brouillard: {weather.fog_density:.1f}%",
+            f"Distance Brouillard: {max(0, (1.0 - weather.fog_distance) * 100):.1f} m"
+        ]
+        # Afficher les informations de distance, TTC et distance d'arrêt
+        metrics_lines = [
+            f"Distance: {distance:.2f} m",
+            f"TTC: {ttc:.2f} s",
+            f"Distance d'arrêt: {stopping_distance:.2f} m"
+        ]
+        metrics_offset = y_offset + len(weather_lines) * 30
+
+        lines = [(self.text, "Météo", (10, 10))]
+        lines += [(self.text, line, (10, y_offset + i * 30)) for i, line in enumerate(weather_lines)]
+        lines.append((self.text, "Métriques", (10, metrics_offset + 20)))
+        lines += [(self.text, line, (10, metrics_offset + 50 + i * 30)) for i, line in enumerate(metrics_lines)]
+        self.info_panel.draw(display, lines)
+
+    def render_profile(self, display, lines):
+        # Cadre en haut à droite avec les durées par étape (profilage en direct)
+        size = (330, 20 + 18 * len(lines))
+        if self.profile_panel is None or self.profile_panel.surface.get_size() != size:
+            self.profile_panel = Panel(size, (self.dim[0] - 340, 20))
+        self.profile_panel.draw(display, [(self.text_mono, line, (10, 10 + i * 18)) for i, line in enumerate(lines)])
@@ -0,0 +1,105 @@
+import json
+import os
+
+import numpy as np
+
+from enregistrement import read_archive_index
+
+
+class SensorArchive:
+    """Lecture d'une archive écrite avec le backend 'archive' (--format=archive).
+
+    data.bin est projeté en mémoire (np.memmap) : seul l'index est chargé,
+    `frame()` et `window()` renvoient des vues (N, k) float32 sur le fichier,
+    sans copie ni lecture du reste de l'archive. Quand plusieurs simulations
+    sont ajoutées à la même archive (numéros de frame ou temps simulé qui
+    repartent en arrière), chacune forme un run ; les recherches portent sur
+    le dernier par défaut.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.sensor = meta.get('sensor')
+        self.columns = tuple(meta['columns'])
+        data_path = os.path.join(path, 'data.bin')
+        self.index = read_archive_index(os.path.join(path, 'index.bin'), data_path, len(self.columns))
+
+        n_rows = int(self.index['offset'][-1] + self.index['count'][-1]) if len(self.index) else 0
+        if n_rows:
+            self._data = np.memmap(data_path, dtype=np.float32, mode='r', shape=(n_rows, len(self.columns)))
+        else:
+            self._data = np.zeros((0, len(self.columns)), dtype=np.float32)
+
+        # Début de chaque run : là où le numéro de frame ne croît plus ou le temps simulé repart en arrière
+        frames = self.index['frame']
+        sim_times = self.index['sim_time']
+        starts = np.flatnonzero((frames[1:] <= frames[:-1]) | (sim_times[1:] < sim_times[:-1])) + 1
+        self.runs = list(zip(np.concatenate(([0], starts)).tolist(), np.concatenate((starts, [len(frames)])).tolist()))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def frames(self):
+        return self.index['frame']
+
+    @property
+    def n_rows(self):
+        return len(self._data)
+
+    def rows(self, first_entry, last_entry):
+        """Vue sur les lignes des entrées d'index [first_entry, last_entry[ (contiguës dans data.bin)"""
+        if last_entry <= first_entry:
+            return self._data[:0]
+        start = self.index['offset'][first_entry]
+        end = self.index['offset'][last_entry - 1] + self.index['count'][last_entry - 1]
+        return self._data[start:end]
+
+    def entry(self, frame, run=-1):
+        """Position de `frame` dans l'index (KeyError si la frame n'a pas été enregistrée)"""
+        if not self.runs:
+            raise KeyError(frame)
+        first, last = self.runs[run]
+        frames = self.index['frame']
+        # Capteur présent à chaque tick : les frames se suivent, accès direct ; sinon recherche dichotomique
+        position = first + frame - int(frames[first])
+        if not (first <= position < last and frames[position] == frame):
+            position = first + int(np.searchsorted(frames[first:last], frame))
+            if position >= last or frames[position] != frame:
+                raise KeyError(frame)
+        return position
+
+    def frame(self, frame, run=-1):
+        """Lignes (N, k) d'une frame, en vue sur le fichier (N = 0 pour une frame enregistrée sans ligne)"""
+        position = self.entry(frame, run)
+        return self.rows(position, position + 1)
+
+    def window(self, start_time, end_time, run=-1):
+        """Lignes des frames dont le temps simulé est dans [start_time, end_time[, et leurs entrées d'index"""
+        if not self.runs:
+            return self._data[:0], self.index[:0]
+        first, last = self.runs[run]
+        sim_times = self.index['sim_time'][first:last]
+        begin = first + int(np.searchsorted(sim_times, start_time, side='left'))
+        end = first + int(np.searchsorted(sim_times, end_time, side='left'))
+        return self.rows(begin, end), self.index[begin:end]
+
+    def split(self, rows, entries):
+        """Découpe les lignes renvoyées par window() en une vue par frame"""
+        return np.split(rows, np.cumsum(entries['count'])[:-1]) if len(entries) else []
+
+    def column(self, rows, name):
+        """Colonne `name` d'un bloc de lignes (vue avec pas, sans copie)"""
+        return rows[:, self.columns.index(name)]
+
+    def chunks(self, chunk_rows=100000):
+        """Parcourt toute l'archive par blocs d'environ `chunk_rows` lignes, sans couper de frame"""
+        ends = self.index['offset'] + self.index['count']
+        first = 0
+        while first < len(self.index):
+            target = self.index['offset'][first] + chunk_rows
+            last = max(int(np.searchsorted(ends, target, side='right')), first + 1)
+            yield self.rows(first, last), self.index[first:last]
+            first = last
@@ -0,0 +1,266 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import subprocess
+import sys
+import time
+
+from scenario import WEATHER_FIELDS, ScenarioSpec
+
+# Préréglages météo dans l'ordre attendu par code_final.py :
+# nuages, pluie, flaques, vent, brouillard, distance brouillard, soleil (mêmes valeurs que les scénarios de l'interface)
+WEATHER_PRESETS = {
+    "beau_temps": (10, 0, 0, 5, 0, 100, 60),
+    "mauvais_temps": (90, 80, 70, 40, 80, 60, 10),
+}
+
+# Clés de la grille de paramètres, dans l'ordre des arguments de code_final.py
+GRID_KEYS = ("town", "vehicle", "weather", "spawn")
+
+
+def expand_grid(grid):
+    """Produit cartésien d'une grille {paramètre: [valeurs]} en liste de combinaisons"""
+    keys = [key for key in GRID_KEYS if key in grid]
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def weather_values(weather):
+    """Valeurs météo d'une combinaison : nom de préréglage ou liste de 7 valeurs"""
+    if isinstance(weather, str):
+        return WEATHER_PRESETS[weather]
+    if len(weather) != 7:
+        raise ValueError(f"Météo invalide {weather} : 7 valeurs attendues")
+    return tuple(weather)
+
+
+def make_run_id(params):
+    weather = params["weather"] if isinstance(params["weather"], str) else "-".join(map(str, params["weather"]))
+    return f"{params['town']}_{params['vehicle']}_{weather}_s{params['spawn']}"
+
+
+def build_command(params, server, output_dir, script="code_final.py", extra_args=()):
+    """Ligne de commande de code_final.py pour une combinaison et un couple de ports"""
+    host, port, tm_port = server
+    spec = ScenarioSpec(town_name=params["town"], vehicle_model=params["vehicle"], spawn_index=params["spawn"],
+                        options={"host": host, "port": port, "tm-port": tm_port, "output": output_dir},
+                        **dict(zip(WEATHER_FIELDS, weather_values(params["weather"]))))
+    return [sys.executable] + spec.to_argv(script) + list(extra_args)
+
+
+def parse_server(text):
+    """'hote:port:port_tm' (port_tm par défaut = port + 6000)"""
+    parts = text.split(":")
+    host = parts[0] or "localhost"
+    port = int(parts[1]) if len(parts) > 1 else 2000
+    tm_port = int(parts[2]) if len(parts) > 2 else port + 6000
+    return host, port, tm_port
+
+
+def _failed_result(run_id, attempt, server, error, duration=0.0):
+    return {
+        "run_id": run_id,
+        "attempt": attempt,
+        "server": "{}:{}:{}".format(*server),
+        "returncode": None,
+        "duration": round(duration, 3),
+        "error": error,
+    }
+
+
+def _server_worker(index, server, tasks, results, script, extra_args, timeout):
+    """Processus dédié à un couple serveur/TM : exécute les simulations une par une.
+
+    Chaque tâche commence par un message {"worker", "run_id", "attempt", "started"}
+    pour que le processus principal sache quelle simulation échoue si ce worker meurt.
+    """
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        run_id, params, attempt, output_dir = task
+        results.put({"worker": index, "run_id": run_id, "attempt": attempt, "started": True})
+        start = time.time()
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            command = build_command(params, server, output_dir, script, extra_args)
+            with open(os.path.join(output_dir, f"run_{attempt}.log"), "w") as log:
+                returncode = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, timeout=timeout).returncode
+        except subprocess.TimeoutExpired:
+            returncode = None
+        except Exception as e:
+            # Une tâche en erreur renvoie quand même un résultat, sinon le balayage l'attendrait indéfiniment
+            print(f"❌ Impossible de lancer {run_id} : {e}")
+            result = _failed_result(run_id, attempt, server, f"{type(e).__name__}: {e}", time.time() - start)
+            result["worker"] = index
+            results.put(result)
+            continue
+        results.put({
+            "worker": index,
+            "run_id": run_id,
+            "attempt": attempt,
+            "server": "{}:{}:{}".format(*server),
+            "returncode": returncode,
+            "duration": round(time.time() - start, 3),
+        })
+
+
+def _write_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def run_sweep(combinations, servers, output_root="balayage", retries=1, script="code_final.py", extra_args=(),
+              timeout=None, resume=False, poll_interval=1.0):
+    """Répartit les combinaisons sur les serveurs et écrit output_root/manifest.json.
+
+    Chaque couple (hôte, port, port TM) a son propre processus worker ; une
+    exécution en échec (code retour non nul ou délai dépassé) est remise dans
+    la file jusqu'à `retries` fois, éventuellement sur un autre serveur. Une
+    combinaison invalide (météo inconnue...) est marquée en échec avant le
+    lancement, et la simulation d'un worker mort est comptée en échec.
+    """
+    os.makedirs(output_root, exist_ok=True)
+    manifest_path = os.path.join(output_root, "manifest.json")
+    manifest = {"servers": ["{}:{}:{}".format(*server) for server in servers], "runs": {}}
+    if resume and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest["runs"] = json.load(f)["runs"]
+
+    for params in combinations:
+        run_id = make_run_id(params)
+        entry = manifest["runs"].setdefault(run_id, {"params": params, "attempts": []})
+        entry["output"] = os.path.join(output_root, run_id)
+        if entry.get("status") == "ok":
+            continue
+        # Vérification de la combinaison avant de démarrer le moindre processus
+        try:
+            build_command(params, servers[0], entry["output"], script, extra_args)
+        except (KeyError, TypeError, ValueError) as e:
+            entry["status"] = "failed"
+            entry["error"] = f"Combinaison invalide : {type(e).__name__}: {e}"
+            print(f"❌ {run_id} : {entry['error']}")
+        else:
+            entry["status"] = "pending"
+            entry.pop("error", None)
+    pending = [run_id for run_id, entry in manifest["runs"].items() if entry["status"] == "pending"]
+    total = len(pending)
+    print(f"🗂️ {total} simulations à exécuter ({len(manifest['runs']) - total} déjà terminées ou invalides) "
+          f"sur {len(servers)} serveur(s)")
+    _write_manifest(manifest_path, manifest)
+    if not total:
+        return manifest
+
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_server_worker,
+                                       args=(index, server, tasks, results, script, extra_args, timeout), daemon=True)
+               for index, server in enumerate(servers)]
+    for worker in workers:
+        worker.start()
+    for run_id in pending:
+        entry = manifest["runs"][run_id]
+        tasks.put((run_id, entry["params"], 1, entry["output"]))
+
+    running = [None] * len(workers)  # (run_id, tentative) en cours sur chaque worker
+    dead = set()
+    done = 0
+    start = time.time()
+    try:
+        while done < total:
+            try:
+                result = results.get(timeout=poll_interval)
+            except queue.Empty:
+                # Un worker mort ne renverra jamais le résultat de sa simulation en cours
+                result = None
+                for index, worker in enumerate(workers):
+                    if index not in dead and not worker.is_alive():
+                        dead.add(index)
+                        print(f"⚠️ Worker {manifest['servers'][index]} arrêté (code {worker.exitcode})")
+                        if running[index] is not None:
+                            run_id, attempt = running[index]
+                            running[index] = None
+                            result = _failed_result(run_id, attempt, servers[index],
+                                                    f"Worker arrêté (code {worker.exitcode})")
+                            break
+                if result is None:
+                    if len(dead) == len(workers):
+                        # Plus aucun worker : les simulations restantes ne seront jamais exécutées
+                        for entry in manifest["runs"].values():
+                            if entry["status"] in ("pending", "retrying"):
+                                entry["status"] = "failed"
+                                entry["error"] = "Aucun worker disponible"
+                        _write_manifest(manifest_path, manifest)
+                        break
+                    continue
+            if result.pop("started", False):
+                running[result["worker"]] = (result["run_id"], result["attempt"])
+                continue
+            if "worker" in result:
+                running[result.pop("worker")] = None
+            entry = manifest["runs"][result["run_id"]]
+            entry["attempts"].append(result)
+            ok = result["returncode"] == 0
+            if not ok and result["attempt"] <= retries and len(dead) < len(workers):
+                entry["status"] = "retrying"
+                tasks.put((result["run_id"], entry["params"], result["attempt"] + 1, entry["output"]))
+                print(f"🔁 {result['run_id']} en échec sur {result['server']}, nouvelle tentative "
+                      f"({result['attempt'] + 1}/{retries + 1})")
+            else:
+                entry["status"] = "ok" if ok else "failed"
+                done += 1
+                elapsed = time.time() - start
+                eta = elapsed / done * (total - done)
+                print(f"[{done}/{total}] {'✅' if ok else '❌'} {result['run_id']} sur {result['server']} "
+                      f"en {result['duration']:.1f} s (reste ~{eta:.0f} s)")
+            _write_manifest(manifest_path, manifest)
+    finally:
+        for _ in workers:
+            tasks.put(None)
+        for worker in workers:
+            worker.join(timeout=5)
+
+    failed = sum(1 for entry in manifest["runs"].values() if entry["status"] == "failed")
+    print(f"🏁 Balayage terminé en {time.time() - start:.1f} s : {len(manifest['runs']) - failed} réussies, "
+          f"{failed} en échec — manifeste : {manifest_path}")
+    return manifest
+
+
+if __name__ == "__main__":
+    # Les arguments après `--` sont transmis tels quels à chaque simulation (ex. -- --headless --duration=60)
+    argv = sys.argv[1:]
+    extra_args = []
+    if "--" in argv:
+        extra_args = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+
+    parser = argparse.ArgumentParser(description="Balayage de scénarios CARLA sur plusieurs serveurs")
+    parser.add_argument("--grid", help="Fichier JSON {town, vehicle, weather, spawn: [valeurs]}")
+    parser.add_argument("--towns", nargs="+", default=["Town03"])
+    parser.add_argument("--vehicles", nargs="+", default=["vehicle.tesla.model3"])
+    parser.add_argument("--weather", nargs="+", default=list(WEATHER_PRESETS), choices=list(WEATHER_PRESETS))
+    parser.add_argument("--spawns", nargs="+", type=int, default=[0])
+    parser.add_argument("--servers", nargs="+", default=["localhost:2000:8000"],
+                        help="Couples hôte:port:port_tm, un worker par couple")
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=None, help="Durée maximale d'une simulation (s)")
+    parser.add_argument("--output", default="balayage")
+    parser.add_argument("--resume", action="store_true", help="Ne relance pas les simulations déjà réussies")
+    parser.add_argument("--fake", action="store_true", help="Utilise faux_carla.py au lieu de code_final.py")
+    args = parser.parse_args(argv)
+
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            grid = json.load(f)
+    else:
+        grid = {"town": args.towns, "vehicle": args.vehicles, "weather": args.weather, "spawn": args.spawns}
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(script_dir, "faux_carla.py" if args.fake else "code_final.py")
+    manifest = run_sweep(expand_grid(grid), [parse_server(server) for server in args.servers], args.output,
+                         args.retries, script, extra_args, args.timeout, args.resume)
+    sys.exit(0 if all(entry["status"] == "ok" for entry in manifest["runs"].values()) else 1)
@@ -0,0 +1,730 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+# Génère des balayages LiDAR synthétiques (x, y, z, intensity) en float32
+def synthetic_lidar_sweeps(n_sweeps, points_per_sweep, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.uniform(-50, 50, size=(points_per_sweep, 4)).astype(np.float32) for _ in range(n_sweeps)]
+
+
+# Ancienne version : un f.write par point, fichier rouvert à chaque balayage
+def legacy_lidar_write(path, sweeps, timestamp):
+    for filtered_points in sweeps:
+        with open(path, 'a') as f:
+            if f.tell() == 0:
+                f.write('x,y,z,intensity,timestamp\n')
+            for point in filtered_points:
+                f.write(f"{point[0]:.2f},{point[1]:.2f},{point[2]:.2f},{point[3]:.2f},{timestamp}\n")
+
+
+def bench_lidar(args):
+    """Compare le débit (points/s) de l'ancienne boucle et de l'enregistreur vectorisé"""
+    from enregistrement import default_log_path, open_sensor_log, read_sensor_log
+
+    sweeps = synthetic_lidar_sweeps(args.sweeps, args.points)
+    total_points = args.sweeps * args.points
+    timestamp = '2025-02-27 16:10:28.000000'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.csv')
+        start = time.perf_counter()
+        legacy_lidar_write(legacy_path, sweeps, timestamp)
+        legacy_time = time.perf_counter() - start
+
+        print(f"📊 LiDAR : {args.sweeps} balayages x {args.points} points")
+        print(f"   Ancienne boucle         : {total_points / legacy_time:>12,.0f} points/s, "
+              f"{os.path.getsize(legacy_path) / 1e6:.1f} Mo")
+
+        for backend in args.formats:
+            path = os.path.join(tmp, default_log_path('lidar', backend))
+            # Import du backend (pyarrow) et ouverture hors mesure, comme pour l'ancienne boucle
+            writer = open_sensor_log('lidar', backend, path=path, compression=args.compression)
+            start = time.perf_counter()
+            for frame, points in enumerate(sweeps):
+                writer.write(points, frame)
+            callback_time = time.perf_counter() - start
+            writer.close()
+            writer_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_points = sum(len(chunk['x']) for chunk in read_sensor_log(path))
+            read_time = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) \
+                if os.path.isdir(path) else os.path.getsize(path)
+
+            print(f"   Enregistreur {backend:<10} : {total_points / writer_time:>12,.0f} points/s "
+                  f"(x{legacy_time / writer_time:.1f}), {size / 1e6:.1f} Mo, "
+                  f"callback {callback_time / args.sweeps * 1e6:.1f} µs/balayage, "
+                  f"relecture {read_points / read_time:,.0f} points/s")
+
+
+# Ancienne version du callback caméra : copie sans alpha, transposition, nouvelle surface à chaque image
+def legacy_camera_frame(raw_data, width, height, screen):
+    import pygame
+
+    array = np.frombuffer(raw_data, dtype=np.uint8)
+    array = array.reshape((height, width, 4))
+    array = array[:, :, :3]
+    surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
+    screen.blit(surface, (0, 0))
+
+
+def bench_camera(args):
+    """Compare images/s et allocations par image de l'ancien affichage caméra et de CameraView.
+
+    Les deux chemins sont mesurés de la même façon : surfaces créées par
+    `make_surface` et `frombuffer` (avec les pixels qu'elles possèdent), et
+    pic de mémoire Python/NumPy par image (tracemalloc), sur une passe
+    séparée de celle qui mesure le débit.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import tracemalloc
+
+    import pygame
+    from affichage_camera import CameraView, LatestFrame
+
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, args.width * args.height * 4, dtype=np.uint8).tobytes() for _ in range(4)]
+
+    # Surfaces créées par image ; seules celles de make_surface ont leur propre tampon de pixels
+    allocated = [0, 0]
+    make_surface = pygame.surfarray.make_surface
+    frombuffer = pygame.image.frombuffer
+
+    def counting_make_surface(array):
+        surface = make_surface(array)
+        allocated[0] += 1
+        allocated[1] += surface.get_pitch() * surface.get_height()
+        return surface
+
+    def counting_frombuffer(*frombuffer_args):
+        allocated[0] += 1  # Enveloppe les octets sans les copier
+        return frombuffer(*frombuffer_args)
+
+    def run(render_frame):
+        start = time.perf_counter()
+        for i in range(args.frames):
+            render_frame(frames[i % len(frames)])
+        fps = args.frames / (time.perf_counter() - start)
+
+        allocated[:] = [0, 0]
+        n_measured = min(args.frames, 50)
+        pygame.surfarray.make_surface = counting_make_surface
+        pygame.image.frombuffer = counting_frombuffer
+        tracemalloc.start()
+        peak = 0
+        try:
+            for i in range(n_measured):
+                tracemalloc.clear_traces()  # Remet aussi le pic à zéro
+                render_frame(frames[i % len(frames)])
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+            pygame.surfarray.make_surface = make_surface
+            pygame.image.frombuffer = frombuffer
+        return fps, allocated[0] / n_measured, allocated[1] / n_measured, peak
+
+    legacy = run(lambda raw: legacy_camera_frame(raw, args.width, args.height, screen))
+
+    slot = LatestFrame()
+    view = CameraView(args.width, args.height)
+
+    def new_frame(raw):
+        slot.put(raw)
+        view.update(slot.take())
+        view.blit(screen)
+
+    current = run(new_frame)
+    pygame.quit()
+
+    print(f"📊 Caméra : {args.frames} images {args.width}x{args.height}")
+    for name, (fps, surfaces, pixel_bytes, peak) in (("Ancien affichage", legacy), ("CameraView", current)):
+        print(f"   {name:<17} : {fps:>8.1f} images/s, {surfaces:.0f} surface(s) créée(s) par image "
+              f"({pixel_bytes / 1e6:.2f} Mo de pixels), pic Python/NumPy {peak / 1e3:.1f} ko par image")
+
+
+# Balayage LiDAR synthétique plus réaliste : sol plat à -sensor_height et obstacles, 32 canaux de -30° à +10°
+def synthetic_lidar_scene(n_points, sensor_height=1.7, max_range=50.0, seed=0):
+    rng = np.random.default_rng(seed)
+    elevation = np.radians(rng.choice(np.linspace(-30, 10, 32), n_points))
+    azimuth = rng.uniform(-np.pi, np.pi, n_points)
+    ground_range = np.where(elevation < 0, sensor_height / np.tan(-np.minimum(elevation, -1e-3)), np.inf)
+    obstacle_range = rng.uniform(3, max_range, n_points)
+    hits_obstacle = rng.random(n_points) < 0.4
+    distance = np.where(hits_obstacle, np.minimum(obstacle_range, ground_range), ground_range)
+    distance = np.minimum(distance, max_range)
+    points = np.column_stack((
+        distance * np.cos(elevation) * np.cos(azimuth),
+        distance * np.cos(elevation) * np.sin(azimuth),
+        np.maximum(distance * np.sin(elevation), -sensor_height) + rng.normal(0, 0.02, n_points),
+        rng.uniform(0, 1, n_points),
+    ))
+    return points.astype(np.float32)
+
+
+def bench_lidar_preprocessing(args):
+    """Temps de prétraitement par balayage (ROI, sol, voxels) selon le nombre de points par seconde"""
+    from pretraitement_lidar import LidarPreprocessor
+
+    sensor_height = 1.7
+    budget = 1.0 / args.rotation_frequency
+    print(f"📊 Prétraitement LiDAR : {args.sweeps} balayages à {args.rotation_frequency:g} Hz, "
+          f"portée {args.range:g} m, voxels {args.voxel:g} m, sol retiré")
+    for pps in args.pps:
+        n_points = int(pps / args.rotation_frequency)
+        sweeps = [synthetic_lidar_scene(n_points, sensor_height, seed=i) for i in range(4)]
+        preprocessor = LidarPreprocessor(z_min=-1 - sensor_height, z_max=1.5, max_range=args.range,
+                                         sensor_height=sensor_height, remove_ground=True, voxel_size=args.voxel)
+        for i in range(args.sweeps):
+            preprocessor.process(sweeps[i % len(sweeps)])
+        s = preprocessor.stats()
+        print(f"   {pps:>9,} points/s ({n_points:>7,}/balayage) : {s['time']['p50'] * 1e3:>7.2f} ms p50, "
+              f"{s['time']['max'] * 1e3:>7.2f} ms max ({s['time']['max'] / budget:.0%} du budget), "
+              f"{s['output_ratio']:.1%} des points gardés")
+
+
+# Ancienne version du callback radar : quatre attributs lus par détection, depuis Python
+def legacy_radar_frame(radar_data):
+    return np.array(
+        [(detection.depth, detection.velocity, detection.azimuth, detection.altitude) for detection in radar_data],
+        dtype=np.float32
+    ).reshape(-1, 4)
+
+
+def bench_radar(args):
+    """Compare le temps de callback par frame radar : itération sur les détections ou décodage de raw_data"""
+    from types import SimpleNamespace
+
+    from traitement_radar import RADAR_DTYPE, decode_radar, radar_rows, radar_summary
+
+    rng = np.random.default_rng(0)
+    print(f"📊 Radar : {args.frames} frames par taille")
+    for n in args.points:
+        raw = np.zeros(n, dtype=RADAR_DTYPE)
+        for name, low, high in (('velocity', -30, 30), ('azimuth', -0.3, 0.3), ('altitude', -0.1, 0.1),
+                                ('depth', 0, 20)):
+            raw[name] = rng.uniform(low, high, n)
+        raw_data = raw.tobytes()
+        # Les détections carla.RadarDetection sont simulées par des objets Python (coût réel encore plus élevé)
+        detections = [SimpleNamespace(velocity=float(d['velocity']), azimuth=float(d['azimuth']),
+                                      altitude=float(d['altitude']), depth=float(d['depth'])) for d in raw]
+
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            legacy_radar_frame(detections)
+        legacy_time = (time.perf_counter() - start) / args.frames
+
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            decoded = decode_radar(raw_data)
+            radar_rows(decoded)
+            radar_summary(decoded)
+        decode_time = (time.perf_counter() - start) / args.frames
+
+        print(f"   {n:>6} détections : itération {legacy_time * 1e6:>9.1f} µs, "
+              f"raw_data + agrégats {decode_time * 1e6:>7.1f} µs (x{legacy_time / decode_time:.0f})")
+
+
+# Ancien HUD : nouvelle surface 350x450 et font.render de chaque ligne à chaque frame,
+# plus une surface plein écran effacée et recopiée pour la notification
+def legacy_hud_frame(display, font, font_mono, weather, speed, distance, ttc, stopping_distance, notification=""):
+    import pygame
+
+    info_surface = pygame.Surface((350, 450), pygame.SRCALPHA)
+    info_surface.fill((0, 0, 0, 200))
+    info_surface.blit(font.render("Météo", True, (255, 255, 255)), (10, 10))
+    y_offset = 50
+    weather_lines = [
+        f"Vitesse: {speed:.2f} km/h",
+        f"Nuages: {weather.cloudiness:.1f}%",
+        f"Précipitation: {weather.precipitation:.1f}%",
+        f"Précipitation Déposée: {weather.precipitation_deposits:.1f}%",
+        f"Vent: {weather.wind_intensity:.1f}%",
+        f"Altitude Soleil: {weather.sun_altitude_angle:.1f}",
+        f"Densité Brouillard: {weather.fog_density:.1f}%",
+        f"Distance Brouillard: {max(0, (1.0 - weather.fog_distance) * 100):.1f} m"
+    ]
+    for i, line in enumerate(weather_lines):
+        info_surface.blit(font.render(line, True, (255, 255, 255)), (10, y_offset + i * 30))
+    info_surface.blit(font.render("Métriques", True, (255, 255, 255)), (10, y_offset + len(weather_lines) * 30 + 20))
+    metrics_lines = [f"Distance: {distance:.2f} m", f"TTC: {ttc:.2f} s", f"Distance d'arrêt: {stopping_distance:.2f} m"]
+    for i, line in enumerate(metrics_lines):
+        info_surface.blit(font.render(line, True, (255, 255, 255)),
+                          (10, y_offset + len(weather_lines) * 30 + 50 + i * 30))
+    display.blit(info_surface, (10, 20))
+
+    surface = pygame.Surface(display.get_size(), pygame.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    if notification:
+        surface.blit(font_mono.render(notification, True, (255, 255, 255)), (10, 10))
+    display.blit(surface, (0, 0))
+
+
+def bench_hud(args):
+    """Compare le temps CPU par frame de l'ancien HUD et du HUD avec cache de texte"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from types import SimpleNamespace
+
+    import pygame
+    from affichage_hud import HUD
+
+    pygame.init()
+    screen = pygame.display.set_mode((args.width, args.height))
+    weather = SimpleNamespace(cloudiness=10.0, precipitation=0.0, precipitation_deposits=0.0, wind_intensity=5.0,
+                              sun_altitude_angle=60.0, fog_density=0.0, fog_distance=0.0)
+
+    # Vitesse et distance qui varient un peu à chaque frame, météo fixe (comme en simulation)
+    rng = np.random.default_rng(0)
+    speeds = 40 + np.cumsum(rng.normal(0, 0.05, args.frames))
+    distances = 15 + np.cumsum(rng.normal(0, 0.02, args.frames))
+
+    def metrics(i):
+        speed, distance = float(speeds[i]), float(distances[i])
+        return speed, distance, distance / max(speed / 3.6, 0.1), speed / 3.6 + (speed / 3.6) ** 2 / 12
+
+    def run(render_frame):
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        for i in range(args.frames):
+            render_frame(i)
+        return (time.perf_counter() - start) / args.frames, (time.process_time() - start_cpu) / args.frames
+
+    font = pygame.font.Font(pygame.font.get_default_font(), 20)
+    font_mono = pygame.font.Font(pygame.font.get_default_font(), 14)
+    legacy = run(lambda i: legacy_hud_frame(screen, font, font_mono, weather, *metrics(i)))
+
+    hud = HUD(args.width, args.height)
+
+    def new_frame(i):
+        hud.render_weather_and_metrics(screen, weather, *metrics(i))
+        hud.tick()
+        hud.render(screen)
+
+    current = run(new_frame)
+    pygame.quit()
+
+    renders = hud.text.misses / args.frames
+    print(f"📊 HUD : {args.frames} frames {args.width}x{args.height}")
+    print(f"   Ancien HUD         : {legacy[0] * 1e3:.3f} ms/frame ({legacy[1] * 1e3:.3f} ms CPU), 13 rendus de texte/frame")
+    print(f"   HUD avec cache     : {current[0] * 1e3:.3f} ms/frame ({current[1] * 1e3:.3f} ms CPU), "
+          f"{renders:.1f} rendus de texte/frame (x{legacy[0] / current[0]:.1f})")
+
+
+# Balayage (partiel) d'une route plate avec un véhicule de 1,8 x 1,5 m dont la face arrière est à `lead_distance` m
+def synthetic_lead_sweep(n_points, lead_distance, azimuth_range, sensor_height=2.0, max_range=50.0, seed=0):
+    rng = np.random.default_rng(seed)
+    elevation = np.radians(rng.choice(np.linspace(-30, 10, 32), n_points))
+    azimuth = rng.uniform(azimuth_range[0], azimuth_range[1], n_points)
+    ground_range = np.where(elevation < 0, sensor_height / np.sin(-np.minimum(elevation, -1e-3)), np.inf)
+    with np.errstate(divide='ignore'):
+        rear_range = lead_distance / (np.cos(elevation) * np.cos(azimuth))
+    lateral = rear_range * np.cos(elevation) * np.sin(azimuth)
+    height = sensor_height + rear_range * np.sin(elevation)
+    hits_lead = (rear_range > 0) & (np.abs(lateral) <= 0.9) & (height >= 0) & (height <= 1.5) & (rear_range < ground_range)
+    distance = np.minimum(np.where(hits_lead, rear_range, ground_range), max_range)
+    return np.column_stack((
+        distance * np.cos(elevation) * np.cos(azimuth),
+        distance * np.cos(elevation) * np.sin(azimuth),
+        np.maximum(distance * np.sin(elevation), -sensor_height) + rng.normal(0, 0.02, n_points),
+        rng.uniform(0, 1, n_points),
+    )).astype(np.float32)
+
+
+def bench_perception(args):
+    """Temps par balayage et erreur de la perception LiDAR + radar sur un véhicule qui se rapproche"""
+    from perception import LeadPerception
+    from traitement_radar import RADAR_DTYPE
+
+    sensor_height = 2.0
+    budget = 1.0 / args.rotation_frequency
+    delta = 1.0 / args.fps
+    print(f"📊 Perception : {args.frames} frames à {args.fps:g} FPS, LiDAR à {args.rotation_frequency:g} Hz, "
+          f"véhicule de {args.start:g} m qui se rapproche à {args.closing_speed:g} m/s")
+    rng = np.random.default_rng(0)
+    for pps in args.pps:
+        perception = LeadPerception(sensor_height, sensor_height - 0.1)
+        points_per_frame = int(pps * delta)
+        distance_errors, speed_errors = [], []
+        for frame in range(args.frames):
+            sim_time = frame * delta
+            lead_distance = args.start - args.closing_speed * sim_time
+            # Portion de la rotation couverte par cette frame (un demi-tour à 20 FPS pour 10 Hz)
+            turn = 2 * np.pi * args.rotation_frequency * delta
+            first = (frame * turn) % (2 * np.pi) - np.pi
+            points = synthetic_lead_sweep(points_per_frame, lead_distance, (first, first + turn), sensor_height,
+                                          seed=frame)
+            radar = np.zeros(int(rng.integers(3, 8)), dtype=RADAR_DTYPE)
+            radar['depth'] = lead_distance + rng.normal(0, 0.1, len(radar))
+            radar['azimuth'] = rng.uniform(-0.05, 0.05, len(radar))
+            radar['altitude'] = np.arctan2(-1.0, lead_distance)
+            radar['velocity'] = -args.closing_speed + rng.normal(0, 0.2, len(radar))
+            if lead_distance > 20:
+                radar = radar[:0]  # Portée du radar de code_final.py
+            perception.update_radar(sim_time, radar)
+            estimate = perception.update_lidar(frame, sim_time, points)
+            if estimate['detected'] and frame > args.frames // 10:
+                distance_errors.append(estimate['distance'] - lead_distance)
+                speed_errors.append(estimate['closing_speed'] - args.closing_speed)
+        t = perception.timings.summary()
+        detected = len(distance_errors) / (args.frames - args.frames // 10 - 1)
+        print(f"   {pps:>9,} points/s : {t['p50'] * 1e3:>6.2f} ms p50, {t['max'] * 1e3:>6.2f} ms max "
+              f"({t['max'] / budget:.0%} du budget), détecté {detected:.0%} des frames, "
+              f"erreur distance {np.median(np.abs(distance_errors)) if distance_errors else float('nan'):.2f} m, "
+              f"vitesse {np.median(np.abs(speed_errors)) if speed_errors else float('nan'):.2f} m/s (médianes)")
+
+
+def bench_client_async(args):
+    """Durée par frame d'une boucle tick + requêtes + rendu : appels bloquants ou façade asyncio"""
+    import asyncio
+
+    from client_async import AsyncWorld
+    from detection_vehicules import VehicleRegistry, take_vehicle_snapshot
+    from faux_carla import FakeWorld
+
+    render_seconds = args.render_ms / 1000
+
+    def sync_tick(world):
+        world.tick()
+        return world.get_snapshot()
+
+    # Ancienne boucle : tick, puis une requête par accesseur, puis rendu
+    world = FakeWorld(args.vehicles, latency=args.latency_ms / 1000)
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        world.tick()
+        for actor in world.get_actors().filter('vehicle.*'):
+            actor.get_transform()
+            actor.get_velocity()
+        world.get_weather()
+        time.sleep(render_seconds)
+    legacy_time = (time.perf_counter() - start) / args.frames
+    legacy_calls = sum(world.calls.values()) / args.frames
+
+    # Snapshot par tick sans façade : une seule requête, mais le tick attend la fin du rendu
+    world = FakeWorld(args.vehicles, latency=args.latency_ms / 1000)
+    registry = VehicleRegistry(world)
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        snapshot = take_vehicle_snapshot(world, registry, sync_tick(world))
+        [snapshot.speed(actor_id) for actor_id in snapshot.ids.tolist()]
+        time.sleep(render_seconds)
+    snapshot_time = (time.perf_counter() - start) / args.frames
+
+    # Façade asyncio : accesseurs regroupés sur le snapshot du tick, frame suivante calculée pendant le rendu
+    world = FakeWorld(args.vehicles, latency=args.latency_ms / 1000)
+    carla_world = AsyncWorld(world, tick=lambda: sync_tick(world))
+
+    async def loop():
+        for _ in range(args.frames):
+            snapshot = await carla_world.next_snapshot()
+            await asyncio.gather(*[carla_world.get_speed(actor_id) for actor_id in snapshot.ids.tolist()],
+                                 carla_world.get_weather())
+            carla_world.tick()
+            time.sleep(render_seconds)
+        await carla_world.drain()
+
+    start = time.perf_counter()
+    asyncio.run(loop())
+    async_time = (time.perf_counter() - start) / args.frames
+    async_calls = sum(world.calls.values()) / args.frames
+    carla_world.close()
+
+    print(f"📊 Client asynchrone : {args.frames} frames, {args.vehicles} véhicules, "
+          f"{args.latency_ms:g} ms par requête, rendu de {args.render_ms:g} ms")
+    print(f"   Requêtes bloquantes : {legacy_time * 1e3:>7.2f} ms/frame, {legacy_calls:.1f} requêtes/frame")
+    print(f"   Snapshot par tick   : {snapshot_time * 1e3:>7.2f} ms/frame")
+    print(f"   Façade asyncio      : {async_time * 1e3:>7.2f} ms/frame, {async_calls:.1f} requêtes/frame "
+          f"(x{legacy_time / async_time:.1f})")
+
+
+def bench_archive(args):
+    """Temps d'accès à une frame et à une fenêtre d'une seconde au milieu d'un long enregistrement"""
+    from archive import SensorArchive
+    from enregistrement import default_log_path, open_sensor_log, read_sensor_log
+
+    sweeps = synthetic_lidar_sweeps(16, args.points)
+    target_frame = args.sweeps // 2
+    target_time = target_frame * args.delta
+    print(f"📊 Archive : {args.sweeps} balayages x {args.points} points, frame {target_frame}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.formats:
+            path = os.path.join(tmp, default_log_path('lidar', backend))
+            with open_sensor_log('lidar', backend, path=path) as writer:
+                for frame in range(args.sweeps):
+                    writer.write(sweeps[frame % len(sweeps)], frame, sim_time=frame * args.delta)
+
+            # Sans index, il faut relire le flux jusqu'à la frame voulue
+            start = time.perf_counter()
+            for chunk in read_sensor_log(path, columns=['x', 'frame']):
+                if chunk['frame'][-1] >= target_frame:
+                    break
+            scan_time = time.perf_counter() - start
+            print(f"   {backend:<8} relecture jusqu'à la frame : {scan_time * 1e3:>9.2f} ms")
+
+        path = os.path.join(tmp, default_log_path('lidar', 'archive'))
+        with open_sensor_log('lidar', 'archive', path=path) as writer:
+            for frame in range(args.sweeps):
+                writer.write(sweeps[frame % len(sweeps)], frame, sim_time=frame * args.delta)
+
+        start = time.perf_counter()
+        archive = SensorArchive(path)
+        open_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            points = archive.frame(target_frame)
+            points[:, 0].sum()
+        frame_time = (time.perf_counter() - start) / args.repeat
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            rows, entries = archive.window(target_time, target_time + 1.0)
+            rows[:, 0].sum()
+        window_time = (time.perf_counter() - start) / args.repeat
+        print(f"   archive  ouverture (index) : {open_time * 1e3:>9.2f} ms, "
+              f"frame {frame_time * 1e6:.1f} µs, fenêtre de 1 s ({len(entries)} frames) {window_time * 1e6:.1f} µs")
+
+
+def bench_scenario(args):
+    """Coût de démarrage par scénario : un processus Python par scénario ou un lot dans un seul processus.
+
+    Les deux chemins tournent dans des sous-processus avec les mêmes imports :
+    seul le nombre de démarrages de l'interpréteur et d'imports change.
+    """
+    import json
+    import subprocess
+    import sys
+
+    from scenario import ScenarioSpec
+
+    towns = ["Town01", "Town03", "Town05"]
+    specs = [ScenarioSpec(towns[i % len(towns)], pluie=10 * i, spawn_index=i, options={"sim-seconds": 0})
+             for i in range(args.scenarios)]
+    # Même jeu d'imports que code_final.py avec affichage (sauf carla), payé à chaque démarrage d'un processus
+    imports = "import sys\nimport numpy\nimport pygame\nimport faux_carla\n"
+    single = imports + "sys.exit(faux_carla.main(sys.argv))\n"
+    batch = (imports + "import json\n"
+             "from scenario import ScenarioSpec, run_batch\n"
+             "from serveur_simulation import SimulationWorker\n"
+             "specs = [ScenarioSpec.from_dict(data) for data in json.loads(sys.argv[1])]\n"
+             "results = run_batch(specs, sys.argv[2], SimulationWorker(fake=True))\n"
+             "sys.exit(sum(result['status'] != 'ok' for result in results))\n")
+    env = {**os.environ, "PYGAME_HIDE_SUPPORT_PROMPT": "1"}
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    print(f"📊 Scénarios : {args.scenarios} scénarios faux_carla.py, sans temps de simulation")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for i, spec in enumerate(specs):
+            argv = spec.with_options(output=os.path.join(tmp, "sous_processus", str(i))).to_argv("faux_carla.py")
+            subprocess.run([sys.executable, "-c", single] + argv[1:], check=True, stdout=subprocess.DEVNULL,
+                           env=env, cwd=cwd)
+        subprocess_time = (time.perf_counter() - start) / args.scenarios
+
+        start = time.perf_counter()
+        failed = subprocess.run([sys.executable, "-c", batch, json.dumps([spec.to_dict() for spec in specs]),
+                                 os.path.join(tmp, "lot")], stdout=subprocess.DEVNULL, env=env, cwd=cwd).returncode
+        batch_time = (time.perf_counter() - start) / args.scenarios
+
+    print(f"   Un processus par scénario : {subprocess_time * 1e3:>8.1f} ms/scénario")
+    print(f"   Lot dans un processus     : {batch_time * 1e3:>8.1f} ms/scénario "
+          f"(x{subprocess_time / batch_time:.0f}, {failed} échec(s))")
+
+
+def timed_subprocess(code, repeat):
+    """Durée médiane (s) d'un processus Python qui exécute `code` depuis le dépôt, démarrage de l'interpréteur compris"""
+    import subprocess
+    import sys
+
+    env = {**os.environ, "PYGAME_HIDE_SUPPORT_PROMPT": "1", "QT_QPA_PLATFORM": "offscreen"}
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL, env=env, cwd=cwd)
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations))
+
+
+def baseline_startup_code(revision, has_carla):
+    """Début de code_final.py à la révision `revision` (git), jusqu'à la connexion au serveur ; None si introuvable.
+
+    Sans le module carla, la ligne `import carla` est retirée : la mesure ne compte alors pas son import.
+    """
+    import subprocess
+
+    try:
+        source = subprocess.run(["git", "show", f"{revision}:code_final.py"], check=True, capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    end = source.find("client = carla.Client(")
+    if end < 0:
+        return None
+    code = source[:end]
+    if not has_carla:
+        code = code.replace("import carla\n", "", 1)
+    return code
+
+
+def bench_startup(args):
+    """Temps de démarrage : catalogues CSV, simulateur jusqu'à la connexion, interface jusqu'à la première boucle Qt"""
+    import importlib.util
+
+    legacy_catalogues = (
+        "import pandas as pd\n"
+        "df = pd.read_csv('CARLA_Vehicles_Available.csv', delimiter=';', dtype=str)\n"
+        "df = df[df['Type'] == 'Car'].dropna(subset=['Blueprint_ID'])\n"
+        "df['Model'] = df['Brand'] + ' ' + df['Model']\n"
+        "vehicles = df[['Model', 'Blueprint_ID']].drop_duplicates().values.tolist()\n"
+        "towns = pd.read_csv('liste_villes.csv', delimiter=';', dtype=str)['Nom Ville'].tolist()\n"
+    )
+    catalogues = ("from catalogues import town_names, vehicle_catalogue\n"
+                  "vehicles = vehicle_catalogue().models()\n"
+                  "towns = town_names()\n")
+    # Tout ce que code_final.py fait avant de se connecter au serveur (arguments, hauteur du véhicule)
+    simulator = ("import code_final\n"
+                 "code_final.parse_arguments(['code_final.py', 'Town03', 'vehicle.tesla.model3', "
+                 "'10', '0', '0', '5', '0', '100', '60', '0', '--headless'])\n"
+                 "code_final.vehicle_catalogue().height('vehicle.tesla.model3')\n")
+    has_carla = importlib.util.find_spec("carla") is not None
+    if has_carla:
+        simulator += "import carla\n"  # Importé par connect(), juste avant la connexion
+    legacy_simulator = baseline_startup_code(args.baseline, has_carla)
+
+    print(f"📊 Démarrage : médiane de {args.repeat} lancements d'un processus Python")
+    empty = timed_subprocess("pass", args.repeat)
+    print(f"   Interpréteur seul               : {empty * 1e3:>8.1f} ms")
+    legacy_time = timed_subprocess(legacy_catalogues, args.repeat)
+    new_time = timed_subprocess(catalogues, args.repeat)
+    print(f"   Catalogues (pandas)             : {legacy_time * 1e3:>8.1f} ms")
+    print(f"   Catalogues (catalogues.py)      : {new_time * 1e3:>8.1f} ms (x{legacy_time / new_time:.1f})")
+    new_time = timed_subprocess(simulator, args.repeat)
+    carla_note = "" if has_carla else " (carla absent, non importé)"
+    if legacy_simulator is None:
+        print(f"   ⚠️ code_final.py introuvable à la révision {args.baseline} : pas de comparaison")
+        print(f"   code_final.py, imports différés : {new_time * 1e3:>8.1f} ms avant la connexion{carla_note}")
+    else:
+        legacy_time = timed_subprocess(legacy_simulator, args.repeat)
+        label = f"code_final.py ({args.baseline})"
+        print(f"   {label:<31} : {legacy_time * 1e3:>8.1f} ms avant la connexion{carla_note}")
+        print(f"   code_final.py, imports différés : {new_time * 1e3:>8.1f} ms avant la connexion "
+              f"(x{legacy_time / new_time:.1f})")
+
+    if importlib.util.find_spec("PyQt5") is None:
+        print("   ⚠️ PyQt5 absent : temps d'affichage de interface_2.py non mesuré")
+        return
+    # Jusqu'à la première itération de la boucle Qt, fenêtre construite et affichée
+    gui = ("from PyQt5.QtCore import QTimer\n"
+           "from PyQt5.QtWidgets import QApplication\n"
+           "app = QApplication([])\n"
+           "import interface_2\n"
+           "window = interface_2.CarlaInterface()\n"
+           "window.show()\n"
+           "QTimer.singleShot(0, app.quit)\n"
+           "app.exec_()\n")
+    print(f"   interface_2.py interactive      : {timed_subprocess(gui, args.repeat) * 1e3:>8.1f} ms")
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QPixmap
+    from PyQt5.QtWidgets import QApplication
+
+    # QPixmap n'existe qu'avec une application Qt, gardée jusqu'à la fin des mesures
+    _app = QApplication.instance() or QApplication([])
+    sizes = [(1280 + 10 * (i % 4), 720) for i in range(args.resizes)]  # Redimensionnement à la souris
+    start = time.perf_counter()
+    for width, height in sizes:
+        QPixmap("image.png").scaled(width, height, Qt.KeepAspectRatioByExpanding)
+    legacy_time = (time.perf_counter() - start) / args.resizes
+    pixmap = QPixmap("image.png")
+    cache = {}
+    start = time.perf_counter()
+    for size in sizes:
+        if size not in cache:
+            cache[size] = pixmap.scaled(*size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+    cached_time = (time.perf_counter() - start) / args.resizes
+    print(f"   Redimensionnement, image relue  : {legacy_time * 1e3:>8.2f} ms par resizeEvent")
+    print(f"   Redimensionnement, cache        : {cached_time * 1e3:>8.2f} ms par resizeEvent")
+    del _app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks des chemins critiques de code_final.py")
+    subparsers = parser.add_subparsers(dest="bench", required=True)
+
+    lidar_parser = subparsers.add_parser("lidar", help="Écriture CSV des points LiDAR")
+    lidar_parser.add_argument("--sweeps", type=int, default=50)
+    lidar_parser.add_argument("--points", type=int, default=5600)
+    lidar_parser.add_argument("--formats", nargs="+", default=["csv", "npz", "parquet"])
+    lidar_parser.add_argument("--compression", default=None)
+    lidar_parser.set_defaults(func=bench_lidar)
+
+    camera_parser = subparsers.add_parser("camera", help="Affichage des images caméra dans pygame")
+    camera_parser.add_argument("--frames", type=int, default=300)
+    camera_parser.add_argument("--width", type=int, default=1280)
+    camera_parser.add_argument("--height", type=int, default=720)
+    camera_parser.set_defaults(func=bench_camera)
+
+    preprocessing_parser = subparsers.add_parser("lidar-pretraitement", help="Prétraitement LiDAR (ROI, sol, voxels)")
+    preprocessing_parser.add_argument("--sweeps", type=int, default=20)
+    preprocessing_parser.add_argument("--pps", type=int, nargs="+", default=[56000, 500000, 1300000, 2600000])
+    preprocessing_parser.add_argument("--rotation-frequency", type=float, default=10.0)
+    preprocessing_parser.add_argument("--range", type=float, default=40.0)
+    preprocessing_parser.add_argument("--voxel", type=float, default=0.2)
+    preprocessing_parser.set_defaults(func=bench_lidar_preprocessing)
+
+    radar_parser = subparsers.add_parser("radar", help="Décodage des détections radar")
+    radar_parser.add_argument("--frames", type=int, default=200)
+    radar_parser.add_argument("--points", type=int, nargs="+", default=[100, 1000, 10000])
+    radar_parser.set_defaults(func=bench_radar)
+
+    hud_parser = subparsers.add_parser("hud", help="Rendu du HUD (météo et métriques)")
+    hud_parser.add_argument("--frames", type=int, default=2000)
+    hud_parser.add_argument("--width", type=int, default=1280)
+    hud_parser.add_argument("--height", type=int, default=720)
+    hud_parser.set_defaults(func=bench_hud)
+
+    perception_parser = subparsers.add_parser("perception", help="Véhicule devant estimé par le LiDAR et le radar")
+    perception_parser.add_argument("--frames", type=int, default=200)
+    perception_parser.add_argument("--fps", type=float, default=20.0)
+    perception_parser.add_argument("--rotation-frequency", type=float, default=10.0)
+    perception_parser.add_argument("--pps", type=int, nargs="+", default=[56000, 500000, 1300000])
+    perception_parser.add_argument("--start", type=float, default=40.0)
+    perception_parser.add_argument("--closing-speed", type=float, default=3.0)
+    perception_parser.set_defaults(func=bench_perception)
+
+    client_parser = subparsers.add_parser("client-async", help="Requêtes par frame : appels bloquants ou façade asyncio")
+    client_parser.add_argument("--frames", type=int, default=100)
+    client_parser.add_argument("--vehicles", type=int, default=30)
+    client_parser.add_argument("--latency-ms", type=float, default=1.0)
+    client_parser.add_argument("--render-ms", type=float, default=10.0)
+    client_parser.set_defaults(func=bench_client_async)
+
+    archive_parser = subparsers.add_parser("archive", help="Accès à une frame : relecture du flux ou archive indexée")
+    archive_parser.add_argument("--sweeps", type=int, default=3000)
+    archive_parser.add_argument("--points", type=int, default=5600)
+    archive_parser.add_argument("--delta", type=float, default=0.05)
+    archive_parser.add_argument("--repeat", type=int, default=100)
+    archive_parser.add_argument("--formats", nargs="+", default=["csv", "npz", "parquet"])
+    archive_parser.set_defaults(func=bench_archive)
+
+    scenario_parser = subparsers.add_parser("scenario", help="Démarrage par scénario : sous-processus ou lot en processus")
+    scenario_parser.add_argument("--scenarios", type=int, default=10)
+    scenario_parser.set_defaults(func=bench_scenario)
+
+    startup_parser = subparsers.add_parser("startup", help="Démarrage du simulateur et de l'interface")
+    startup_parser.add_argument("--repeat", type=int, default=5)
+    startup_parser.add_argument("--resizes", type=int, default=50)
+    startup_parser.add_argument("--baseline", default="c644c30",
+                                help="Révision git de code_final.py servant de référence")
+    startup_parser.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,149 @@
+import json
+import math
+import os
+import time
+
+# Dossier des métadonnées des villes (un fichier JSON par ville)
+TOWN_CACHE = "cartes"
+
+_metadata_cache = {}
+
+
+class TownMetadata:
+    """Métadonnées d'une ville lues une fois sur le serveur puis gardées dans un fichier local.
+
+    `spawn_points` : (x, y, z, pitch, yaw, roll) de chaque point d'apparition,
+    dans l'ordre de `carla.Map.get_spawn_points()` (même index que l'interface) ;
+    `topology` : segments (début, fin) de `carla.Map.get_topology()`, chaque
+    waypoint en (x, y, z, yaw, road_id, section_id, lane_id, s) ;
+    `bounds` : ((x min, y min, z min), (x max, y max, z max)) en m.
+    """
+
+    def __init__(self, town, map_name, server_version, spawn_points, topology, bounds, created=None):
+        self.town = town
+        self.map_name = map_name
+        self.server_version = server_version
+        self.spawn_points = [tuple(point) for point in spawn_points]
+        self.topology = [(tuple(start), tuple(end)) for start, end in topology]
+        self.bounds = (tuple(bounds[0]), tuple(bounds[1]))
+        self.created = created
+
+    def __len__(self):
+        return len(self.spawn_points)
+
+    @classmethod
+    def from_map(cls, carla_map, town, server_version):
+        """Lit les points d'apparition et la topologie sur le serveur (les seuls appels RPC)"""
+        def transform_row(transform):
+            location, rotation = transform.location, transform.rotation
+            return (round(location.x, 3), round(location.y, 3), round(location.z, 3),
+                    round(rotation.pitch, 3), round(rotation.yaw, 3), round(rotation.roll, 3))
+
+        def waypoint_row(waypoint):
+            location = waypoint.transform.location
+            return (round(location.x, 3), round(location.y, 3), round(location.z, 3),
+                    round(waypoint.transform.rotation.yaw, 3), waypoint.road_id, waypoint.section_id,
+                    waypoint.lane_id, round(waypoint.s, 3))
+
+        spawn_points = [transform_row(transform) for transform in carla_map.get_spawn_points()]
+        topology = [(waypoint_row(start), waypoint_row(end)) for start, end in carla_map.get_topology()]
+
+        points = [point[:3] for point in spawn_points] + [waypoint[:3] for segment in topology for waypoint in segment]
+        if points:
+            bounds = (tuple(min(point[i] for point in points) for i in range(3)),
+                      tuple(max(point[i] for point in points) for i in range(3)))
+        else:
+            bounds = ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+        return cls(town, carla_map.name, server_version, spawn_points, topology, bounds,
+                   created=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    def to_dict(self):
+        return {"town": self.town, "map_name": self.map_name, "server_version": self.server_version,
+                "created": self.created, "bounds": self.bounds, "spawn_points": self.spawn_points,
+                "topology": self.topology}
+
+    def save(self, path):
+        # Fichier temporaire puis renommage : un fichier à moitié écrit n'est jamais relu
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def valid_spawn_index(self, index):
+        return 0 <= index < len(self.spawn_points)
+
+    def spawn_transforms(self):
+        """Points d'apparition en carla.Transform, construits localement sans appel au serveur"""
+        import carla
+
+        return [carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(pitch=pitch, yaw=yaw, roll=roll))
+                for x, y, z, pitch, yaw, roll in self.spawn_points]
+
+    def describe_spawn(self, index):
+        """Texte d'aperçu d'un point d'apparition pour les interfaces"""
+        x, y, z, pitch, yaw, roll = self.spawn_points[index]
+        nearest = self.nearest_lane(x, y)
+        lane = f", route {nearest[4]} voie {nearest[6]}" if nearest is not None else ""
+        return f"x={x:.0f} m, y={y:.0f} m, cap {yaw:.0f}°{lane}"
+
+    def nearest_lane(self, x, y):
+        """Extrémité de segment de topologie la plus proche de (x, y), None si la topologie est vide"""
+        waypoints = [waypoint for segment in self.topology for waypoint in segment]
+        if not waypoints:
+            return None
+        return min(waypoints, key=lambda waypoint: math.hypot(waypoint[0] - x, waypoint[1] - y))
+
+
+def town_metadata_path(town, directory=TOWN_CACHE):
+    return os.path.join(directory, f"{os.path.basename(town)}.json")
+
+
+def load_town_metadata(town, directory=TOWN_CACHE):
+    """Métadonnées d'une ville depuis le fichier local, None si la ville n'a jamais été chargée.
+
+    Le fichier n'est relu que si sa date de modification change.
+    """
+    path = town_metadata_path(town, directory)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _metadata_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        metadata = TownMetadata(**data)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"⚠️ Métadonnées de {town} illisibles ({e}), elles seront relues sur le serveur")
+        return None
+    _metadata_cache[path] = (mtime, metadata)
+    return metadata
+
+
+def town_metadata(client, world, town, directory=TOWN_CACHE):
+    """Métadonnées de la ville chargée : fichier local si la version du serveur est la même,
+    sinon lecture de la carte sur le serveur (une seule fois) et écriture du fichier"""
+    server_version = client.get_server_version()
+    metadata = load_town_metadata(town, directory)
+    if metadata is not None and metadata.server_version == server_version:
+        return metadata
+
+    start = time.perf_counter()
+    metadata = TownMetadata.from_map(world.get_map(), town, server_version)
+    path = town_metadata_path(town, directory)
+    metadata.save(path)
+    _metadata_cache[path] = (os.stat(path).st_mtime_ns, metadata)
+    print(f"🗺️ Métadonnées de {town} enregistrées ({len(metadata)} points d'apparition, "
+          f"{len(metadata.topology)} segments) en {time.perf_counter() - start:.2f} s")
+    return metadata
+
+
+def cached_towns(directory=TOWN_CACHE):
+    """Villes dont les métadonnées sont déjà en cache"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(".json")] for name in names if name.endswith(".json"))
@@ -0,0 +1,160 @@
+import csv
+import math
+import os
+from array import array
+
+# CSV des véhicules, du plus prioritaire au moins prioritaire : le premier qui décrit un Blueprint_ID l'emporte
+VEHICLE_SOURCES = ("CARLA_Vehicles_Available.csv", "CARLA_Vehicles1.csv", "CARLA_Vehicles.csv")
+# Véhicules présents sur le serveur (écrit par liste_voiture.py)
+AVAILABLE_VEHICLES = "CARLA_Vehicles_Available.csv"
+# Hauteur mesurée sur la boîte englobante par liste_voiture.py, prioritaire sur la hauteur saisie "Height (mm)"
+BBOX_HEIGHT = "BBox Height (mm)"
+# Véhicules proposés par les interfaces quand aucun CSV n'est trouvé
+DEFAULT_VEHICLES = (
+    {"Brand": "Tesla", "Model": "Model 3", "Type": "Car", "Blueprint_ID": "vehicle.tesla.model3",
+     "Height (mm)": "", "Weight (kg)": ""},
+    {"Brand": "Audi", "Model": "e-Tron", "Type": "Car", "Blueprint_ID": "vehicle.audi.etron",
+     "Height (mm)": "", "Weight (kg)": ""},
+)
+
+_rows_cache = {}
+_catalogue_cache = {}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def read_rows(path, delimiter=";"):
+    """Lignes d'un petit CSV (dicts de textes, cellules vides = ""), sans pandas.
+
+    Le fichier n'est relu que si sa date de modification change.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    cached = _rows_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = tuple(csv.DictReader(f, delimiter=delimiter))
+    _rows_cache[path] = (mtime, rows)
+    return rows
+
+
+def town_names(path="liste_villes.csv"):
+    """Noms courts des villes (Town01, Town02...), sans l'extension .pcd"""
+    return [row["Nom Ville"].replace(".pcd", "") for row in read_rows(path) if row["Nom Ville"]]
+
+
+def parse_number(text):
+    """Nombre d'une cellule CSV ("1 868", "9,21", "1100") ; NaN si vide ou illisible"""
+    text = text.replace(" ", "").replace("\u00a0", "").replace("\u202f", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+class VehicleCatalogue:
+    """Index des véhicules compilé une fois depuis les CSV (voir `vehicle_catalogue()`).
+
+    Une ligne par Blueprint_ID, dans l'ordre des fichiers : les noms, types
+    et Blueprint_ID sont dans des listes, la hauteur (m) et la masse (kg)
+    dans des `array` de flottants (NaN si inconnues), et deux dicts donnent
+    la ligne d'un Blueprint_ID ou d'un nom affiché ("Marque Modèle"). La
+    hauteur mesurée sur le serveur (colonne BBOX_HEIGHT) remplace la hauteur
+    saisie quand elle est connue.
+    """
+
+    def __init__(self, rows, available=None):
+        self.blueprint_ids = []
+        self.names = []
+        self.types = []
+        self.heights = array("d")
+        self.weights = array("d")
+        self.available = []
+        self._by_blueprint = {}
+        self._by_name = {}
+        for row in rows:
+            blueprint_id = row["Blueprint_ID"]
+            if not blueprint_id or blueprint_id in self._by_blueprint:
+                continue
+            name = f"{row['Brand']} {row['Model']}"
+            self._by_blueprint[blueprint_id] = len(self.blueprint_ids)
+            self._by_name.setdefault(name, len(self.blueprint_ids))
+            self.blueprint_ids.append(blueprint_id)
+            self.names.append(name)
+            self.types.append(row["Type"])
+            height = parse_number(row.get(BBOX_HEIGHT) or "")
+            if math.isnan(height):
+                height = parse_number(row["Height (mm)"])
+            self.heights.append(height / 1000)
+            self.weights.append(parse_number(row["Weight (kg)"]))
+            self.available.append(available is None or blueprint_id in available)
+
+    def __len__(self):
+        return len(self.blueprint_ids)
+
+    def __contains__(self, key):
+        return key in self._by_blueprint or key in self._by_name
+
+    def index(self, key):
+        """Ligne d'un véhicule, par Blueprint_ID ou par nom affiché (KeyError si inconnu)"""
+        if key in self._by_blueprint:
+            return self._by_blueprint[key]
+        return self._by_name[key]
+
+    def blueprint_id(self, key, default=None):
+        """Blueprint_ID d'un véhicule désigné par son nom affiché (ou déjà par son Blueprint_ID)"""
+        try:
+            return self.blueprint_ids[self.index(key)]
+        except KeyError:
+            return default
+
+    def height(self, key, default=None):
+        """Hauteur en m, `default` si le véhicule ou sa hauteur sont inconnus"""
+        try:
+            height = self.heights[self.index(key)]
+        except KeyError:
+            return default
+        return default if math.isnan(height) else height
+
+    def weight(self, key, default=None):
+        """Masse en kg, `default` si le véhicule ou sa masse sont inconnus"""
+        try:
+            weight = self.weights[self.index(key)]
+        except KeyError:
+            return default
+        return default if math.isnan(weight) else weight
+
+    def models(self, vehicle_type="Car", available_only=True):
+        """Couples [nom affiché, Blueprint_ID] pour les listes déroulantes des interfaces"""
+        return [[self.names[i], self.blueprint_ids[i]] for i in range(len(self))
+                if (vehicle_type is None or self.types[i] == vehicle_type)
+                and (self.available[i] or not available_only)]
+
+
+def vehicle_catalogue(paths=VEHICLE_SOURCES, available_path=AVAILABLE_VEHICLES):
+    """Catalogue partagé des véhicules, recompilé seulement si l'un des CSV change.
+
+    Sans fichier des véhicules disponibles, tous les véhicules sont
+    considérés comme disponibles ; FileNotFoundError si aucun CSV n'existe.
+    """
+    paths = tuple(paths)
+    stamp = tuple(_mtime(path) for path in paths + (available_path,))
+    key = (paths, available_path)
+    cached = _catalogue_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    existing = [path for path in paths if _mtime(path) is not None]
+    if not existing:
+        raise FileNotFoundError(f"Aucun catalogue de véhicules trouvé parmi : {', '.join(paths)}")
+    available = None
+    if _mtime(available_path) is not None:
+        available = {row["Blueprint_ID"] for row in read_rows(available_path)}
+    catalogue = VehicleCatalogue((row for path in existing for row in read_rows(path)), available)
+    _catalogue_cache[key] = (stamp, catalogue)
+    return catalogue
@@ -0,0 +1,117 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from detection_vehicules import VehicleRegistry, take_vehicle_snapshot
+
+
+class AsyncWorld:
+    """Façade asyncio autour d'un carla.World (ou de faux_carla.FakeWorld).
+
+    Les appels bloquants au serveur partent dans un petit pool de threads :
+    des requêtes indépendantes avancent en même temps, et pendant le rendu
+    pygame de la boucle principale. Toutes les questions posées sur une même
+    frame (position, direction, vitesse d'un acteur) sont servies par un seul
+    snapshot du monde par tick, construit une fois et partagé par toutes les
+    coroutines qui l'attendent ; la météo est lue une fois puis gardée
+    jusqu'au prochain `set_weather()`.
+
+    `tick` est la fonction bloquante qui passe à la frame suivante et renvoie
+    un carla.WorldSnapshot (SynchronousRunner.tick en mode synchrone,
+    world.get_snapshot par défaut).
+    """
+
+    def __init__(self, world, tick=None, registry=None, max_workers=4):
+        self.world = world
+        self.registry = registry if registry is not None else VehicleRegistry(world)
+        self._tick = tick if tick is not None else world.get_snapshot
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='carla-rpc')
+        self._snapshot = None
+        self._pending = None
+        self._weather = None
+        self.calls = 0
+        self.snapshots = 0
+
+    async def call(self, function, *args, **kwargs):
+        """Exécute un appel bloquant (RPC CARLA) dans le pool, sans bloquer la boucle asyncio"""
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    def _next_snapshot(self):
+        snapshot = take_vehicle_snapshot(self.world, self.registry, self._tick())
+        self.snapshots += 1
+        return snapshot
+
+    def tick(self):
+        """Lance le passage à la frame suivante sans l'attendre (renvoie le Future).
+
+        Le travail part tout de suite dans le pool, même si la boucle asyncio
+        ne reprend la main qu'après un rendu bloquant : le serveur calcule la
+        frame suivante pendant l'affichage de la frame courante, qui reste
+        servie jusqu'à ce que `next_snapshot()` récupère la nouvelle.
+        """
+        if self._pending is None:
+            self.calls += 1
+            self._pending = asyncio.wrap_future(self._executor.submit(self._next_snapshot))
+        return self._pending
+
+    async def next_snapshot(self):
+        """Attend la frame lancée par `tick()` (ou la lance) et en fait le snapshot courant"""
+        pending = self.tick()
+        try:
+            self._snapshot = await asyncio.shield(pending)
+        finally:
+            if pending.done():
+                self._pending = None
+        return self._snapshot
+
+    async def snapshot(self):
+        """VehicleSnapshot de la frame courante (un seul snapshot par tick, partagé)"""
+        if self._snapshot is None:
+            return await self.next_snapshot()
+        return self._snapshot
+
+    async def get_location(self, actor_id):
+        """Position (x, y, z) en m d'un véhicule, lue dans le snapshot de la frame"""
+        snapshot = await self.snapshot()
+        return snapshot.positions[snapshot.index_of(actor_id)]
+
+    async def get_forward(self, actor_id):
+        """Direction (x, y) d'un véhicule, lue dans le snapshot de la frame"""
+        snapshot = await self.snapshot()
+        return snapshot.forwards[snapshot.index_of(actor_id)]
+
+    async def get_velocity(self, actor_id):
+        """Vitesse (vx, vy, vz) en m/s d'un véhicule, lue dans le snapshot de la frame"""
+        snapshot = await self.snapshot()
+        return snapshot.velocities[snapshot.index_of(actor_id)]
+
+    async def get_speed(self, actor_id):
+        """Vitesse en km/h d'un véhicule, lue dans le snapshot de la frame"""
+        snapshot = await self.snapshot()
+        return snapshot.speed(actor_id)
+
+    async def get_weather(self):
+        """Météo du serveur, lue une seule fois même si plusieurs coroutines la demandent en même temps"""
+        if self._weather is None:
+            self._weather = asyncio.ensure_future(self.call(self.world.get_weather))
+        try:
+            return await asyncio.shield(self._weather)
+        except Exception:
+            self._weather = None
+            raise
+
+    async def set_weather(self, weather):
+        await self.call(self.world.set_weather, weather)
+        self._weather = None
+
+    async def drain(self):
+        """Attend la frame éventuellement en cours de calcul (avant de changer les réglages du monde)"""
+        if self._pending is not None:
+            await asyncio.gather(self._pending, return_exceptions=True)
+            self._pending = None
+
+    def close(self):
+        """Attend la fin des appels en cours et arrête le pool de threads"""
+        self._executor.shutdown(wait=True)
@@ -1,511 +1,605 @@
-import carla
+import asyncio
 import time
-import pygame
 import random
-import weakref
 import numpy as np
-import pandas as pd
-from datetime import datetime
-import threading
 import sys
 import os
-
-# Charger les hauteurs des véhicules depuis le fichier CSV
-csv_path = "CARLA_Vehicles_Available.csv"
-df_vehicles = pd.read_csv(csv_path, delimiter=";", dtype=str)
-df_vehicles["Height (mm)"] = pd.to_numeric(df_vehicles["Height (mm)"], errors="coerce")
-df_vehicles["Height (m)"] = df_vehicles["Height (mm)"] / 1000
-
-# Connexion au serveur CARLA
-client = carla.Client('localhost', 2000)
-client.set_timeout(80.0)
-
-# Charger le monde (Ville choisie via interface)
-if len(sys.argv) >= 2:
-    town_name = sys.argv[1]  # Ville sélectionnée envoyée par l'interface
-else:
-    print("⚠️ Aucune ville spécifiée, utilisation par défaut: Town03")
-    town_name = "Town03"
-
-client.load_world(town_name)
-world = client.get_world()
-
-# Vérification de l'argument (Blueprint_ID)
-if len(sys.argv) < 3:  # ✅ Vérifie si on a au moins 3 arguments (Ville + Véhicule)
-    print("⚠️ Aucun véhicule spécifié, utilisation du modèle par défaut: Tesla Model 3")
-    vehicle_model = "vehicle.tesla.model3"
-else:
-    vehicle_model = sys.argv[2]  # ✅ Maintenant, le véhicule est en `sys.argv[2]`
-
-# Récupérer la hauteur du véhicule sélectionné
-vehicle_height = df_vehicles.loc[df_vehicles["Blueprint_ID"] == vehicle_model, "Height (m)"].values
-if len(vehicle_height) == 0:
-    print(f"⚠️ Hauteur non trouvée pour {vehicle_model}, utilisation par défaut: 1.5m")
-    vehicle_height = 1.5
-else:
-    vehicle_height = vehicle_height[0]
-
-# Définir les hauteurs des capteurs
-radar_height = vehicle_height + 0.1
-lidar_height = vehicle_height + 0.2
-
-# ✅ Vérification des arguments reçus
-if len(sys.argv) >= 11:
-    town_name = sys.argv[1]  # Ville sélectionnée
-    vehicle_model = sys.argv[2]  # Modèle de véhicule sélectionné
-
-    # ✅ Récupération des valeurs météo
-    nuages = float(sys.argv[3])
-    pluie = float(sys.argv[4])
-    flaques = float(sys.argv[5])
-    vent = float(sys.argv[6])
-    brouillard = float(sys.argv[7])
-    distance_brouillard = float(sys.argv[8])
-    soleil = float(sys.argv[9])
-
-    # ✅ Récupération du spawn index en **sys.argv[10]**
-    spawn_index = int(sys.argv[10])
-
-else:
-    print("⚠️ Nombre d'arguments insuffisant, vérifiez l'appel depuis interface.py")
-    sys.exit(1)
-
-print(distance_brouillard)
-
-# Appliquer les conditions météo dans CARLA
-weather = carla.WeatherParameters(
-    cloudiness=nuages,
-    precipitation=pluie,
-    precipitation_deposits=flaques,
-    wind_intensity=vent,
-    fog_density=brouillard,  # Gardé en pourcentage
-    fog_distance=distance_brouillard,  # Gardé en mètres
-    sun_altitude_angle=soleil  # Gardé en degrés
-)
-
-print(f"🌡️ Météo appliquée : {weather}")
-# ✅ Vérifier la liste des spawn points disponibles
-spawn_points = world.get_map().get_spawn_points()
-
-if spawn_index < len(spawn_points):
-    spawn_point = spawn_points[spawn_index]
-else:
-    print(f"⚠️ Spawn index {spawn_index} hors limite ({len(spawn_points)} disponibles), utilisation de l’index 0.")
-    spawn_point = spawn_points[1]  # Sécurisation pour éviter un crash
-
-# Obtenir la bibliothèque des plans et choisir un véhicule
-blueprint_library = world.get_blueprint_library()
-vehicle_bp = blueprint_library.find(vehicle_model)
-
-
-# Faire apparaître le véhicule
-vehicle = world.try_spawn_actor(vehicle_bp, spawn_point)
-if vehicle is None:
-    print(f"❌ Impossible de faire apparaître le véhicule {vehicle_model}")
-    sys.exit(1)
-
-world.set_weather(weather)
-time.sleep(1)  # Attendre 1 seconde pour que CARLA applique bien la météo
-world.tick()
-applied_weather = world.get_weather()
-print(f"🌡️ Météo appliquée après world.tick() : {vars(applied_weather)}")
-
-
-print(f"🌥️ Météo appliquée : Nuages {nuages}%, Pluie {pluie}%, flaques {flaques},Vent {vent}%, Brouillard {brouillard}%, Distance Brouillard {distance_brouillard}m, Soleil {soleil}°")
-# Debug pour vérifier la bonne récupération
-print(f"🌍 Chargement de la ville : {town_name}")
-print(f"🚗 Modèle de véhicule sélectionné : {vehicle_model}")
-
-
-# Initialiser pygame
-pygame.init()
+from cartes import town_metadata
+from catalogues import vehicle_catalogue
+from enregistrement import SENSOR_COLUMNS, check_log_options, default_log_path, open_sensor_log
+from client_async import AsyncWorld
+from metriques import make_braking_model, safety_metrics
+from perception import LeadPerception
+from pipeline_capteurs import POLICIES, SensorPipeline
+from pretraitement_lidar import LidarPreprocessor
+from profilage import FrameProfiler
+from scenario import ScenarioSpec
+from detection_vehicules import VehicleRegistry, find_lead_vehicle
+from traitement_radar import decode_radar, radar_rows, radar_summary
+from simulation_sync import FrameBarrier, SynchronousRunner
+from telemetrie import WeatherSampler
+from trafic import TrafficPopulation, candidate_spawn_points
 
 # Définir la taille de la fenêtre
 width, height = 1280, 720
-screen = pygame.display.set_mode((width, height))
-pygame.display.set_caption("CARLA Autonomous Vehicle with Advanced HUD")
-
-# Classe HUD pour afficher des informations avancées
-class HUD:
-    def __init__(self, width, height):
-        self.dim = (width, height)
-        self.font = pygame.font.Font(pygame.font.get_default_font(), 20)
-        self._font_mono = pygame.font.Font(pygame.font.get_default_font(), 14)
-        self.notification = ""
-        self.notification_end = 0
-        self.surface = pygame.Surface(self.dim, pygame.SRCALPHA)
-
-    def set_notification(self, text, seconds=4.0):
-        self.notification = text
-        self.notification_end = time.time() + seconds
-
-    def tick(self):
-        current_time = time.time()
-        if current_time > self.notification_end:
-            self.notification = ""
-
-    def render(self, display):
-        self.surface.fill((0, 0, 0, 0))  # Utiliser la transparence pour éviter le clignotement
-        if self.notification:
-            notification_surface = self._font_mono.render(self.notification, True, (255, 255, 255))
-            self.surface.blit(notification_surface, (10, 10))
-        display.blit(self.surface, (0, 0))
-
-    def render_weather_and_metrics(self, display, weather, speed, distance, ttc, stopping_distance):
-        # Créer une surface pour le cadre à gauche
-        info_surface = pygame.Surface((350, 450), pygame.SRCALPHA)  # Surface plus grande
-        info_surface.fill((0, 0, 0, 200))  # Fond semi-transparent
-
-        # Titre "Météo"
-        title_meteo = self.font.render("Météo", True, (255, 255, 255))  # Texte blanc
-        info_surface.blit(title_meteo, (10, 10))
-
-        # Afficher les informations météo
-        y_offset = 50  # Commencer après le titre
-        weather_lines = [
-            f"Vitesse: {speed:.2f} km/h",
-            f"Nuages: {weather.cloudiness:.1f}%",
-            f"Précipitation: {weather.precipitation:.1f}%",
-            f"Précipitation Déposée: {weather.precipitation_deposits:.1f}%",
-            f"Vent: {weather.wind_intensity:.1f}%",
-            f"Altitude Soleil: {weather.sun_altitude_angle:.1f}",
-            f"Densité Brouillard: {weather.fog_density:.1f}%",
-            f"Distance Brouillard: {max(0, (1.0 - weather.fog_distance) * 100):.1f} m"
-        ]
-        for i, line in enumerate(weather_lines):
-            text_surface = self.font.render(line, True, (255, 255, 255))  # Blanc
-            info_surface.blit(text_surface, (10, y_offset + i * 30))
-
-        # Titre "Métriques"
-        title_metriques = self.font.render("Métriques", True, (255, 255, 255))  # Texte blanc
-        info_surface.blit(title_metriques, (10, y_offset + len(weather_lines) * 30 + 20))
-
-        # Afficher les informations de distance, TTC et distance d'arrêt
-        metrics_lines = [
-            f"Distance: {distance:.2f} m",
-            f"TTC: {ttc:.2f} s",
-            f"Distance d'arrêt: {stopping_distance:.2f} m"
-        ]
-        for i, line in enumerate(metrics_lines):
-            text_surface = self.font.render(line, True, (255, 255, 255))  # Blanc
-            info_surface.blit(text_surface, (10, y_offset + len(weather_lines) * 30 + 50 + i * 30))
-
-        # Positionner la surface à gauche
-        display.blit(info_surface, (10, 20))
-
-# Fonction de callback pour recevoir et afficher l'image de la caméra
-def process_image(image, screen):
-    image.convert(carla.ColorConverter.Raw)
-    array = np.frombuffer(image.raw_data, dtype=np.uint8)
-    array = array.reshape((image.height, image.width, 4))  # Inclut l'alpha channel
-    array = array[:, :, :3]  # Supprimer l'alpha channel
-    surface = pygame.surfarray.make_surface(array.swapaxes(0, 1))
-    screen.blit(surface, (0, 0))
-
-# Créer des DataFrames pour les données LiDAR, radar et météo
-lidar_data_df = pd.DataFrame(columns=['x', 'y', 'z', 'intensity', 'timestamp'])
-radar_data_df = pd.DataFrame(columns=['depth', 'velocity', 'azimuth', 'altitude', 'timestamp'])
-meteo_data_df = pd.DataFrame(columns=['cloudiness', 'precipitation', 'wind_intensity', 'sun_azimuth', 'sun_altitude', 'speed', 'timestamp'])
-lock = threading.Lock()
-
-
-hud = HUD(width, height)
-
-if vehicle is not None:
-    # Activer l'autopilote
-    traffic_manager = client.get_trafficmanager(8000)
-    traffic_manager.set_global_distance_to_leading_vehicle(1.5)  # Réduire la distance entre les véhicules pour plus d'animation
-    vehicle.set_autopilot(True, traffic_manager.get_port())
-    traffic_manager.auto_lane_change(vehicle, True)  # Permettre le dépassement
-    traffic_manager.vehicle_percentage_speed_difference(vehicle, random.uniform(0, 5))
-
-
-    # Faire apparaître d'autres véhicules pour la circulation
-    spawn_points_for_npc = world.get_map().get_spawn_points()
-    for _ in range(10):  # Réduire le nombre de véhicules pour éviter les problèmes de performance
-        npc_vehicle_bp = random.choice(blueprint_library.filter('vehicle.*'))
-        npc_spawn_point = random.choice([point for point in spawn_points_for_npc if point.location.distance(spawn_point.location) < 100])
-        npc_vehicle = world.try_spawn_actor(npc_vehicle_bp, npc_spawn_point)
-        if npc_vehicle:
-            npc_vehicle.set_autopilot(True, traffic_manager.get_port())
-            traffic_manager.vehicle_percentage_speed_difference(npc_vehicle, random.uniform(0, 5))
-            npc_vehicle.set_light_state(carla.VehicleLightState(carla.VehicleLightState.All))  # Activer les feux des véhicules
-            traffic_manager.set_global_distance_to_leading_vehicle(1.5)  # Réduire la distance entre les véhicules pour plus d'animation
-            traffic_manager.ignore_lights_percentage(npc_vehicle, 0)  # Respecter les feux
-            traffic_manager.auto_lane_change(vehicle, True)  # Permettre le dépassement
-            traffic_manager.ignore_signs_percentage(npc_vehicle, 0)  # Respecter les panneaux
-            traffic_manager.ignore_walkers_percentage(npc_vehicle, 0)  # Éviter les piétons
-            traffic_manager.ignore_vehicles_percentage(npc_vehicle, 0)  # Prendre en compte les autres véhicule
-
-    # Ajouter un capteur LiDAR au véhicule
-    lidar_bp = blueprint_library.find('sensor.lidar.ray_cast')
-    lidar_bp.set_attribute('range', '50')
-    lidar_bp.set_attribute('rotation_frequency', '10')
-    lidar_bp.set_attribute('channels', '32')
-    lidar_bp.set_attribute('points_per_second', '56000')
-
-    lidar_transform = carla.Transform(carla.Location(x=0, z=lidar_height))
-    lidar = world.spawn_actor(lidar_bp, lidar_transform, attach_to=vehicle)
-
-    # Ajouter un capteur Radar au véhicule
-    radar_bp = blueprint_library.find('sensor.other.radar')
-    radar_bp.set_attribute('horizontal_fov', '30')
-    radar_bp.set_attribute('vertical_fov', '10')
-    radar_bp.set_attribute('range', '20')
-    radar_transform = carla.Transform(carla.Location(x=0, z=radar_height))
-    radar = world.spawn_actor(radar_bp, radar_transform, attach_to=vehicle)
-
-    # Fonction pour traiter et enregistrer les données LiDAR
-    def process_lidar(lidar_data):
-        points = np.frombuffer(lidar_data.raw_data, dtype=np.float32)
-
-        # ✅ Vérifier que la taille est bien un multiple de 4
-        if points.size % 4 != 0:
-            points = points[:-(points.size % 4)]  # Ajuster pour éviter les erreurs de reshape
-
-        points = points.reshape((-1, 4))  # x, y, z, intensity
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
-
-        # ✅ Filtrage correct
-        filtered_points = points[(points[:, 2] + lidar_height >= -1) & (points[:, 2] <= 1.5)]
-
-        with lock:
-            with open('lidar_data.csv', 'a') as f:
-                if f.tell() == 0:
-                    f.write('x,y,z,intensity,timestamp\n')
-                for point in filtered_points:
-                    f.write(f"{point[0]:.2f},{point[1]:.2f},{point[2]:.2f},{point[3]:.2f},{current_time}\n")
-
-
-    # Fonction pour traiter et enregistrer les données Radar
-    # Fonction pour traiter et enregistrer les données Radar
-    def process_radar(radar_data):
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
-        with lock:
-            with open('radar_data.csv', 'a') as f:
-                if f.tell() == 0:
-                    f.write('depth,velocity,azimuth,altitude,timestamp\n')
-                for detection in radar_data:
-                    f.write(f"{detection.depth},{detection.velocity},{detection.azimuth},{detection.altitude},{current_time}\n")
-
-
-    # Fonction pour enregistrer les données météo
-    def log_weather():
-        world.set_weather(weather)
-        current_weather = world.get_weather()
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
-        vehicle_speed = vehicle.get_velocity()
-        # Convertir la vitesse en km/h
-        speed = 3.6 * np.linalg.norm([vehicle_speed.x, vehicle_speed.y, vehicle_speed.z])
-
-        # ✅ Stocker directement la valeur envoyée à `set_weather()`
-        if current_weather.fog_distance is not None:
-            recorded_fog_distance = (1.0 - current_weather.fog_distance) * 100  # Conversion en mètres
-            recorded_fog_distance = max(0, recorded_fog_distance)  # Éviter les valeurs négatives
-        else:
-            recorded_fog_distance = 0  # Valeur par défaut si non définie
-        print(f"🌡️ Météo actuelle : {current_weather}")
-        print(f"📡 Enregistrement fog_distance : {recorded_fog_distance} mètres (valeur réellement envoyée)")
-
-
-        # Vérifier que toutes les valeurs existent
-        weather_data = [
-            current_weather.cloudiness if current_weather.cloudiness is not None else 0,
-            current_weather.precipitation if current_weather.precipitation is not None else 0,
-            current_weather.precipitation_deposits if current_weather.precipitation_deposits is not None else 0,
-            current_weather.wind_intensity if current_weather.wind_intensity is not None else 0,
-            current_weather.sun_azimuth_angle if current_weather.sun_azimuth_angle is not None else 0,
-            current_weather.sun_altitude_angle if current_weather.sun_altitude_angle is not None else 0,
-            current_weather.fog_density if current_weather.fog_density is not None else 0,
-            recorded_fog_distance,
-            speed if not np.isnan(speed) else 0,  # Gérer le cas où la vitesse est NaN
-            current_time
-        ]
-
-        # Vérifier si le fichier existe et ajouter l'entête si besoin
-        with lock:
-            with open('meteo_data.csv', 'a') as f:
-                if f.tell() == 0:
-                    f.write(
-                        'cloudiness,precipitation,precipitation_deposits,wind_intensity,sun_azimuth,sun_altitude,fog_density,fog_distance,speed,timestamp\n')
-                f.write(','.join(map(str, weather_data)) + '\n')
-
-        print(f"📡 Données météo enregistrées : {weather_data}")
-
-
-    # Attacher les capteurs et enregistrer les données
-    lidar.listen(lambda lidar_data: process_lidar(lidar_data))
-    radar.listen(lambda radar_data: process_radar(radar_data))
-
-    # Ajouter une caméra au véhicule
-    camera_bp = blueprint_library.find('sensor.camera.rgb')
-    camera_bp.set_attribute('image_size_x', f'{width}')
-    camera_bp.set_attribute('image_size_y', f'{height}')
-    camera_bp.set_attribute('fov', '110')
-    camera_transform = carla.Transform(carla.Location(x=-10, y=0, z=5), carla.Rotation(pitch=-15))
-    camera = world.spawn_actor(camera_bp, camera_transform, attach_to=vehicle)
-
-    last_weather_log_time = 0
-
-
-    def detect_vehicle_ahead():
-        vehicles = world.get_actors().filter('vehicle.*')  # Récupérer tous les véhicules
-
-        min_distance = float('inf')
-        found_vehicle = None
-        found_vehicle_speed = None
-        ttc = float('inf')  # Initialiser le TTC à l'infini
-
-        # Récupérer la vitesse de votre véhicule
-        my_velocity = vehicle.get_velocity()
-        my_speed = 3.6 * np.linalg.norm([my_velocity.x, my_velocity.y, my_velocity.z])  # Convertir en km/h
-
-        for v in vehicles:
-            if v.id == vehicle.id:  # Ignorer notre propre véhicule
-                continue
-
-            # Calculer la distance entre notre véhicule et l'autre
-            distance = vehicle.get_location().distance(v.get_location())
-
-            if 0 < distance < 20:  # Garder uniquement les véhicules entre 3m et 20m
-                # Vérifier que le véhicule va dans le même sens
-                my_forward_vector = vehicle.get_transform().get_forward_vector()
-                other_forward_vector = v.get_transform().get_forward_vector()
-
-                # Produit scalaire entre les vecteurs de direction
-                dot_product = my_forward_vector.x * other_forward_vector.x + my_forward_vector.y * other_forward_vector.y
-
-                if dot_product > 0.5:  # Si le produit scalaire est positif, les véhicules vont dans le même sens
-                    if distance < min_distance:
-                        min_distance = distance
-                        found_vehicle = v
-                        # Récupérer la vitesse du véhicule détecté
-                        found_vehicle_velocity = v.get_velocity()
-                        # Convertir la vitesse en km/h (1 m/s = 3.6 km/h)
-                        found_vehicle_speed = 3.6 * np.linalg.norm(
-                            [found_vehicle_velocity.x, found_vehicle_velocity.y, found_vehicle_velocity.z])
-
-                        # Calculer la vitesse relative (en m/s)
-                        relative_speed = (my_speed - found_vehicle_speed) / 3.6  # Convertir en m/s
-
-                        # Calculer le TTC (en secondes)
-                        if relative_speed > 0:  # Éviter la division par zéro ou les valeurs négatives
-                            ttc = distance / relative_speed
-                        else:
-                            ttc = float(
-                                'inf')  # Pas de risque de collision si la vitesse relative est nulle ou négative
-
-        if found_vehicle:
-            print(
-                f"🚗 Véhicule détecté DEVANT à {min_distance:.2f}m (même direction), vitesse: {found_vehicle_speed:.2f} km/h")
-            print(f"⏱️ Time to Collision (TTC): {ttc:.2f} secondes")
-        else:
-            print("✅ Aucun véhicule devant dans le même sens.")
-
-        return found_vehicle is not None, found_vehicle_speed, ttc, found_vehicle  # Retourner également le véhicule détecté
-
-
-    if camera is not None:
-        try:
-            weak_self = weakref.ref(screen)
-            camera.listen(lambda image: process_image(image, weak_self()))
-
-            # Supprimer le fichier d'arrêt s'il existe
-            if os.path.exists("stop_simulation.txt"):
-                os.remove("stop_simulation.txt")
 
 
-            # Lancer la boucle principale
+def parse_arguments(argv):
+    """Lit les arguments positionnels de l'interface et les options --cle=valeur (voir scenario.ScenarioSpec)"""
+    spec = ScenarioSpec.from_argv(argv)
+    options = spec.string_options()
+    check_options(options)
+    return spec.scenario(), options
+
+
+def check_options(options):
+    """Vérifie le format, la compression et la politique de file avant la connexion (ValueError sinon) :
+    une option invalide ne doit jamais laisser des véhicules sur le serveur"""
+    check_log_options(options.get("format", "csv"), options.get("compression") or None)
+    queue_policy = options.get("queue-policy")
+    if queue_policy is not None and queue_policy not in POLICIES:
+        raise ValueError(f"Politique de file inconnue : '{queue_policy}' (choix : {', '.join(POLICIES)})")
+
+
+def connect(options):
+    """Connexion au serveur CARLA (--host, --port) ; carla n'est importé qu'ici, après la lecture des arguments"""
+    global carla
+    import carla
+
+    client = carla.Client(options.get("host", "localhost"), int(options.get("port", 2000)))
+    client.set_timeout(80.0)
+    return client
+
+
+def load_town(client, town_name, current_town=None):
+    """Charge la ville, sauf si elle est déjà chargée ; renvoie (world, rechargée)"""
+    if town_name == current_town:
+        return client.get_world(), False
+    client.load_world(town_name)
+    return client.get_world(), True
+
+
+def init_display():
+    """Initialise pygame et la fenêtre, sauf si elle est déjà ouverte"""
+    global pygame
+    import pygame
+
+    if not pygame.display.get_init() or pygame.display.get_surface() is None:
+        pygame.init()
+        pygame.display.set_mode((width, height))
+        pygame.display.set_caption("CARLA Autonomous Vehicle with Advanced HUD")
+    return pygame.display.get_surface()
+
+
+def run_simulation(client, world, scenario, options):
+    """Exécute un scénario sur un monde déjà chargé ; renvoie les durées de mise en place et de simulation"""
+    setup_start = time.perf_counter()
+    check_options(options)  # Scénarios confiés au worker ou à scenario.py sans passer par parse_arguments
+    town_name = scenario["town_name"]
+    vehicle_model = scenario["vehicle_model"]
+    nuages = scenario["nuages"]
+    pluie = scenario["pluie"]
+    flaques = scenario["flaques"]
+    vent = scenario["vent"]
+    brouillard = scenario["brouillard"]
+    distance_brouillard = scenario["distance_brouillard"]
+    soleil = scenario["soleil"]
+    spawn_index = scenario["spawn_index"]
+
+    # Récupérer la hauteur du véhicule sélectionné
+    vehicle_height = vehicle_catalogue().height(vehicle_model)
+    if vehicle_height is None:
+        print(f"⚠️ Hauteur non trouvée pour {vehicle_model}, utilisation par défaut: 1.5m")
+        vehicle_height = 1.5
+
+    # Définir les hauteurs des capteurs
+    radar_height = vehicle_height + 0.1
+    lidar_height = vehicle_height + 0.2
+
+    # Traffic Manager (--tm-port) et répertoire des données (--output)
+    tm_port = int(options.get("tm-port", 8000))
+    output_dir = options.get("output", ".")
+    os.makedirs(output_dir, exist_ok=True)
+    stop_file = os.path.join(output_dir, "stop_simulation.txt")
+
+    # Format d'enregistrement des capteurs : csv (défaut), npz, parquet ou archive (relue avec archive.py)
+    log_format = options.get("format", "csv")
+    log_compression = options.get("compression") or None
+
+    # Mode sans affichage (--headless) : ni pygame, ni caméra, ni HUD ; --no-rendering coupe aussi le rendu côté serveur.
+    # --duration=<s> arrête la simulation après ce temps simulé (utile pour les campagnes de nuit).
+    headless = "headless" in options
+    no_rendering = "no-rendering" in options
+    duration = float(options["duration"]) if options.get("duration") else None
+
+    # Mode synchrone à pas fixe (--sync, --delta=0.05) et graine aléatoire pour des exécutions reproductibles.
+    # Sans rendu, c'est le mode synchrone qui permet d'aller aussi vite que le serveur le permet.
+    sync_mode = "sync" in options or headless or no_rendering
+    delta_seconds = float(options.get("delta", 0.05))
+    seed = int(options["seed"]) if options.get("seed") else None
+    if seed is not None:
+        random.seed(seed)
+
+    # File bornée entre les callbacks capteurs et les écritures : taille, politique (block, drop-oldest, drop-newest), workers
+    # En mode synchrone on bloque plutôt que de jeter, pour que chaque frame soit complète
+    queue_size = int(options.get("queue-size", 32))
+    queue_policy = options.get("queue-policy", "block" if sync_mode else "drop-oldest")
+    queue_workers = int(options.get("workers", 1))
+
+    # Nombre de véhicules de circulation, créés par lots (quelques centaines restent raisonnables)
+    npc_count = int(options.get("npc", 10))
+
+    # Prétraitement LiDAR avant enregistrement : bande de hauteur historique, plus en option
+    # --lidar-range=<m>, --lidar-min-range=<m>, --lidar-azimuth=<min>:<max> (degrés), --lidar-ground
+    # (suppression du sol) et --lidar-voxel=<m> ; --lidar-pps règle le nombre de points par seconde du capteur
+    lidar_pps = int(options.get("lidar-pps", 56000))
+    lidar_azimuth = options.get("lidar-azimuth")
+    lidar_preprocessor = LidarPreprocessor(
+        z_min=-1 - lidar_height,
+        z_max=1.5,
+        min_range=float(options["lidar-min-range"]) if options.get("lidar-min-range") else None,
+        max_range=float(options["lidar-range"]) if options.get("lidar-range") else None,
+        azimuth=tuple(float(value) for value in lidar_azimuth.split(":")) if lidar_azimuth else None,
+        sensor_height=lidar_height,
+        remove_ground="lidar-ground" in options,
+        voxel_size=float(options["lidar-voxel"]) if options.get("lidar-voxel") else None,
+    )
+
+    # Modèle de freinage pour la distance d'arrêt (--braking-model=constant|meteo, --reaction-time, --deceleration) :
+    # "meteo" réduit l'adhérence sur route mouillée et allonge le temps de réaction par brouillard ou pluie
+    braking_model = make_braking_model(options.get("braking-model", "constant"),
+                                       reaction_time=float(options.get("reaction-time", 1.0)),
+                                       deceleration=float(options.get("deceleration", 6.0)))
+
+    # Période d'enregistrement de la météo et de la vitesse, en secondes simulées
+    meteo_period = float(options.get("meteo-period", 2.0))
+
+    # Profilage (--profile) : durées par étape de la boucle, des callbacks et des files capteurs,
+    # résumé p50/p95/p99/max à la fin (et dans profil.json) ; --profile-hud l'affiche aussi en direct
+    profile_hud = "profile-hud" in options and not headless
+    profiler = FrameProfiler(enabled="profile" in options or profile_hud)
+
+    # Perception (--perception) : véhicule devant estimé par le LiDAR et le radar, enregistré dans perception_data
+    # à côté de la vérité terrain du simulateur pour mesurer l'effet de la météo sur les capteurs
+    perception = LeadPerception(lidar_height, radar_height) if "perception" in options else None
+
+    print(distance_brouillard)
+
+    # Appliquer les conditions météo dans CARLA
+    weather = carla.WeatherParameters(
+        cloudiness=nuages,
+        precipitation=pluie,
+        precipitation_deposits=flaques,
+        wind_intensity=vent,
+        fog_density=brouillard,  # Gardé en pourcentage
+        fog_distance=distance_brouillard,  # Gardé en mètres
+        sun_altitude_angle=soleil  # Gardé en degrés
+    )
+
+    print(f"🌡️ Météo appliquée : {weather}")
+    # ✅ Vérifier la liste des spawn points disponibles (fichier cartes/<ville>.json après le premier chargement)
+    spawn_points = town_metadata(client, world, town_name).spawn_transforms()
+
+    if spawn_index < len(spawn_points):
+        spawn_point = spawn_points[spawn_index]
+    else:
+        print(f"⚠️ Spawn index {spawn_index} hors limite ({len(spawn_points)} disponibles), utilisation de l’index 0.")
+        spawn_point = spawn_points[1]  # Sécurisation pour éviter un crash
+
+    # Obtenir la bibliothèque des plans et choisir un véhicule
+    blueprint_library = world.get_blueprint_library()
+    vehicle_bp = blueprint_library.find(vehicle_model)
+
+
+    # Faire apparaître le véhicule
+    vehicle = world.try_spawn_actor(vehicle_bp, spawn_point)
+    if vehicle is None:
+        raise RuntimeError(f"❌ Impossible de faire apparaître le véhicule {vehicle_model}")
+
+    # Tout ce qui est créé après le véhicule est libéré dans le `finally`, même si la mise en place échoue
+    traffic = lidar = radar = camera = None
+    lidar_writer = radar_writer = radar_summary_writer = meteo_writer = None
+    actors_writer = metrics_writer = perception_writer = None
+    sensor_pipeline = weather_sampler = camera_view = camera_frame = None
+    runner = None
+    carla_world = None
+    sim_start = None
+    last_elapsed = None
+    setup_seconds = None
+    last_recorded_frame = None
+    try:
+        world.set_weather(weather)
+        time.sleep(1)  # Attendre 1 seconde pour que CARLA applique bien la météo
+        world.tick()
+        applied_weather = world.get_weather()
+        print(f"🌡️ Météo appliquée après world.tick() : {vars(applied_weather)}")
+
+
+        print(f"🌥️ Météo appliquée : Nuages {nuages}%, Pluie {pluie}%, flaques {flaques},Vent {vent}%, Brouillard {brouillard}%, Distance Brouillard {distance_brouillard}m, Soleil {soleil}°")
+        # Debug pour vérifier la bonne récupération
+        print(f"🌍 Chargement de la ville : {town_name}")
+        print(f"🚗 Modèle de véhicule sélectionné : {vehicle_model}")
+
+        # Initialiser pygame et le HUD (pas en mode sans affichage)
+        # Image caméra : le callback dépose la dernière image, la boucle principale l'affiche
+        if not headless:
+            from affichage_camera import CameraView, LatestFrame
+            from affichage_hud import HUD
+
+            screen = init_display()
+            camera_frame = LatestFrame()
+            camera_view = CameraView(width, height)
+            hud = HUD(width, height)
+
+        # Activer l'autopilote
+        traffic_manager = client.get_trafficmanager(tm_port)
+        if seed is not None:
+            traffic_manager.set_random_device_seed(seed)
+        traffic_manager.set_global_distance_to_leading_vehicle(1.5)  # Réduire la distance entre les véhicules pour plus d'animation
+        vehicle.set_autopilot(True, traffic_manager.get_port())
+        traffic_manager.auto_lane_change(vehicle, True)  # Permettre le dépassement
+        traffic_manager.vehicle_percentage_speed_difference(vehicle, random.uniform(0, 5))
+
+
+        # Faire apparaître d'autres véhicules pour la circulation, en un seul lot (--npc=<nombre>, 10 par défaut)
+        # Les véhicules ajoutés sont détruits à la fin : le monde peut être réutilisé par la simulation suivante
+        traffic = TrafficPopulation(client, traffic_manager)
+        npc_points = candidate_spawn_points(spawn_points, spawn_point.location, radius=100.0, exclude=spawn_point)
+        traffic.spawn(world, npc_count, npc_points, blueprint_library.filter('vehicle.*'))
+        print(f"🚙 {len(traffic)} véhicules de circulation ajoutés ({traffic.failed} emplacements occupés)")
+
+        # Ajouter un capteur LiDAR au véhicule
+        lidar_bp = blueprint_library.find('sensor.lidar.ray_cast')
+        lidar_bp.set_attribute('range', '50')
+        lidar_bp.set_attribute('rotation_frequency', '10')
+        lidar_bp.set_attribute('channels', '32')
+        lidar_bp.set_attribute('points_per_second', str(lidar_pps))
+
+        lidar_transform = carla.Transform(carla.Location(x=0, z=lidar_height))
+        lidar = world.spawn_actor(lidar_bp, lidar_transform, attach_to=vehicle)
+
+        # Ajouter un capteur Radar au véhicule
+        radar_bp = blueprint_library.find('sensor.other.radar')
+        radar_bp.set_attribute('horizontal_fov', '30')
+        radar_bp.set_attribute('vertical_fov', '10')
+        radar_bp.set_attribute('range', '20')
+        radar_transform = carla.Transform(carla.Location(x=0, z=radar_height))
+        radar = world.spawn_actor(radar_bp, radar_transform, attach_to=vehicle)
+
+        # Chaque capteur signale les frames traitées ; en mode synchrone on les attend avant le tick suivant
+        frame_barrier = FrameBarrier()
+        for sensor_name in ('lidar', 'radar') if headless else ('lidar', 'radar', 'camera'):
+            frame_barrier.expect(sensor_name)
+
+        # Enregistreurs ouverts une seule fois pour toute la simulation
+        lidar_writer = open_sensor_log('lidar', log_format, compression=log_compression,
+                                       path=os.path.join(output_dir, default_log_path('lidar', log_format)))
+        radar_writer = open_sensor_log('radar', log_format, compression=log_compression,
+                                       path=os.path.join(output_dir, default_log_path('radar', log_format)))
+        radar_summary_writer = open_sensor_log('radar_resume', log_format, compression=log_compression,
+                                               path=os.path.join(output_dir, default_log_path('radar_resume', log_format)))
+        meteo_writer = open_sensor_log('meteo', log_format, compression=log_compression,
+                                       path=os.path.join(output_dir, default_log_path('meteo', log_format)))
+        # Snapshot des véhicules et métriques à chaque frame, pour pouvoir rejouer les métriques hors ligne (rejeu.py)
+        actors_writer = open_sensor_log('acteurs', log_format, compression=log_compression,
+                                        path=os.path.join(output_dir, default_log_path('acteurs', log_format)))
+        metrics_writer = open_sensor_log('metrics', log_format, compression=log_compression,
+                                         path=os.path.join(output_dir, default_log_path('metrics', log_format)))
+        perception_writer = None
+        if perception is not None:
+            perception_writer = open_sensor_log('perception', log_format, compression=log_compression,
+                                                path=os.path.join(output_dir, default_log_path('perception', log_format)))
+
+        # Fonction pour traiter et enregistrer les données LiDAR
+        def process_lidar(lidar_data):
+            points = np.frombuffer(lidar_data.raw_data, dtype=np.float32)
+
+            # ✅ Vérifier que la taille est bien un multiple de 4
+            if points.size % 4 != 0:
+                points = points[:-(points.size % 4)]  # Ajuster pour éviter les erreurs de reshape
+
+            points = points.reshape((-1, 4))  # x, y, z, intensity
+
+            # ✅ La perception utilise le balayage complet (le sol du couloir indique si l'avant a été balayé)
+            if perception is not None:
+                perception.update_lidar(lidar_data.frame, lidar_data.timestamp, points)
+
+            # ✅ Filtrage (bande de hauteur, ROI, sol, voxels) avant tout enregistrement
+            filtered_points = lidar_preprocessor.process(points)
+
+            # ✅ Écriture vectorisée, le formatage et le disque sont gérés hors du callback
+            lidar_writer.write(filtered_points, lidar_data.frame, sim_time=lidar_data.timestamp)
+            frame_barrier.arrived('lidar', lidar_data.frame)
+
+
+        # Fonction pour traiter et enregistrer les données Radar
+        # Fonction pour traiter et enregistrer les données Radar
+        def process_radar(radar_data):
+            # ✅ Décodage en un seul passage du tampon brut, sans lire chaque détection depuis Python
+            detections = decode_radar(radar_data.raw_data)
+            if perception is not None:
+                perception.update_radar(radar_data.timestamp, detections)
+            radar_writer.write(radar_rows(detections), radar_data.frame, sim_time=radar_data.timestamp)
+            radar_summary_writer.write(radar_summary(detections)[np.newaxis], radar_data.frame,
+                                       sim_time=radar_data.timestamp)
+            frame_barrier.arrived('radar', radar_data.frame)
+
+
+        # Météo et vitesse enregistrées toutes les --meteo-period secondes simulées (2 par défaut),
+        # sans réappliquer ni relire la météo tant qu'elle ne change pas
+        weather_sampler = WeatherSampler(world, meteo_writer, period=meteo_period, weather=applied_weather)
+
+
+        # Les callbacks ne font que mettre la mesure brute en file, les workers font le reste
+        sensor_pipeline = SensorPipeline(maxsize=queue_size, policy=queue_policy, workers=queue_workers,
+                                         profiler=profiler if profiler.enabled else None)
+        sensor_pipeline.register('lidar', process_lidar)
+        sensor_pipeline.register('radar', process_radar)
+        sensor_pipeline.start()
+
+        # Attacher les capteurs et enregistrer les données
+        lidar.listen(profiler.timed('lidar.callback', lambda lidar_data: sensor_pipeline.submit('lidar', lidar_data)))
+        radar.listen(profiler.timed('radar.callback', lambda radar_data: sensor_pipeline.submit('radar', radar_data)))
+
+        # Ajouter une caméra au véhicule (inutile sans affichage)
+        if not headless:
+            camera_bp = blueprint_library.find('sensor.camera.rgb')
+            camera_bp.set_attribute('image_size_x', f'{width}')
+            camera_bp.set_attribute('image_size_y', f'{height}')
+            camera_bp.set_attribute('fov', '110')
+            camera_transform = carla.Transform(carla.Location(x=-10, y=0, z=5), carla.Rotation(pitch=-15))
+            camera = world.spawn_actor(camera_bp, camera_transform, attach_to=vehicle)
+
+
+        # Un seul snapshot par itération : positions, directions et vitesses de tous les véhicules
+        vehicle_registry = VehicleRegistry(world)
+
+        def detect_vehicle_ahead(snapshot):
+            lead = find_lead_vehicle(snapshot, vehicle.id)
+
+            if lead is not None:
+                print(
+                    f"🚗 Véhicule détecté DEVANT à {lead.distance:.2f}m (même direction), vitesse: {lead.speed:.2f} km/h")
+                print(f"⏱️ Time to Collision (TTC): {lead.ttc:.2f} secondes")
+            else:
+                print("✅ Aucun véhicule devant dans le même sens.")
+
+            return lead
+
+        if camera is not None:
+            def on_camera_image(image):
+                camera_frame.put(image)
+                frame_barrier.arrived('camera', image.frame)
+
+            camera.listen(profiler.timed('camera.callback', on_camera_image))
+
+        # Supprimer le fichier d'arrêt s'il existe
+        if os.path.exists(stop_file):
+            os.remove(stop_file)
+
+
+        # Lancer la boucle principale
+        if not headless:
             clock = pygame.time.Clock()
-            while True:
+        if sync_mode:
+            runner = SynchronousRunner(world, traffic_manager, delta_seconds, barrier=frame_barrier,
+                                       no_rendering=no_rendering)
+            runner.start()
 
-                # Détecter les véhicules devant
-                vehicle_detected, vehicle_speed, ttc, found_vehicle = detect_vehicle_ahead()
-                if vehicle_detected:
-                    print("⚠️ Véhicule détecté dans la même direction !")
-                    distance = vehicle.get_location().distance(found_vehicle.get_location())  # Distance avec le véhicule détecté
-                else:
-                    print("✅ Aucun véhicule détecté.")
-                    distance = float('inf')  # Aucun véhicule détecté, distance infinie
-                    ttc = float('inf')  # Aucun véhicule détecté, TTC infini
+        wall_start = time.perf_counter()
+        setup_seconds = wall_start - setup_start
+        print(f"⚙️ Mise en place du scénario : {setup_seconds:.2f} s")
 
+        # Façade asyncio : un seul snapshot par tick, partagé par toutes les requêtes de la frame
+        carla_world = AsyncWorld(world, tick=runner.tick if runner is not None else world.get_snapshot,
+                                 registry=vehicle_registry)
 
+        async def simulation_loop():
+            nonlocal sim_start, last_elapsed, last_recorded_frame
+            while True:
+                profiler.frame()
+                # En mode synchrone c'est ce script qui fait avancer la simulation d'un pas fixe ;
+                # la frame a déjà été lancée pendant le rendu de la précédente, on attend seulement la fin
+                with profiler.stage('tick'):
+                    snapshot = await carla_world.next_snapshot()
+                if sim_start is None:
+                    sim_start = snapshot.elapsed_seconds
+                last_elapsed = snapshot.elapsed_seconds
 
-                if detect_vehicle_ahead():
-                    print("⚠️ Véhicule détecté dans la même direction !")
+                # Détecter les véhicules devant
+                with profiler.stage('detection'):
+                    lead = detect_vehicle_ahead(snapshot)
+                    if lead is not None:
+                        print("⚠️ Véhicule détecté dans la même direction !")
+                        distance = lead.distance  # Distance avec le véhicule détecté
+                        ttc = lead.ttc
+                    else:
+                        print("✅ Aucun véhicule détecté.")
+                        distance = float('inf')  # Aucun véhicule détecté, distance infinie
+                        ttc = float('inf')  # Aucun véhicule détecté, TTC infini
 
                 # Vérifier si un signal d'arrêt a été envoyé
-                if os.path.exists("stop_simulation.txt"):
+                if os.path.exists(stop_file):
                     print("🛑 Signal d'arrêt détecté, arrêt de la simulation...")
                     break  # Quitter la boucle principale
+                if duration is not None and snapshot.elapsed_seconds - sim_start >= duration:
+                    print(f"🏁 Durée simulée de {duration} s atteinte, arrêt de la simulation...")
+                    break
                 # Gérer les événements pygame
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        raise KeyboardInterrupt
-                    elif event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_w:
-                            # Modifier la météo au hasard lorsque 'w' est pressé
-                            weather_presets = [
-                                carla.WeatherParameters.ClearNoon,
-                                carla.WeatherParameters.CloudyNoon,
-                                carla.WeatherParameters.WetNoon,
-                                carla.WeatherParameters.WetCloudyNoon,
-                                carla.WeatherParameters.MidRainyNoon,
-                                carla.WeatherParameters.HardRainNoon,
-                                carla.WeatherParameters.SoftRainNoon
-                            ]
-                            new_weather = random.choice(weather_presets)
-                            world.set_weather(new_weather)
-                            hud.set_notification(f"Météo définie sur: {new_weather}")
-
-                # Enregistrer les données météo toutes les 5 secondes
-                current_time = time.time()
-                if current_time - last_weather_log_time >= 2:
-                    log_weather()
-                    last_weather_log_time = current_time
-
-                # Obtenir la vitesse actuelle et les paramètres météo
-                vehicle_speed = vehicle.get_velocity()
-                speed = 3.6 * np.linalg.norm([vehicle_speed.x, vehicle_speed.y, vehicle_speed.z])
-                current_weather = world.get_weather()
-
-                # Convertir la vitesse en m/s pour le calcul de la distance d'arrêt
-                speed_mps = speed / 3.6
-
-                # Temps de réaction (1 seconde par défaut)
-                reaction_time = 1.0  # en secondes
-
-                # Décélération (6 m/s² pour un freinage normal)
-                deceleration = 6.0  # en m/s²
-
-                # Calculer la distance d'arrêt
-                reaction_distance = speed_mps * reaction_time
-                braking_distance = (speed_mps ** 2) / (2 * deceleration)
-                stopping_distance = reaction_distance + braking_distance
-
-                # Dans la boucle principale
-                hud.render_weather_and_metrics(screen, current_weather, speed, distance, ttc, stopping_distance)
-
-                # Mettre à jour l'affichage du HUD
-                hud.tick()
-                hud.render(screen)
-                pygame.display.update()
-
-                clock.tick(30)
-        except KeyboardInterrupt:
-            print("Arrêt de la simulation...")
-        finally:
-            # Nettoyer et détruire les acteurs
-            print("Nettoyage en cours...")
+                with profiler.stage('evenements'):
+                    for event in pygame.event.get() if not headless else ():
+                        if event.type == pygame.QUIT:
+                            raise KeyboardInterrupt
+                        elif event.type == pygame.KEYDOWN:
+                            if event.key == pygame.K_w:
+                                # Modifier la météo au hasard lorsque 'w' est pressé
+                                weather_presets = [
+                                    carla.WeatherParameters.ClearNoon,
+                                    carla.WeatherParameters.CloudyNoon,
+                                    carla.WeatherParameters.WetNoon,
+                                    carla.WeatherParameters.WetCloudyNoon,
+                                    carla.WeatherParameters.MidRainyNoon,
+                                    carla.WeatherParameters.HardRainNoon,
+                                    carla.WeatherParameters.SoftRainNoon
+                                ]
+                                new_weather = random.choice(weather_presets)
+                                weather_sampler.set_weather(new_weather)
+                                hud.set_notification(f"Météo définie sur: {new_weather}")
+
+                # Obtenir la vitesse actuelle et les paramètres météo (en cache tant qu'ils ne changent pas)
+                # km/h, lue dans le snapshot de la frame sans requête supplémentaire
+                speed = await carla_world.get_speed(vehicle.id) if vehicle.id in snapshot else 0.0
+                with profiler.stage('meteo'):
+                    weather_sampler.sample(snapshot.elapsed_seconds, snapshot.frame, speed)
+                    current_weather = weather_sampler.weather
+
+                # Calculer la distance d'arrêt, le TTC, le temps inter-véhiculaire... avec le modèle de freinage choisi
+                lead_speed = lead.speed if lead is not None else 0.0
+                metrics = safety_metrics(speed, distance, lead_speed, current_weather, braking_model)
+                stopping_distance = float(metrics['stopping_distance'])
+
+                # Enregistrer une seule fois chaque frame (la boucle peut revoir la même frame en mode asynchrone)
+                if snapshot.frame != last_recorded_frame:
+                    last_recorded_frame = snapshot.frame
+                    actors_writer.write(snapshot.as_rows(vehicle.id), snapshot.frame, sim_time=snapshot.elapsed_seconds)
+                    metrics.update(sim_time=snapshot.elapsed_seconds, speed=speed, distance=distance, lead_speed=lead_speed,
+                                   lead_id=lead.actor_id if lead is not None else -1)
+                    metrics_writer.write(np.array([[metrics[name] for name in SENSOR_COLUMNS['metrics']]],
+                                                  dtype=np.float32), snapshot.frame, sim_time=snapshot.elapsed_seconds)
+                    if perception_writer is not None:
+                        estimate = perception.estimate()
+                        estimate.update(sim_time=snapshot.elapsed_seconds, gt_lead_id=metrics['lead_id'],
+                                        gt_distance=distance,
+                                        gt_closing_speed=(speed - lead_speed) / 3.6 if lead is not None else 0.0)
+                        perception_row = np.array([[estimate[name] for name in SENSOR_COLUMNS['perception']]],
+                                                  dtype=np.float32)
+                        perception_writer.write(perception_row, snapshot.frame, sim_time=snapshot.elapsed_seconds)
+
+                # Mode synchrone : lancer la frame suivante tout de suite, le serveur la calcule pendant le rendu.
+                # En mode asynchrone get_snapshot() ne fait que lire le dernier état reçu : on le lit au début
+                # de l'itération suivante, après l'attente, pour qu'il soit le plus récent possible.
+                if runner is not None:
+                    carla_world.tick()
+
+                if headless:
+                    continue
+
+                # Afficher la dernière image caméra reçue, puis le HUD par-dessus (tout depuis ce thread)
+                with profiler.stage('camera'):
+                    latest_image = camera_frame.take()
+                    if latest_image is not None:
+                        camera_view.update(latest_image.raw_data)
+                    camera_view.blit(screen)
+
+                with profiler.stage('hud'):
+                    # Dans la boucle principale
+                    hud.render_weather_and_metrics(screen, current_weather, speed, distance, ttc, stopping_distance)
+
+                    # Mettre à jour l'affichage du HUD
+                    hud.tick()
+                    hud.render(screen)
+                    if profile_hud:
+                        hud.render_profile(screen, profiler.hud_lines())
+                with profiler.stage('affichage'):
+                    pygame.display.update()
+
+                if runner is None:
+                    with profiler.stage('attente'):
+                        clock.tick(30)
+
+        asyncio.run(simulation_loop())
+    except KeyboardInterrupt:
+        print("Arrêt de la simulation...")
+    finally:
+        # Nettoyer et détruire les acteurs
+        print("Nettoyage en cours...")
+        log_error = None
+        try:
+            if sim_start is not None:
+                wall_elapsed = time.perf_counter() - wall_start
+                sim_elapsed = last_elapsed - sim_start
+                print(f"⏩ {sim_elapsed:.1f} s simulées en {wall_elapsed:.1f} s réelles "
+                      f"(x{sim_elapsed / wall_elapsed if wall_elapsed > 0 else float('inf'):.2f} temps réel)")
+            # Laisser finir une frame éventuellement lancée avant de quitter le mode synchrone
+            if carla_world is not None:
+                carla_world.close()
+            if runner is not None:
+                runner.stop()
             if lidar is not None and lidar.is_alive:
                 lidar.destroy()
             if radar is not None and radar.is_alive:
                 radar.destroy()
             if camera is not None and camera.is_alive:
                 camera.destroy()
-            if vehicle is not None and vehicle.is_alive:
-                vehicle.destroy()
-else:
-    print("Échec de l'apparition du véhicule.")
-
-pygame.quit()
\ No newline at end of file
+            # Traiter les mesures encore en file avant de fermer les fichiers
+            if sensor_pipeline is not None:
+                sensor_pipeline.stop()
+            # Fermer tous les enregistreurs même si l'un d'eux a échoué, l'erreur est relancée après le nettoyage
+            for writer in (lidar_writer, radar_writer, radar_summary_writer, meteo_writer, actors_writer,
+                           metrics_writer, perception_writer):
+                if writer is None:
+                    continue
+                try:
+                    writer.close()
+                except Exception as e:
+                    print(f"❌ Échec de l'enregistrement : {e}")
+                    log_error = log_error or e
+            if camera_view is not None:
+                print(f"📷 Caméra : {camera_view.frames} images affichées, {camera_frame.overwritten} remplacées avant affichage")
+            lidar_preprocessor.report()
+            if perception is not None:
+                perception.report()
+            if weather_sampler is not None:
+                print(f"🌦️ Météo : {weather_sampler.samples} lignes enregistrées, {weather_sampler.queries} lectures serveur")
+            for sensor, counters in (sensor_pipeline.stats() if sensor_pipeline is not None else {}).items():
+                print(f"📦 {sensor} : {counters['processed']} traitées, {counters['dropped']} jetées, "
+                      f"file max {counters['max_depth']}/{queue_size}")
+            if profiler.enabled:
+                profiler.report(os.path.join(output_dir, "profil.json"))
+        finally:
+            # Capteurs, circulation et véhicule détruits même si une étape précédente a échoué
+            # (serveur perdu, rapport en erreur...) : rien ne reste sur le serveur
+            try:
+                for sensor in (lidar, radar, camera):
+                    if sensor is not None and sensor.is_alive:
+                        sensor.destroy()
+            finally:
+                try:
+                    if traffic is not None:
+                        traffic.destroy()
+                finally:
+                    if vehicle.is_alive:
+                        vehicle.destroy()
+        if log_error is not None:
+            raise RuntimeError(f"Données capteurs incomplètes : {log_error}") from log_error
+
+    return {
+        "setup_seconds": setup_seconds,
+        "sim_seconds": last_elapsed - sim_start if sim_start is not None else 0.0,
+        "wall_seconds": time.perf_counter() - wall_start if sim_start is not None else 0.0,
+    }
+
+
+def main(argv):
+    try:
+        scenario, options = parse_arguments(argv)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    # Connexion au serveur CARLA et chargement de la ville
+    client = connect(options)
+    world, _ = load_town(client, scenario["town_name"])
+    try:
+        run_simulation(client, world, scenario, options)
+    except (RuntimeError, ValueError) as e:
+        print(e)
+        return 1
+    finally:
+        if "headless" not in options and "pygame" in globals():
+            pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,130 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Véhicule détecté devant : identifiant CARLA, distance (m), vitesse (km/h), TTC (s)
+LeadVehicle = namedtuple('LeadVehicle', ['actor_id', 'distance', 'speed', 'ttc'])
+
+
+class VehicleRegistry:
+    """Mémorise quels acteurs sont des véhicules.
+
+    `world.get_actors()` n'est rappelé que lorsqu'un identifiant inconnu
+    apparaît dans le snapshot (nouveau véhicule, capteur, ...), pas à chaque frame.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.vehicle_ids = set()
+        self._known_ids = set()
+        self.refreshes = 0
+
+    def refresh(self):
+        actors = self.world.get_actors()
+        self.vehicle_ids = {actor.id for actor in actors.filter('vehicle.*')}
+        self._known_ids = {actor.id for actor in actors}
+        self.refreshes += 1
+
+    def update(self, actor_ids):
+        if not self._known_ids.issuperset(actor_ids):
+            self.refresh()
+            # Un acteur encore absent de get_actors() ne doit pas déclencher un rappel à chaque frame
+            self._known_ids.update(actor_ids)
+
+
+class VehicleSnapshot:
+    """Positions, directions et vitesses de tous les véhicules pour une frame, en tableaux NumPy"""
+
+    def __init__(self, frame, elapsed_seconds, ids, positions, forwards, velocities):
+        self.frame = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.ids = ids                  # (N,) int64
+        self.positions = positions      # (N, 3) en m
+        self.forwards = forwards        # (N, 2) direction (x, y) du véhicule
+        self.velocities = velocities    # (N, 3) en m/s
+        self.speeds = 3.6 * np.linalg.norm(velocities, axis=1) if len(ids) else np.zeros(0)  # km/h
+        self._index = {actor_id: i for i, actor_id in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, actor_id):
+        return actor_id in self._index
+
+    def index_of(self, actor_id):
+        return self._index[actor_id]
+
+    def speed(self, actor_id):
+        """Vitesse d'un véhicule en km/h"""
+        return float(self.speeds[self._index[actor_id]])
+
+    def as_rows(self, ego_id):
+        """Lignes (N, 11) dans l'ordre des colonnes 'acteurs' d'enregistrement.SENSOR_COLUMNS"""
+        rows = np.empty((len(self.ids), 11), dtype=np.float32)
+        rows[:, 0] = self.ids
+        rows[:, 1] = self.ids == ego_id
+        rows[:, 2:5] = self.positions
+        rows[:, 5:7] = self.forwards
+        rows[:, 7:10] = self.velocities
+        rows[:, 10] = self.elapsed_seconds
+        return rows
+
+
+def take_vehicle_snapshot(world, registry, world_snapshot=None):
+    """Construit un VehicleSnapshot à partir d'un seul `world.get_snapshot()`"""
+    if world_snapshot is None:
+        world_snapshot = world.get_snapshot()
+    actors = list(world_snapshot)
+    registry.update(actor.id for actor in actors)
+
+    ids, rows = [], []
+    for actor in actors:
+        if actor.id not in registry.vehicle_ids:
+            continue
+        transform = actor.get_transform()
+        velocity = actor.get_velocity()
+        ids.append(actor.id)
+        rows.append((transform.location.x, transform.location.y, transform.location.z,
+                     transform.rotation.pitch, transform.rotation.yaw,
+                     velocity.x, velocity.y, velocity.z))
+
+    data = np.array(rows, dtype=np.float64).reshape(-1, 8)
+    # Même calcul que Rotation.get_forward_vector(), restreint au plan (x, y)
+    pitch = np.radians(data[:, 3])
+    yaw = np.radians(data[:, 4])
+    forwards = np.column_stack((np.cos(pitch) * np.cos(yaw), np.cos(pitch) * np.sin(yaw)))
+
+    return VehicleSnapshot(
+        frame=world_snapshot.frame,
+        elapsed_seconds=world_snapshot.timestamp.elapsed_seconds,
+        ids=np.array(ids, dtype=np.int64),
+        positions=data[:, 0:3],
+        forwards=forwards,
+        velocities=data[:, 5:8],
+    )
+
+
+def find_lead_vehicle(snapshot, ego_id, max_distance=20.0, min_alignment=0.5):
+    """Véhicule le plus proche roulant dans le même sens que `ego_id`, ou None.
+
+    Mêmes critères que l'ancien `detect_vehicle_ahead` : distance dans
+    ]0, max_distance[, produit scalaire des directions > min_alignment, et
+    TTC = distance / vitesse relative quand on se rapproche, infini sinon.
+    """
+    if ego_id not in snapshot:
+        return None
+    ego = snapshot.index_of(ego_id)
+
+    distances = np.linalg.norm(snapshot.positions - snapshot.positions[ego], axis=1)
+    alignment = snapshot.forwards @ snapshot.forwards[ego]
+    candidates = (distances > 0) & (distances < max_distance) & (alignment > min_alignment)
+    candidates[ego] = False
+    if not candidates.any():
+        return None
+
+    lead = np.flatnonzero(candidates)[np.argmin(distances[candidates])]
+    distance = float(distances[lead])
+    lead_speed = float(snapshot.speeds[lead])
+    relative_speed = (float(snapshot.speeds[ego]) - lead_speed) / 3.6  # en m/s
+    ttc = distance / relative_speed if relative_speed > 0 else float('inf')
+    return LeadVehicle(int(snapshot.ids[lead]), distance, lead_speed, ttc)
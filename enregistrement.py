@@ -0,0 +1,425 @@
+import csv
+import glob
+import gzip
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Colonnes de mesure de chaque flux capteur (toujours stockées en float32).
+# Chaque ligne porte en plus le numéro de frame CARLA et un horodatage entier (ns).
+SENSOR_COLUMNS = {
+    'lidar': ('x', 'y', 'z', 'intensity'),
+    'radar': ('depth', 'velocity', 'azimuth', 'altitude'),
+    # Agrégats radar par frame : retour le plus proche et histogramme des vitesses de rapprochement (m/s)
+    'radar_resume': ('count', 'closest_depth', 'closest_velocity', 'closest_azimuth', 'max_closing_speed',
+                     'closing_0_2', 'closing_2_5', 'closing_5_10', 'closing_10_20', 'closing_20_plus'),
+    'meteo': ('cloudiness', 'precipitation', 'precipitation_deposits', 'wind_intensity',
+              'sun_azimuth', 'sun_altitude', 'fog_density', 'fog_distance', 'speed'),
+    # Un véhicule par ligne et par frame (snapshot du monde), pour rejouer les métriques hors ligne
+    'acteurs': ('actor_id', 'is_ego', 'x', 'y', 'z', 'forward_x', 'forward_y', 'vx', 'vy', 'vz', 'sim_time'),
+    # Métriques de conduite du véhicule ego, une ligne par frame (distances en m, vitesses en km/h, TTC en s)
+    # (temps de réaction en s et décélération en m/s² du modèle de freinage utilisé, voir metriques.py)
+    'metrics': ('sim_time', 'speed', 'lead_id', 'distance', 'lead_speed', 'ttc', 'time_headway',
+                'required_deceleration', 'reaction_time', 'deceleration',
+                'reaction_distance', 'braking_distance', 'stopping_distance'),
+    # Véhicule devant estimé par le LiDAR et le radar (perception.py) à côté de la vérité terrain, une ligne par frame
+    # (sensor_frame : frame du dernier balayage LiDAR traité ; vitesses de rapprochement en m/s)
+    'perception': ('sim_time', 'sensor_frame', 'detected', 'distance', 'closing_speed', 'ttc', 'lidar_points',
+                   'radar_returns', 'track_age', 'gt_lead_id', 'gt_distance', 'gt_closing_speed'),
+}
+
+# Format des flottants dans les CSV (le LiDAR reste arrondi au centimètre comme avant)
+CSV_FLOAT_FORMATS = {
+    'lidar': '%.2f',
+    'radar': '%.7g',
+    'radar_resume': '%.7g',
+    'meteo': '%.7g',
+    'acteurs': '%.7g',
+    'metrics': '%.7g',
+    'perception': '%.7g',
+}
+
+CSV_TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Index d'une archive (backend 'archive') : une entrée de 40 octets par frame, qui situe ses lignes
+# dans data.bin (première ligne et nombre de lignes) avec le temps simulé (s) et l'horodatage (ns)
+ARCHIVE_INDEX_DTYPE = np.dtype([('frame', '<i8'), ('offset', '<i8'), ('count', '<i8'),
+                                ('sim_time', '<f8'), ('timestamp', '<i8')])
+
+
+def format_timestamp(timestamp_ns):
+    """Convertit un horodatage en nanosecondes vers le format texte historique des CSV"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9).strftime(CSV_TIME_FORMAT)
+
+
+def format_rows(values, row_format, timestamp, frame):
+    """Formate tout un tableau (N, k) en lignes CSV en un seul appel"""
+    if len(values) == 0:
+        return ''
+    # Le timestamp est inséré tel quel : on échappe les '%' éventuels
+    suffix = ',' + str(timestamp).replace('%', '%%') + ',' + str(frame) + '\n'
+    return ((row_format + suffix) * len(values)) % tuple(np.asarray(values).ravel().tolist())
+
+
+def default_log_path(sensor, backend='csv'):
+    """Chemin par défaut d'un flux : lidar_data.csv, lidar_data.parquet, lidar_data_npz/, lidar_data_archive/"""
+    if backend in ('npz', 'archive'):
+        return f'{sensor}_data_{backend}'
+    return f'{sensor}_data.{backend}'
+
+
+class CsvBackend:
+    """Backend texte compatible avec les anciens fichiers *_data.csv (gzip en option)"""
+
+    def __init__(self, path, sensor, compression=None):
+        self.columns = SENSOR_COLUMNS[sensor]
+        self._row_format = ','.join([CSV_FLOAT_FORMATS[sensor]] * len(self.columns))
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if compression == 'gzip':
+            self._file = gzip.open(path, 'at', newline='')
+        elif compression is None:
+            self._file = open(path, 'a', newline='')
+        else:
+            raise ValueError(f"Compression '{compression}' non supportée par le backend CSV")
+        if is_new:
+            self._file.write(','.join(self.columns + ('timestamp', 'frame')) + '\n')
+
+    def write_batch(self, items):
+        self._file.write(''.join(
+            format_rows(values, self._row_format, format_timestamp(timestamp), frame)
+            for values, frame, timestamp, _ in items
+        ))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _concat_items(items, n_columns):
+    """Regroupe une liste de (valeurs, frame, timestamp, temps simulé) en colonnes typées"""
+    counts = [len(item[0]) for item in items]
+    values = np.concatenate([np.asarray(item[0], dtype=np.float32).reshape(-1, n_columns) for item in items])
+    frames = np.repeat(np.array([item[1] for item in items], dtype=np.int64), counts)
+    timestamps = np.repeat(np.array([item[2] for item in items], dtype=np.int64), counts)
+    return values, frames, timestamps
+
+
+class NpzBackend:
+    """Backend binaire : un fichier .npz par lot de frames dans un répertoire"""
+
+    def __init__(self, path, sensor, compression=None):
+        if compression not in (None, 'deflate'):
+            raise ValueError(f"Compression '{compression}' non supportée par le backend NPZ")
+        self.columns = SENSOR_COLUMNS[sensor]
+        self.path = path
+        self._save = np.savez_compressed if compression == 'deflate' else np.savez
+        os.makedirs(path, exist_ok=True)
+        # Reprendre la numérotation si le répertoire contient déjà des lots
+        self._next_chunk = len(glob.glob(os.path.join(path, 'chunk_*.npz')))
+
+    def write_batch(self, items):
+        values, frames, timestamps = _concat_items(items, len(self.columns))
+        chunk = {name: np.ascontiguousarray(values[:, i]) for i, name in enumerate(self.columns)}
+        chunk_path = os.path.join(self.path, f'chunk_{self._next_chunk:06d}.npz')
+        self._save(chunk_path, frame=frames, timestamp=timestamps, **chunk)
+        self._next_chunk += 1
+
+    def close(self):
+        pass
+
+
+class ParquetBackend:
+    """Backend Parquet (pyarrow) : un row group par lot de frames"""
+
+    def __init__(self, path, sensor, compression='snappy'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Le backend 'parquet' nécessite pyarrow : pip install pyarrow")
+        self._pa = pa
+        self.columns = SENSOR_COLUMNS[sensor]
+        self._schema = pa.schema(
+            [(name, pa.float32()) for name in self.columns] + [('frame', pa.int64()), ('timestamp', pa.int64())]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema, compression=compression or 'none')
+
+    def write_batch(self, items):
+        values, frames, timestamps = _concat_items(items, len(self.columns))
+        arrays = [self._pa.array(values[:, i]) for i in range(len(self.columns))]
+        arrays += [self._pa.array(frames), self._pa.array(timestamps)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class ArchiveBackend:
+    """Archive binaire en ajout seul, relue sans copie par archive.SensorArchive.
+
+    Un répertoire avec data.bin (lignes float32 brutes, k colonnes, toutes
+    frames à la suite), index.bin (ARCHIVE_INDEX_DTYPE, une entrée par
+    frame) et meta.json (colonnes). Les lignes sont écrites avant leur
+    entrée d'index : après un arrêt brutal, la fin non indexée est ignorée
+    puis écrasée à la réouverture. Une frame sans ligne (aucun point après
+    filtrage, aucune détection radar) a aussi son entrée d'index.
+    """
+
+    # Les autres backends ne reçoivent que les frames non vides
+    keeps_empty_frames = True
+
+    def __init__(self, path, sensor, compression=None):
+        if compression is not None:
+            raise ValueError(f"Compression '{compression}' non supportée par le backend archive")
+        self.columns = SENSOR_COLUMNS[sensor]
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                columns = tuple(json.load(f)['columns'])
+            if columns != self.columns:
+                raise ValueError(f"L'archive {path} contient les colonnes {columns}, pas {self.columns}")
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump({'sensor': sensor, 'columns': list(self.columns), 'dtype': 'float32'}, f)
+
+        data_path = os.path.join(path, 'data.bin')
+        index_path = os.path.join(path, 'index.bin')
+        index = read_archive_index(index_path, data_path, len(self.columns))
+        self._next_row = int(index['offset'][-1] + index['count'][-1]) if len(index) else 0
+        # Reprendre après la dernière frame complète
+        self._data = open(data_path, 'ab')
+        self._data.truncate(self._next_row * 4 * len(self.columns))
+        self._index = open(index_path, 'ab')
+        self._index.truncate(len(index) * ARCHIVE_INDEX_DTYPE.itemsize)
+
+    def write_batch(self, items):
+        entries = np.empty(len(items), dtype=ARCHIVE_INDEX_DTYPE)
+        entries['count'] = [len(item[0]) for item in items]
+        entries['offset'] = self._next_row + np.cumsum(entries['count']) - entries['count']
+        entries['frame'] = [item[1] for item in items]
+        entries['timestamp'] = [item[2] for item in items]
+        entries['sim_time'] = [np.nan if item[3] is None else item[3] for item in items]
+        for item in items:
+            np.ascontiguousarray(item[0], dtype=np.float32).tofile(self._data)
+        self._data.flush()
+        entries.tofile(self._index)
+        self._index.flush()
+        self._next_row += int(entries['count'].sum())
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+
+def read_archive_index(index_path, data_path, n_columns):
+    """Entrées d'index complètes dont les lignes sont bien présentes dans data.bin"""
+    if not os.path.exists(index_path):
+        return np.zeros(0, dtype=ARCHIVE_INDEX_DTYPE)
+    n_entries = os.path.getsize(index_path) // ARCHIVE_INDEX_DTYPE.itemsize
+    index = np.fromfile(index_path, dtype=ARCHIVE_INDEX_DTYPE, count=n_entries)
+    rows = os.path.getsize(data_path) // (4 * n_columns) if os.path.exists(data_path) else 0
+    return index[:np.searchsorted(index['offset'] + index['count'], rows, side='right')]
+
+
+# Registre des formats d'enregistrement disponibles
+BACKENDS = {
+    'csv': CsvBackend,
+    'npz': NpzBackend,
+    'parquet': ParquetBackend,
+    'archive': ArchiveBackend,
+}
+
+# Compressions acceptées par chaque format (None = sans compression, toujours possible)
+COMPRESSIONS = {
+    'csv': ('gzip',),
+    'npz': ('deflate',),
+    'parquet': ('snappy', 'gzip', 'brotli', 'lz4', 'zstd', 'none'),
+    'archive': (),
+}
+
+
+def check_log_options(backend, compression=None):
+    """Vérifie un format et une compression avant d'ouvrir quoi que ce soit (ValueError sinon)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Format d'enregistrement inconnu : '{backend}' (choix : {', '.join(BACKENDS)})")
+    if compression is not None and compression.lower() not in COMPRESSIONS[backend]:
+        raise ValueError(f"Compression '{compression}' non supportée par le format {backend} "
+                         f"(choix : {', '.join(COMPRESSIONS[backend]) or 'aucune'})")
+    if backend == 'parquet':
+        import importlib.util
+
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ValueError("Le format 'parquet' nécessite pyarrow : pip install pyarrow")
+
+
+class SensorLogWriter:
+    """Enregistre un flux capteur via un backend, depuis un thread dédié.
+
+    `write()` ne fait qu'ajouter le tableau à une liste d'attente : la mise en
+    forme et l'écriture disque sont faites par lots d'environ `flush_rows`
+    lignes, pour ne jamais bloquer le callback du capteur. Si le backend
+    échoue, le thread s'arrête et l'exception est relancée par le `write()`
+    suivant et par `close()`.
+    """
+
+    def __init__(self, backend, flush_rows=50000, flush_interval=1.0):
+        self.backend = backend
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+
+        self._pending = []
+        self._pending_rows = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='sensor-log-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, values, frame=0, timestamp=None, sim_time=None):
+        """Ajoute un tableau (N, k) pour une frame ; il ne doit plus être modifié ensuite.
+
+        `sim_time` (temps simulé en s) n'est conservé que par le backend archive.
+        """
+        if timestamp is None:
+            timestamp = time.time_ns()
+        with self._cond:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise ValueError("Écriture dans un SensorLogWriter fermé")
+            self._pending.append((values, frame, timestamp, sim_time))
+            self._pending_rows += len(values)
+            if self._pending_rows >= self.flush_rows:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._pending_rows < self.flush_rows and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                batch, self._pending = self._pending, []
+                self._pending_rows = 0
+                closed = self._closed
+
+            # Écriture par gros lots, ou dès que l'intervalle de vidage est écoulé
+            if not getattr(self.backend, 'keeps_empty_frames', False):
+                batch = [item for item in batch if len(item[0])]
+            if batch:
+                try:
+                    self.backend.write_batch(batch)
+                except Exception as e:
+                    # Plus aucune donnée acceptée : la file ne doit pas grossir sans jamais être écrite
+                    with self._cond:
+                        self._error = e
+                        self._pending = []
+                        self._pending_rows = 0
+                    return
+                self.rows_written += sum(len(item[0]) for item in batch)
+
+            if closed:
+                return
+
+    def close(self):
+        """Vide la file d'attente sur le disque puis ferme le backend ; relance l'erreur du backend s'il a échoué"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.backend.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_sensor_log(sensor, backend='csv', path=None, compression=None, **writer_options):
+    """Ouvre un enregistreur pour un flux de SENSOR_COLUMNS ('lidar', 'radar', 'meteo', ...)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Format d'enregistrement inconnu : '{backend}' (choix : {', '.join(BACKENDS)})")
+    if path is None:
+        path = default_log_path(sensor, backend)
+    backend_options = {} if compression is None else {'compression': compression}
+    return SensorLogWriter(BACKENDS[backend](path, sensor, **backend_options), **writer_options)
+
+
+def _iter_csv(path, columns, chunk_rows):
+    with open(path, 'rb') as f:
+        opener = gzip.open if f.read(2) == b'\x1f\x8b' else open
+    with opener(path, 'rt', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        wanted = columns or header
+        indexes = [header.index(name) for name in wanted]
+        while True:
+            rows = list(itertools.islice(reader, chunk_rows))
+            if not rows:
+                return
+            chunk = {}
+            for name, index in zip(wanted, indexes):
+                raw = [row[index] for row in rows]
+                if name == 'timestamp':
+                    # Les horodatages texte sont répétés sur toute une frame : on ne parse que les valeurs uniques
+                    unique, inverse = np.unique(raw, return_inverse=True)
+                    parsed = np.array([round(datetime.strptime(t, CSV_TIME_FORMAT).timestamp() * 1e6) * 1000
+                                       for t in unique], dtype=np.int64)
+                    chunk[name] = parsed[inverse]
+                elif name == 'frame':
+                    chunk[name] = np.array(raw, dtype=np.int64)
+                else:
+                    chunk[name] = np.array(raw, dtype=np.float32)
+            yield chunk
+
+
+def _iter_npz(path, columns):
+    for chunk_path in sorted(glob.glob(os.path.join(path, 'chunk_*.npz'))):
+        with np.load(chunk_path) as data:
+            yield {name: data[name] for name in (columns or data.files)}
+
+
+def _iter_parquet(path, columns, chunk_rows):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+        yield {name: column.to_numpy() for name, column in zip(batch.schema.names, batch.columns)}
+
+
+def _iter_archive(path, columns, chunk_rows):
+    from archive import SensorArchive
+
+    archive = SensorArchive(path)
+    for rows, entries in archive.chunks(chunk_rows):
+        chunk = {}
+        for name in (columns or archive.columns + ('frame', 'timestamp')):
+            if name in ('frame', 'timestamp'):
+                chunk[name] = np.repeat(entries[name], entries['count'])
+            else:
+                chunk[name] = np.array(rows[:, archive.columns.index(name)])
+        yield chunk
+
+
+def read_sensor_log(path, columns=None, chunk_rows=100000):
+    """Relit un flux enregistré morceau par morceau (dict colonne -> tableau numpy).
+
+    Le format est déduit du chemin : répertoire avec index.bin -> archive, autre répertoire -> NPZ,
+    .parquet -> Parquet, sinon CSV.
+    """
+    if os.path.exists(os.path.join(path, 'index.bin')):
+        return _iter_archive(path, columns, chunk_rows)
+    if os.path.isdir(path):
+        return _iter_npz(path, columns)
+    if path.endswith('.parquet'):
+        return _iter_parquet(path, columns, chunk_rows)
+    return _iter_csv(path, columns, chunk_rows)
@@ -0,0 +1,167 @@
+# Remplaçant local de `code_final.py` + serveur CARLA, pour tester les outils sans simulateur.
+#
+# Accepte les mêmes arguments que `code_final.py` (ville, véhicule, 7 valeurs météo,
+# spawn index, options --cle=valeur), simule une exécution courte et écrit un petit
+# meteo_data.csv dans --output. Options propres au faux serveur : --fail-rate=<0..1>
+# (probabilité d'échec) et --sim-seconds=<s> (durée réelle de l'exécution).
+#
+# FakeWorld est un faux carla.World en mémoire (véhicules, snapshots, météo, latence réglable)
+# pour tester client_async.py sans serveur.
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from enregistrement import default_log_path, open_sensor_log
+
+
+class FakeActorList(list):
+    def filter(self, pattern):
+        return FakeActorList(actor for actor in self if actor.type_id.startswith(pattern.rstrip('*')))
+
+
+class FakeActor:
+    """Véhicule qui roule en ligne droite à vitesse constante (m/s, cap en degrés).
+
+    Rattaché à un FakeWorld, chaque lecture est une requête au serveur ;
+    les copies d'un FakeWorldSnapshot se lisent localement, comme dans CARLA.
+    """
+
+    def __init__(self, actor_id, x, y, yaw, speed, type_id='vehicle.fake', world=None):
+        self.id = actor_id
+        self.type_id = type_id
+        self.world = world
+        self.x, self.y, self.yaw, self.speed = x, y, yaw, speed
+
+    def get_transform(self):
+        if self.world is not None:
+            self.world._rpc('get_transform')
+        return SimpleNamespace(location=SimpleNamespace(x=self.x, y=self.y, z=0.0),
+                               rotation=SimpleNamespace(pitch=0.0, yaw=self.yaw, roll=0.0))
+
+    def get_velocity(self):
+        if self.world is not None:
+            self.world._rpc('get_velocity')
+        yaw = math.radians(self.yaw)
+        return SimpleNamespace(x=self.speed * math.cos(yaw), y=self.speed * math.sin(yaw), z=0.0)
+
+
+class FakeWorldSnapshot:
+    """Positions et vitesses de tous les acteurs figées à une frame (comme carla.WorldSnapshot)"""
+
+    def __init__(self, frame, elapsed_seconds, actors):
+        self.frame = frame
+        self.timestamp = SimpleNamespace(elapsed_seconds=elapsed_seconds)
+        self._actors = [FakeActor(actor.id, actor.x, actor.y, actor.yaw, actor.speed, actor.type_id)
+                        for actor in actors]
+
+    def __iter__(self):
+        return iter(self._actors)
+
+    def __len__(self):
+        return len(self._actors)
+
+
+class FakeWorld:
+    """Faux carla.World en mémoire pour tester client_async.py et la boucle de simulation sans serveur.
+
+    Sous-ensemble de l'API utilisé par le script : tick, get_snapshot,
+    wait_for_tick, get_actors, get_weather et set_weather. Chaque appel
+    attend `latency` secondes (aller-retour réseau simulé) et est compté
+    dans `calls` ; les snapshots sont figés au moment de l'appel, comme
+    ceux de CARLA.
+    """
+
+    def __init__(self, n_vehicles=20, delta_seconds=0.05, latency=0.0, seed=0):
+        rng = random.Random(seed)
+        self.delta_seconds = delta_seconds
+        self.latency = latency
+        self.frame = 0
+        self.calls = Counter()
+        self.weather = SimpleNamespace(cloudiness=0.0, precipitation=0.0, precipitation_deposits=0.0,
+                                       wind_intensity=0.0, sun_azimuth_angle=0.0, sun_altitude_angle=45.0,
+                                       fog_density=0.0, fog_distance=0.0)
+        # Tous sur la même route, dans le même sens, espacés de 8 à 20 m
+        self.actors = {}
+        x = 0.0
+        for actor_id in range(1, n_vehicles + 1):
+            self.actors[actor_id] = FakeActor(actor_id, x, 0.0, 0.0, rng.uniform(5, 15), world=self)
+            x += rng.uniform(8, 20)
+
+    def _rpc(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def tick(self, seconds=None):
+        self._rpc('tick')
+        self.frame += 1
+        for actor in self.actors.values():
+            yaw = math.radians(actor.yaw)
+            actor.x += actor.speed * math.cos(yaw) * self.delta_seconds
+            actor.y += actor.speed * math.sin(yaw) * self.delta_seconds
+        return self.frame
+
+    def get_snapshot(self):
+        self._rpc('get_snapshot')
+        return FakeWorldSnapshot(self.frame, self.frame * self.delta_seconds, self.actors.values())
+
+    def wait_for_tick(self, seconds=None):
+        self.tick()
+        return self.get_snapshot()
+
+    def get_actors(self, actor_ids=None):
+        self._rpc('get_actors')
+        return FakeActorList(self.actors.values())
+
+    def get_weather(self):
+        self._rpc('get_weather')
+        return self.weather
+
+    def set_weather(self, weather):
+        self._rpc('set_weather')
+        self.weather = weather
+
+
+def main(argv):
+    if len(argv) < 11:
+        print("⚠️ Nombre d'arguments insuffisant, vérifiez l'appel")
+        return 1
+
+    town_name, vehicle_model = argv[1], argv[2]
+    meteo = [float(value) for value in argv[3:10]]
+    spawn_index = int(argv[10])
+    options = {}
+    for arg in argv[11:]:
+        if arg.startswith("--"):
+            key, _, value = arg[2:].partition("=")
+            options[key] = value
+
+    output_dir = options.get("output", ".")
+    os.makedirs(output_dir, exist_ok=True)
+    port = int(options.get("port", 2000))
+    rng = random.Random(f"{town_name}/{vehicle_model}/{meteo}/{spawn_index}/{port}/{time.time_ns()}")
+
+    print(f"🧪 Faux serveur {options.get('host', 'localhost')}:{port} — {town_name}, {vehicle_model}, spawn {spawn_index}")
+    time.sleep(float(options.get("sim-seconds", 0.2)))
+
+    if rng.random() < float(options.get("fail-rate", 0)):
+        print("❌ Échec simulé de la connexion au serveur CARLA")
+        return 1
+
+    log_format = options.get("format", "csv")
+    with open_sensor_log('meteo', log_format,
+                         path=os.path.join(output_dir, default_log_path('meteo', log_format))) as writer:
+        for frame in range(5):
+            row = meteo[:4] + [0.0, meteo[6], meteo[4], meteo[5], rng.uniform(0, 50)]
+            writer.write(np.array([row], dtype=np.float32), frame)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -2,28 +2,25 @@ import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import os
-import pandas as pd
 import subprocess
 import sys
+import threading
+from cartes import load_town_metadata
+from catalogues import town_names, vehicle_catalogue
 
 # Charger la liste des villes depuis le fichier CSV
 csv_villes_path = "liste_villes.csv"
 
 try:
-    df_villes = pd.read_csv(csv_villes_path, delimiter=";", dtype=str)
-    villes = df_villes["Nom Ville"].tolist()  # Extrait uniquement les noms courts des villes (ex: Town01, Town02)
+    villes = town_names(csv_villes_path)  # Extrait uniquement les noms courts des villes (ex: Town01, Town02)
 except FileNotFoundError:
     print("⚠️ Le fichier 'liste_villes.csv' est introuvable. Vérifiez son emplacement.")
     villes = ["Town01", "Town02", "Town03", "Town04"]  # Valeurs par défaut si le fichier est absent
 
 
 # Charger la liste des véhicules depuis le fichier CSV
-csv_path = "CARLA_Vehicles_Available.csv"
-df = pd.read_csv(csv_path, delimiter=";", dtype=str)
-df = df[df["Type"] == "Car"]
-df = df.dropna(subset=["Blueprint_ID"])
-df["Model"] = df["Brand"] + " " + df["Model"]  # Fusionner marque et modèle
-vehicles = df[["Model", "Blueprint_ID"]].drop_duplicates().values.tolist()
+catalogue = vehicle_catalogue()
+vehicles = catalogue.models()  # Voitures disponibles uniquement, [marque + modèle, Blueprint_ID]
 
 # Création de la fenêtre principale
 root = tk.Tk()
@@ -42,14 +39,34 @@ canvas.place(x=0, y=0)
 script_dir = os.path.dirname(os.path.abspath(__file__))
 image_path = os.path.join(script_dir, "image.png")
 bg_photo = None
-try:
-    bg_image = Image.open(image_path)
-    bg_image = bg_image.resize((1720, 900), Image.LANCZOS)
+bg_images = []  # Image décodée par le thread de chargement (ou l'erreur rencontrée)
+
+
+def decoder_image_fond():
+    """Décode et redimensionne l'image hors du thread tkinter, pour ne pas retarder l'affichage"""
+    try:
+        bg_images.append(Image.open(image_path).resize((1720, 900), Image.LANCZOS))
+    except Exception as e:
+        bg_images.append(e)
+
+
+def afficher_image_fond():
+    """Affiche l'image de fond dès qu'elle est prête (tkinter ne doit être appelé que depuis son thread)"""
+    global bg_photo
+    if not bg_images:
+        root.after(20, afficher_image_fond)
+        return
+    bg_image = bg_images[0]
+    if isinstance(bg_image, Exception):
+        print("Erreur lors du chargement de l'image :", bg_image)
+        root.configure(bg="gray")
+        return
     bg_photo = ImageTk.PhotoImage(bg_image)
     canvas.create_image(0, 0, anchor="nw", image=bg_photo)
-except Exception as e:
-    print("Erreur lors du chargement de l'image :", e)
-    root.configure(bg="gray")
+
+
+threading.Thread(target=decoder_image_fond, daemon=True).start()
+root.after(20, afficher_image_fond)
 
 # **Sélection du véhicule**
 selected_vehicle = tk.StringVar()
@@ -58,7 +75,7 @@ selected_vehicle.set(vehicles[0][0])  # Valeur par défaut
 
 # **Fonction pour lancer la simulation**
 def lancer_simulation():
-    blueprint_id = next((bp for model, bp in vehicles if model == selected_vehicle.get()), vehicles[0][1])
+    blueprint_id = catalogue.blueprint_id(selected_vehicle.get(), vehicles[0][1])
 
     # ✅ Récupérer la ville sélectionnée
     selected_map = selected_ville.get()
@@ -294,7 +311,7 @@ selected_ville.set(villes[0] if villes else "Town01")
 
 # Cadre Spawn Point
 frame_spawn = tk.Frame(root, borderwidth=2, relief="solid", bg="#f5f5f5")
-frame_spawn.place(x=1200, y=140, width=300, height=100)  # Hauteur augmentée pour plus de lisibilité
+frame_spawn.place(x=1200, y=140, width=300, height=130)  # Hauteur augmentée pour l'aperçu du point
 
 # Titre du cadre
 title_label = tk.Label(
@@ -317,11 +334,44 @@ entry_spawn = ttk.Entry(
 )
 entry_spawn.pack(pady=10)
 
+# Aperçu du point choisi, si la ville a déjà été chargée une fois (cartes/<ville>.json)
+spawn_preview = tk.Label(frame_spawn, text="", font=("Arial", 9), bg="#f5f5f5", fg="#333", wraplength=280)
+spawn_preview.pack()
+
+
+def spawn_max_index():
+    """Plus grand index de spawn de la ville choisie (100 si ses métadonnées ne sont pas encore en cache)"""
+    town = load_town_metadata(selected_ville.get())
+    return len(town) - 1 if town is not None else 100
+
+
+def update_spawn_preview(*args):
+    """Met à jour la plage et l'aperçu du Spawn Point quand la ville ou la saisie changent"""
+    town = load_town_metadata(selected_ville.get())
+    title_label.config(text=f"Spawn Point (0-{spawn_max_index()})")
+    try:
+        value = int(spawn_var.get())
+    except ValueError:
+        spawn_preview.config(text="")
+        return
+    if town is None:
+        spawn_preview.config(text="Ville jamais chargée : aperçu indisponible")
+    elif town.valid_spawn_index(value):
+        spawn_preview.config(text=town.describe_spawn(value))
+    else:
+        spawn_preview.config(text=f"Hors limite : {len(town)} points d'apparition")
+
+
+selected_ville.trace_add("write", update_spawn_preview)
+spawn_var.trace_add("write", update_spawn_preview)
+update_spawn_preview()
+
+
 # Fonction pour valider l’entrée et éviter les erreurs
 def validate_spawn():
     try:
         value = int(spawn_var.get())
-        if 0 <= value <= 100:
+        if 0 <= value <= spawn_max_index():
             return value
         else:
             spawn_var.set("0")  # Réinitialisation en cas de valeur hors limite
@@ -1,10 +1,25 @@
 from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QGroupBox, QVBoxLayout, QComboBox, QPushButton, QHBoxLayout, QRadioButton, QSlider, QLineEdit, QSizePolicy, QWidget, QGridLayout
 import sys
-import pandas as pd
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
 import subprocess
 import sys
+import os
+import threading
+from cartes import load_town_metadata
+from catalogues import DEFAULT_VEHICLES, VehicleCatalogue, town_names, vehicle_catalogue
+from scenario import ScenarioSpec
+
+# Champ de scenario.ScenarioSpec piloté par chaque curseur météo
+SLIDER_FIELDS = {
+    "Nuages": "nuages",
+    "Pluie": "pluie",
+    "Flaques d'eau": "flaques",
+    "Vent": "vent",
+    "Brouillard": "brouillard",
+    "Distance brouillard": "distance_brouillard",
+    "Soleil": "soleil",
+}
 
 style_qgroupbox = """
     QGroupBox {
@@ -19,6 +34,14 @@ style_qgroupbox = """
     }
 """
 
+class ImageLoader(QObject):
+    """Décode une image dans un thread (QImage le permet, pas QPixmap) et l'envoie au thread de l'interface"""
+    loaded = pyqtSignal(QImage)
+
+    def load(self, path):
+        threading.Thread(target=lambda: self.loaded.emit(QImage(path)), daemon=True).start()
+
+
 class CarlaInterface(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -26,13 +49,15 @@ class CarlaInterface(QMainWindow):
         # 🖥️ Titre de la fenêtre
         self.setWindowTitle("ESME3TD2025CARLA - SIPOSA - Interface de lancement")
 
-        # 🖼️ Ajouter une image de fond
+        # 🖼️ Ajouter une image de fond, décodée en arrière-plan : la fenêtre s'affiche sans l'attendre
         self.background_label = QLabel(self)
-        self.background_pixmap = QPixmap("image.png")  # Assurez-vous que l'image est bien dans le dossier
-        self.background_label.setPixmap(self.background_pixmap.scaled(
-            self.width(), self.height(), Qt.KeepAspectRatioByExpanding
-        ))
+        self.background_label.setStyleSheet("background-color: gray;")
         self.background_label.setGeometry(0, 0, self.width(), self.height())
+        self.background_pixmap = None
+        self.scaled_pixmaps = {}  # Images redimensionnées par (nom, largeur, hauteur)
+        self.background_loader = ImageLoader()
+        self.background_loader.loaded.connect(self.set_background)
+        self.background_loader.load("image.png")  # Assurez-vous que l'image est bien dans le dossier
 
         # Ajouter l'image ESME.png en bas à droite
         self.esme_label = QLabel(self)  # Créer un QLabel pour l'image
@@ -136,17 +161,38 @@ class CarlaInterface(QMainWindow):
         self.spawn_box.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.button_box.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)  # Bouton s'étire horizontalement
 
+    def scaled_pixmap(self, name, pixmap, width, height, mode):
+        """Image redimensionnée une seule fois par taille de fenêtre"""
+        key = (name, width, height)
+        if key not in self.scaled_pixmaps:
+            if len(self.scaled_pixmaps) > 16:
+                self.scaled_pixmaps.clear()
+            self.scaled_pixmaps[key] = pixmap.scaled(width, height, mode, Qt.SmoothTransformation)
+        return self.scaled_pixmaps[key]
+
+    def set_background(self, image):
+        """Reçoit l'image de fond décodée et l'affiche à la taille de la fenêtre"""
+        if image.isNull():
+            print("⚠️ Image de fond 'image.png' introuvable ou illisible.")
+            return
+        self.background_pixmap = QPixmap.fromImage(image)
+        self.update_background()
+
+    def update_background(self):
+        if self.background_pixmap is not None:
+            self.background_label.setPixmap(self.scaled_pixmap(
+                "fond", self.background_pixmap, self.width(), self.height(), Qt.KeepAspectRatioByExpanding))
+        self.background_label.setGeometry(0, 0, self.width(), self.height())
+
     def resizeEvent(self, event):
         """Ajuste l'image de fond lorsque la fenêtre est redimensionnée"""
-        self.background_label.setPixmap(self.background_pixmap.scaled(
-            self.width(), self.height(), Qt.KeepAspectRatioByExpanding))
-        self.background_label.setGeometry(0, 0, self.width(), self.height())
+        self.update_background()
 
         # Redimensionner l'image ESME.png en fonction de la taille de la fenêtre
         esme_width = int(self.width() * 0.1)  # 10% de la largeur de la fenêtre
         esme_height = int(self.height() * 0.1)  # 10% de la hauteur de la fenêtre
-        self.esme_label.setPixmap(self.esme_pixmap.scaled(
-            esme_width, esme_height, Qt.KeepAspectRatio))  # Redimensionner l'image
+        self.esme_label.setPixmap(self.scaled_pixmap(
+            "esme", self.esme_pixmap, esme_width, esme_height, Qt.KeepAspectRatio))  # Redimensionner l'image
 
         # Positionner l'image ESME.png en bas à droite
         self.esme_label.setGeometry(
@@ -177,43 +223,69 @@ class CarlaInterface(QMainWindow):
 
         # Récupérer le véhicule sélectionné
         selected_vehicle = self.voiture_dropdown.currentText()
-        blueprint_id = next((bp for model, bp in self.vehicles if model == selected_vehicle), self.vehicles[0][1])
+        blueprint_id = self.vehicle_catalogue.blueprint_id(selected_vehicle, self.vehicles[0][1])
 
         # Récupérer la ville sélectionnée
         selected_map = self.ville_dropdown.currentText()
 
         # Récupérer le Spawn Point (après validation)
         spawn_index = self.spawn_input.text()
-        if not spawn_index.isdigit() or not (0 <= int(spawn_index) <= 100):
+        if not spawn_index.isdigit() or not (0 <= int(spawn_index) <= self.spawn_max_index()):
             spawn_index = "0"  # Valeur par défaut si la saisie est incorrecte
 
         # Appliquer les paramètres météo du scénario sélectionné
         self.update_weather_scenario()
 
-        # Récupérer les valeurs météo des sliders
-        meteo_values = {param: self.meteo_sliders[param].value() for param in self.meteo_sliders}
-
-        # Convertir les valeurs météo en arguments pour `code_final.py`
-        meteo_args = [str(meteo_values[param]) for param in meteo_values]
+        # Récupérer les valeurs météo des sliders, associées par nom aux champs du scénario
+        meteo_values = {SLIDER_FIELDS[param]: self.meteo_sliders[param].value() for param in self.meteo_sliders}
+        spec = ScenarioSpec(town_name=selected_map, vehicle_model=blueprint_id, spawn_index=int(spawn_index),
+                            **meteo_values)
 
         # Debug : Vérifier les valeurs envoyées
         print(
             f"🚀 Lancement de `code_final.py` avec ville '{selected_map}', véhicule '{selected_vehicle}', météo : {meteo_values}, spawn {spawn_index}")
 
-        # Construire la commande pour exécuter `code_final.py`
-        python_exec = sys.executable  # Utilise l'interpréteur Python actuel
-        command = [python_exec, "code_final.py", selected_map, blueprint_id] + meteo_args + [spawn_index]
-
-        print(f"Commande exécutée : {' '.join(command)}")  # Debug
-
-        # Exécuter `code_final.py` avec les paramètres
-        self.simulation_process = subprocess.Popen(command, shell=True)  # Stocker le processus
+        # Confier la simulation au worker persistant s'il est lancé (ville déjà chargée), sinon lancer `code_final.py`
+        try:
+            import serveur_simulation
+            conn = serveur_simulation.connect_worker()
+        except OSError:
+            # Liste d'arguments passée directement à l'interpréteur Python actuel, sans shell
+            command = [sys.executable] + spec.to_argv()
+            print(f"Commande exécutée : {' '.join(command)}")  # Debug
+            self.simulation_process = subprocess.Popen(command)  # Stocker le processus
+            return
+
+        # Le fichier d'arrêt est écrit dans le dossier courant de l'interface
+        spec = spec.with_options(output=os.getcwd())
+        self.simulation_thread = threading.Thread(target=self.wait_worker_simulation,
+                                                  args=(serveur_simulation, spec, conn), daemon=True)
+        self.simulation_thread.start()
+
+    def wait_worker_simulation(self, serveur_simulation, spec, conn):
+        """Attend la fin d'une simulation confiée au worker (hors du thread de l'interface)"""
+        try:
+            reply = serveur_simulation.request_scenario(spec, conn=conn)
+        except (OSError, EOFError) as e:
+            print(f"❌ Worker de simulation injoignable : {e}")
+            return
+        if reply["status"] == "ok":
+            print(f"✅ Simulation terminée : mise en place en {reply['setup_seconds']:.2f} s "
+                  f"(ville {'rechargée' if reply['world_reloaded'] else 'réutilisée'})")
+        else:
+            print(f"❌ Simulation en échec : {reply.get('error')}")
 
     def stop_simulation(self):
         """Arrête la simulation en cours"""
         try:
+            # Simulation confiée au worker : le fichier d'arrêt suffit, le worker reste lancé
+            if getattr(self, 'simulation_thread', None) and self.simulation_thread.is_alive():
+                print("🛑 Arrêt de la simulation en cours...")
+                with open("stop_simulation.txt", "w") as f:
+                    f.write("stop")
+                print("✅ Signal d'arrêt envoyé au worker de simulation.")
             # Vérifier si un processus de simulation est en cours
-            if hasattr(self, 'simulation_process') and self.simulation_process:
+            elif hasattr(self, 'simulation_process') and self.simulation_process:
                 print("🛑 Arrêt de la simulation en cours...")
 
                 # Créer un fichier pour signaler l'arrêt
@@ -230,17 +302,12 @@ class CarlaInterface(QMainWindow):
 
     def load_vehicles(self):
         """Charge la liste des véhicules depuis un fichier CSV"""
-        csv_path = "CARLA_Vehicles_Available.csv"
         try:
-            df = pd.read_csv(csv_path, delimiter=";", dtype=str)
-            df = df[df["Type"] == "Car"]  # Filtrer uniquement les voitures
-            df = df.dropna(subset=["Blueprint_ID"])  # Supprimer les entrées vides
-            df["Model"] = df["Brand"] + " " + df["Model"]  # Fusionner Marque + Modèle
-            return df[["Model", "Blueprint_ID"]].drop_duplicates().values.tolist()
+            self.vehicle_catalogue = vehicle_catalogue()
         except FileNotFoundError:
-            print("⚠️ Le fichier 'CARLA_Vehicles_Available.csv' est introuvable. Vérifiez son emplacement.")
-            return [["Tesla Model 3", "vehicle.tesla.model3"],
-                    ["Audi e-Tron", "vehicle.audi.etron"]]  # Valeurs par défaut
+            print("⚠️ Aucun fichier CSV des véhicules (CARLA_Vehicles_Available.csv) trouvé. Vérifiez son emplacement.")
+            self.vehicle_catalogue = VehicleCatalogue(DEFAULT_VEHICLES)  # Valeurs par défaut
+        return self.vehicle_catalogue.models()  # Voitures uniquement, "Marque Modèle" et Blueprint_ID
 
     def create_scenario_box(self):
 
@@ -407,12 +474,7 @@ class CarlaInterface(QMainWindow):
         """Charge la liste des villes depuis un fichier CSV"""
         csv_villes_path = "liste_villes.csv"
         try:
-            df_villes = pd.read_csv(csv_villes_path, delimiter=";", dtype=str)
-
-            # Supprimer l'extension .pcd des noms de villes
-            df_villes["Nom Ville"] = df_villes["Nom Ville"].str.replace(".pcd", "", regex=False)
-
-            return df_villes["Nom Ville"].tolist()  # Extrait uniquement les noms des villes
+            return town_names(csv_villes_path)  # Noms des villes sans l'extension .pcd
         except FileNotFoundError:
             print("⚠️ Le fichier 'liste_villes.csv' est introuvable. Vérifiez son emplacement.")
             return ["Town01", "Town02", "Town03", "Town04"]  # Valeurs par défaut si le fichier est absent
@@ -441,7 +503,7 @@ class CarlaInterface(QMainWindow):
         """Cadre Spawn Point avec champ de saisie"""
         self.spawn_box = QGroupBox(self)
         self.spawn_box.setTitle("Spawn Point (0-100)")
-        self.spawn_box.setGeometry(1020, 140, 240, 100)
+        self.spawn_box.setGeometry(1020, 140, 240, 130)
         self.spawn_box.setAlignment(Qt.AlignCenter)  # Centrer le titre
         self.spawn_box.setStyleSheet(style_qgroupbox)
 
@@ -454,11 +516,34 @@ class CarlaInterface(QMainWindow):
         self.spawn_input.setPlaceholderText("Entrez une valeur entre 0 et 100")
         self.spawn_input.textChanged.connect(self.validate_spawn)  # Ajout de la validation dynamique
 
+        # Aperçu du point choisi (position, route), si la ville a déjà été chargée une fois
+        self.spawn_preview = QLabel()
+        self.spawn_preview.setWordWrap(True)
+        self.spawn_preview.setStyleSheet("font-size: 11px; font-weight: normal;")
+
         layout.addWidget(self.spawn_input)
+        layout.addWidget(self.spawn_preview)
 
         # Appliquer le layout au cadre
         self.spawn_box.setLayout(layout)
 
+        # Le nombre de points d'apparition dépend de la ville
+        self.ville_dropdown.currentTextChanged.connect(self.update_spawn_range)
+        self.update_spawn_range()
+
+    def spawn_max_index(self):
+        """Plus grand index de spawn de la ville choisie (100 si ses métadonnées ne sont pas encore en cache)"""
+        town = load_town_metadata(self.ville_dropdown.currentText())
+        return len(town) - 1 if town is not None else 100
+
+    def update_spawn_range(self):
+        """Adapte la plage de saisie du Spawn Point à la ville choisie"""
+        max_index = self.spawn_max_index()
+        self.spawn_box.setTitle(f"Spawn Point (0-{max_index})")
+        self.spawn_input.setPlaceholderText(f"Entrez une valeur entre 0 et {max_index}")
+        if self.spawn_input.text():
+            self.validate_spawn()
+
     def create_button_box(self):
         """Cadre pour les boutons Lancer et Arrêter Simulation"""
         self.button_box = QGroupBox(self)  # Crée une nouvelle box
@@ -495,8 +580,11 @@ class CarlaInterface(QMainWindow):
         """Validation de l'entrée du Spawn Point"""
         try:
             value = int(self.spawn_input.text())
-            if 0 <= value <= 100:
+            if 0 <= value <= self.spawn_max_index():
                 self.spawn_input.setStyleSheet("color: black;")  # Texte normal
+                town = load_town_metadata(self.ville_dropdown.currentText())
+                self.spawn_preview.setText(town.describe_spawn(value) if town is not None
+                                           else "Ville jamais chargée : aperçu indisponible")
             else:
                 self.spawn_input.setStyleSheet("color: red;")  # Met le texte en rouge si hors limite
                 self.spawn_input.setText("0")  # Réinitialise à 0 si invalide
@@ -1,35 +1,87 @@
-import os
+# Liste des villes disponibles, enregistrée dans liste_villes.csv pour les interfaces.
+#
+# Par défaut, les villes sont demandées au serveur CARLA (client.get_available_maps()) ; avec
+# --metadata, chaque ville est chargée une fois pour enregistrer ses points d'apparition, sa
+# topologie et ses limites dans cartes/<ville>.json (voir cartes.py). Sans serveur, --offline
+# reprend les villes déjà en cache et --hdmaps <dossier> les fichiers .pcd d'un dossier HDMaps.
+#
+#   python liste_ville.py --metadata
+#   python liste_ville.py --hdmaps "C:\Program Files\CARLA_0.9.9.4\WindowsNoEditor\HDMaps"
+import argparse
 import csv
+import os
+import sys
 
-# Chemin du répertoire contenant les cartes HD
-hdmaps_directory = r"C:\Program Files\CARLA_0.9.9.4\WindowsNoEditor\HDMaps"
+from cartes import TOWN_CACHE, cached_towns, town_metadata
 
-# Vérifier si le répertoire existe
-if not os.path.exists(hdmaps_directory):
-    print(f"❌ Le répertoire {hdmaps_directory} n'existe pas.")
-    exit()
+csv_filename = "liste_villes.csv"
 
-# Lister les fichiers dans le répertoire
-try:
-    hdmaps_files = [f for f in os.listdir(hdmaps_directory) if f.endswith('.pcd')]
-except Exception as e:
-    print(f"❌ Erreur lors de la lecture du répertoire : {e}")
-    exit()
 
-# Vérifier si des fichiers ont été trouvés
-if not hdmaps_files:
-    print(f"❌ Aucun fichier .bin trouvé dans {hdmaps_directory}.")
-    exit()
+def server_towns(client):
+    """Noms courts des villes du serveur (Town01, Town10HD_Opt...)"""
+    return sorted({path.rstrip("/").split("/")[-1] for path in client.get_available_maps()})
 
-# Enregistrer les noms des fichiers dans un fichier CSV
-csv_filename = "liste_villes.csv"
 
-try:
-    with open(csv_filename, mode="w", newline="", encoding="utf-8") as file:
+def hdmap_towns(hdmaps_directory):
+    """Villes dont un fichier .pcd est présent dans le dossier HDMaps d'une installation CARLA"""
+    return sorted(f[:-len(".pcd")] for f in os.listdir(hdmaps_directory) if f.endswith(".pcd"))
+
+
+def cache_metadata(client, towns, directory=TOWN_CACHE):
+    """Charge chaque ville une fois pour enregistrer ses métadonnées (villes déjà en cache ignorées)"""
+    for town in towns:
+        try:
+            world = client.load_world(town)
+            town_metadata(client, world, town, directory)
+        except RuntimeError as e:
+            print(f"⚠️ Ville {town} ignorée : {e}")
+
+
+def write_towns(towns, path=csv_filename):
+    with open(path, mode="w", newline="", encoding="utf-8") as file:
         writer = csv.writer(file)
         writer.writerow(["Nom Ville"])  # En-tête du fichier CSV
-        for hdmap_file in hdmaps_files:
-            writer.writerow([hdmap_file])
-    print(f"✅ Liste des fichiers HDMap enregistrée dans {csv_filename}.")
-except Exception as e:
-    print(f"❌ Erreur lors de l'écriture du fichier CSV : {e}")
\ No newline at end of file
+        for town in towns:
+            writer.writerow([town])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enregistre la liste des villes disponibles dans liste_villes.csv")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=2000)
+    parser.add_argument("--metadata", action="store_true",
+                        help="Charge chaque ville pour mettre en cache points d'apparition et topologie")
+    parser.add_argument("--offline", action="store_true", help="Villes déjà en cache dans cartes/, sans serveur")
+    parser.add_argument("--hdmaps", default=None, help="Dossier HDMaps d'une installation CARLA, sans serveur")
+    parser.add_argument("--cache", default=TOWN_CACHE)
+    parser.add_argument("--output", default=csv_filename)
+    args = parser.parse_args()
+
+    try:
+        if args.hdmaps:
+            towns = hdmap_towns(args.hdmaps)
+        elif args.offline:
+            towns = cached_towns(args.cache)
+        else:
+            import carla
+
+            client = carla.Client(args.host, args.port)
+            client.set_timeout(80.0)
+            towns = server_towns(client)
+            if args.metadata:
+                cache_metadata(client, [town for town in towns if town not in cached_towns(args.cache)],
+                               args.cache)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Erreur lors de la lecture des villes : {e}")
+        sys.exit(1)
+
+    # Vérifier si des villes ont été trouvées
+    if not towns:
+        print("❌ Aucune ville trouvée.")
+        sys.exit(1)
+
+    try:
+        write_towns(towns, args.output)
+        print(f"✅ Liste de {len(towns)} villes enregistrée dans {args.output}.")
+    except Exception as e:
+        print(f"❌ Erreur lors de l'écriture du fichier CSV : {e}")
@@ -1,26 +1,182 @@
-import carla
-import pandas as pd
+# Synchronise CARLA_Vehicles_Available.csv avec les véhicules du serveur CARLA.
+#
+# La liste des blueprints `vehicle.*` est gardée par version du serveur et par carte dans
+# CARLA_Vehicles_sync.json, avec la boîte englobante de chaque véhicule (mesurée une seule fois
+# par version, en faisant apparaître les nouveaux véhicules par lot puis en les détruisant).
+# Seules les différences avec la synchronisation précédente sont appliquées au CSV, qui n'est pas
+# réécrit si rien n'a changé ; les interfaces lisent ensuite le CSV sans serveur.
+#
+#   python liste_voiture.py                                  # serveur localhost:2000
+#   python liste_voiture.py --offline                        # dernière synchronisation, sans serveur
+#   python liste_voiture.py --offline --version 0.9.15 --map Carla/Maps/Town03
+import argparse
+import csv
+import json
+import os
+import sys
+import time
 
-# Connexion au serveur CARLA
-client = carla.Client('localhost', 2000)
-client.set_timeout(80.0)
+from catalogues import AVAILABLE_VEHICLES, BBOX_HEIGHT, read_rows
 
-# Obtenir la bibliothèque des blueprints de véhicules
-world = client.get_world()
-blueprint_library = world.get_blueprint_library()
+# Liste complète des véhicules, saisie à la main
+SOURCE_VEHICLES = "CARLA_Vehicles1.csv"
+SYNC_CACHE = "CARLA_Vehicles_sync.json"
 
-# Récupérer tous les blueprint_id disponibles dans CARLA
-available_blueprints = {blueprint.id for blueprint in blueprint_library.filter("vehicle.*")}
 
-# Charger ton fichier CSV avec les véhicules
-csv_path = "CARLA_Vehicles1.csv"
-df = pd.read_csv(csv_path, delimiter=";", dtype=str)
+def load_sync_cache(path=SYNC_CACHE):
+    """Synchronisations précédentes : {"servers": {version: {"extents": ..., "maps": ...}}, "last": ...}"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"servers": {}, "last": None}
 
-# Filtrer les véhicules dont le blueprint_id est disponible dans CARLA
-df_filtered = df[df["Blueprint_ID"].isin(available_blueprints)]
 
-# Enregistrer le nouveau fichier CSV avec les véhicules disponibles dans CARLA
-output_path = "CARLA_Vehicles_Available.csv"
-df_filtered.to_csv(output_path, index=False, sep=";")
+def save_sync_cache(cache, path=SYNC_CACHE):
+    # Fichier temporaire puis renommage : une synchronisation interrompue ne corrompt pas le cache
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
 
-print(f"✅ Fichier filtré enregistré dans '{output_path}'")
+
+def measure_extents(client, world, blueprints, spacing=10.0, altitude=200.0):
+    """Boîte englobante des véhicules : {blueprint_id: {"extent": [x, y, z], "height_mm": ...}}.
+
+    Tous les véhicules apparaissent en un seul lot, en l'air et sans physique
+    (aucune collision possible), puis sont détruits en un seul lot.
+    """
+    import carla
+
+    origin = world.get_map().get_spawn_points()[0].location
+    batch = [carla.command.SpawnActor(blueprint, carla.Transform(
+                 carla.Location(x=origin.x + i * spacing, y=origin.y, z=origin.z + altitude)))
+             .then(carla.command.SetSimulatePhysics(carla.command.FutureActor, False))
+             for i, blueprint in enumerate(blueprints)]
+    synchronous = world.get_settings().synchronous_mode
+    responses = client.apply_batch_sync(batch, synchronous)
+    actor_ids = {response.actor_id: blueprint.id for response, blueprint in zip(responses, blueprints)
+                 if not response.error}
+    try:
+        if not synchronous:
+            world.wait_for_tick()  # Les nouveaux acteurs n'apparaissent qu'au tick suivant
+        extents = {}
+        for actor in world.get_actors(list(actor_ids)):
+            box = actor.bounding_box
+            extents[actor_ids[actor.id]] = {
+                "extent": [round(box.extent.x, 3), round(box.extent.y, 3), round(box.extent.z, 3)],
+                # Origine du véhicule au sol : le toit est au centre de la boîte plus sa demi-hauteur
+                "height_mm": round((box.location.z + box.extent.z) * 1000),
+            }
+    finally:
+        client.apply_batch_sync([carla.command.DestroyActor(actor_id) for actor_id in actor_ids], synchronous)
+    return extents
+
+
+def available_rows(source_rows, blueprint_ids, extents):
+    """Colonnes et lignes du CSV des véhicules disponibles, dans l'ordre du CSV source, avec la hauteur mesurée"""
+    fieldnames = [name for name in source_rows[0] if name != BBOX_HEIGHT] + [BBOX_HEIGHT] if source_rows else []
+    rows = []
+    for row in source_rows:
+        if row["Blueprint_ID"] in blueprint_ids:
+            extent = extents.get(row["Blueprint_ID"])
+            rows.append({**row, BBOX_HEIGHT: str(extent["height_mm"]) if extent else ""})
+    return fieldnames, rows
+
+
+def update_available_csv(fieldnames, rows, path=AVAILABLE_VEHICLES):
+    """Réécrit le CSV seulement si des lignes ont changé ; renvoie les Blueprint_ID modifiés, ajoutés ou retirés"""
+    try:
+        previous = {row["Blueprint_ID"]: row for row in read_rows(path)}
+        previous_order = list(previous)
+    except FileNotFoundError:
+        previous, previous_order = {}, []
+    order = [row["Blueprint_ID"] for row in rows]
+    changed = [row["Blueprint_ID"] for row in rows if previous.get(row["Blueprint_ID"]) != row]
+    changed += sorted(set(previous_order) - set(order))
+    if not changed and previous_order == order:
+        return changed  # Date de modification inchangée : le catalogue des interfaces reste en cache
+
+    with open(path + ".tmp", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(path + ".tmp", path)
+    return changed
+
+
+def sync(client, cache_path=SYNC_CACHE, source_path=SOURCE_VEHICLES, output_path=AVAILABLE_VEHICLES):
+    """Synchronise le CSV avec le serveur ; renvoie (ajoutés, retirés, lignes modifiées)"""
+    world = client.get_world()
+    version = client.get_server_version()
+    map_name = world.get_map().name
+    blueprints = list(world.get_blueprint_library().filter("vehicle.*"))
+    blueprint_ids = sorted(blueprint.id for blueprint in blueprints)
+
+    cache = load_sync_cache(cache_path)
+    server = cache["servers"].setdefault(version, {"extents": {}, "maps": {}})
+    last = cache["last"]
+    previous = set(cache["servers"][last["version"]]["maps"][last["map"]]["blueprints"]) if last else set()
+
+    # Seuls les véhicules jamais mesurés sur cette version du serveur apparaissent
+    missing = [blueprint for blueprint in blueprints if blueprint.id not in server["extents"]]
+    if missing:
+        print(f"📏 Mesure de la boîte englobante de {len(missing)} véhicule(s)...")
+        server["extents"].update(measure_extents(client, world, missing))
+
+    server["maps"][map_name] = {"blueprints": blueprint_ids, "synced": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    cache["last"] = {"version": version, "map": map_name}
+    save_sync_cache(cache, cache_path)
+
+    fieldnames, rows = available_rows(read_rows(source_path), set(blueprint_ids), server["extents"])
+    changed = update_available_csv(fieldnames, rows, output_path)
+    return sorted(set(blueprint_ids) - previous), sorted(previous - set(blueprint_ids)), changed
+
+
+def sync_offline(version=None, map_name=None, cache_path=SYNC_CACHE, source_path=SOURCE_VEHICLES,
+                 output_path=AVAILABLE_VEHICLES):
+    """Régénère le CSV depuis une synchronisation gardée en cache (la dernière par défaut), sans serveur"""
+    cache = load_sync_cache(cache_path)
+    last = cache["last"] or {}
+    version = version or last.get("version")
+    map_name = map_name or last.get("map")
+    try:
+        server = cache["servers"][version]
+        blueprint_ids = server["maps"][map_name]["blueprints"]
+    except KeyError:
+        raise ValueError(f"⚠️ Aucune synchronisation en cache pour la version {version} et la carte {map_name}")
+    fieldnames, rows = available_rows(read_rows(source_path), set(blueprint_ids), server["extents"])
+    return update_available_csv(fieldnames, rows, output_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synchronise CARLA_Vehicles_Available.csv avec le serveur CARLA")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=2000)
+    parser.add_argument("--offline", action="store_true", help="Utilise une synchronisation en cache, sans serveur")
+    parser.add_argument("--version", default=None, help="Version du serveur en cache (avec --offline)")
+    parser.add_argument("--map", default=None, help="Carte en cache (avec --offline)")
+    parser.add_argument("--cache", default=SYNC_CACHE)
+    parser.add_argument("--source", default=SOURCE_VEHICLES)
+    parser.add_argument("--output", default=AVAILABLE_VEHICLES)
+    args = parser.parse_args()
+
+    if args.offline:
+        try:
+            changed = sync_offline(args.version, args.map, args.cache, args.source, args.output)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+    else:
+        import carla
+
+        # Connexion au serveur CARLA
+        client = carla.Client(args.host, args.port)
+        client.set_timeout(80.0)
+        added, removed, changed = sync(client, args.cache, args.source, args.output)
+        print(f"🔄 Blueprints : {len(added)} ajouté(s), {len(removed)} retiré(s) depuis la dernière synchronisation")
+
+    if changed:
+        print(f"✅ Fichier filtré enregistré dans '{args.output}' ({len(changed)} ligne(s) modifiée(s), "
+              f"{len(read_rows(args.output))} véhicules disponibles)")
+    else:
+        print(f"✅ '{args.output}' déjà à jour")
@@ -0,0 +1,122 @@
+import numpy as np
+
+GRAVITY = 9.81  # m/s²
+
+
+def weather_field(weather, name, default=0.0):
+    """Champ météo CARLA (`precipitation`, `fog_density`, ...) d'un carla.WeatherParameters,
+    d'un dict de tableaux (colonnes de meteo_data) ou None"""
+    if weather is None:
+        return default
+    if isinstance(weather, dict):
+        return np.asarray(weather.get(name, default), dtype=np.float64)
+    value = getattr(weather, name, None)
+    return default if value is None else value
+
+
+class ConstantBraking:
+    """Temps de réaction et décélération fixes, quelle que soit la météo (calcul historique)"""
+
+    def __init__(self, reaction_time=1.0, deceleration=6.0):
+        self.reaction_time = reaction_time
+        self.deceleration = deceleration
+
+    def parameters(self, weather=None):
+        """(temps de réaction en s, décélération en m/s²)"""
+        return self.reaction_time, self.deceleration
+
+
+class WeatherBraking:
+    """Décélération limitée par l'adhérence de la chaussée mouillée, réaction plus lente par mauvaise visibilité.
+
+    `deceleration` est la décélération sur route sèche ; elle est multipliée
+    par un coefficient qui passe de 1 à `wet_friction_ratio` (~0,5 / 0,8 pour
+    un enrobé mouillé) quand la route se couvre d'eau (flaques, ou pluie à
+    moitié). Le brouillard et la pluie ajoutent jusqu'à `fog_reaction_penalty`
+    et `rain_reaction_penalty` secondes au temps de réaction.
+    """
+
+    def __init__(self, reaction_time=1.0, deceleration=6.0, wet_friction_ratio=0.6, fog_reaction_penalty=0.5,
+                 rain_reaction_penalty=0.2, max_friction=1.0):
+        self.reaction_time = reaction_time
+        self.deceleration = deceleration
+        self.wet_friction_ratio = wet_friction_ratio
+        self.fog_reaction_penalty = fog_reaction_penalty
+        self.rain_reaction_penalty = rain_reaction_penalty
+        self.max_friction = max_friction
+
+    def parameters(self, weather=None):
+        precipitation = np.clip(weather_field(weather, 'precipitation'), 0, 100) / 100
+        deposits = np.clip(weather_field(weather, 'precipitation_deposits'), 0, 100) / 100
+        fog = np.clip(weather_field(weather, 'fog_density'), 0, 100) / 100
+
+        wetness = np.maximum(deposits, 0.5 * precipitation)
+        friction_ratio = 1.0 - (1.0 - self.wet_friction_ratio) * wetness
+        # Jamais plus que ce que l'adhérence maximale permet
+        deceleration = np.minimum(self.deceleration * friction_ratio, self.max_friction * GRAVITY)
+        reaction_time = self.reaction_time + self.fog_reaction_penalty * fog + self.rain_reaction_penalty * precipitation
+        return reaction_time, deceleration
+
+
+# Registre des modèles de freinage disponibles (option --braking-model)
+BRAKING_MODELS = {
+    'constant': ConstantBraking,
+    'meteo': WeatherBraking,
+}
+
+
+def make_braking_model(name='constant', **parameters):
+    if name not in BRAKING_MODELS:
+        raise ValueError(f"Modèle de freinage inconnu : '{name}' (choix : {', '.join(BRAKING_MODELS)})")
+    return BRAKING_MODELS[name](**parameters)
+
+
+def stopping_distances(speed, reaction_time, deceleration):
+    """Distances de réaction, de freinage et d'arrêt (m) pour des vitesses en km/h"""
+    speed_mps = np.asarray(speed, dtype=np.float64) / 3.6
+    reaction_distance = speed_mps * reaction_time
+    braking_distance = speed_mps ** 2 / (2 * deceleration)
+    return reaction_distance, braking_distance, reaction_distance + braking_distance
+
+
+def time_to_collision(distance, speed, lead_speed):
+    """distance / vitesse de rapprochement (s), infini si on ne se rapproche pas"""
+    closing_speed = (np.asarray(speed, dtype=np.float64) - lead_speed) / 3.6  # en m/s
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(closing_speed > 0, distance / closing_speed, np.inf)
+
+
+def time_headway(distance, speed):
+    """Temps inter-véhiculaire (s) : distance / vitesse de l'ego, infini à l'arrêt"""
+    speed_mps = np.asarray(speed, dtype=np.float64) / 3.6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(speed_mps > 0, distance / speed_mps, np.inf)
+
+
+def required_deceleration(distance, speed, lead_speed):
+    """Décélération (m/s²) nécessaire pour annuler la vitesse de rapprochement avant le contact"""
+    closing_speed = (np.asarray(speed, dtype=np.float64) - lead_speed) / 3.6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((closing_speed > 0) & np.isfinite(distance), closing_speed ** 2 / (2 * distance), 0.0)
+
+
+def safety_metrics(speed, distance, lead_speed, weather=None, model=None):
+    """Toutes les métriques de sécurité, sur des scalaires ou des tableaux (véhicules x frames).
+
+    `speed` et `lead_speed` en km/h, `distance` en m (inf sans véhicule devant),
+    `weather` : carla.WeatherParameters ou dict de colonnes de meteo_data.
+    """
+    model = model if model is not None else ConstantBraking()
+    distance = np.asarray(distance, dtype=np.float64)
+    reaction_time, deceleration = model.parameters(weather)
+    reaction_distance, braking_distance, stopping_distance = stopping_distances(speed, reaction_time, deceleration)
+    return {
+        'ttc': time_to_collision(distance, speed, lead_speed),
+        'time_headway': time_headway(distance, speed),
+        'required_deceleration': required_deceleration(distance, speed, lead_speed),
+        'reaction_time': np.broadcast_to(reaction_time, reaction_distance.shape),
+        'deceleration': np.broadcast_to(deceleration, reaction_distance.shape),
+        'reaction_distance': reaction_distance,
+        'braking_distance': braking_distance,
+        'stopping_distance': stopping_distance,
+    }
@@ -0,0 +1,209 @@
+import threading
+import time
+
+import numpy as np
+
+from profilage import LatencyHistogram
+
+
+def corridor_clusters(x, gap):
+    """Groupes de points le long de l'axe x (triés), coupés là où l'écart dépasse `gap` m.
+
+    Dans un couloir de la largeur d'une voie, deux obstacles ne se recouvrent
+    pas en x : un regroupement 1D suffit et reste en O(N log N).
+    """
+    order = np.argsort(x)
+    sorted_x = x[order]
+    cuts = np.flatnonzero(np.diff(sorted_x) > gap) + 1
+    return np.split(order, cuts)
+
+
+class LeadTracker:
+    """Filtre alpha-bêta sur la distance (m) et la vitesse de rapprochement (m/s, positive si on se rapproche).
+
+    Une mesure trop loin de la prédiction (`gate` m) remplace la piste ; la
+    piste est confirmée après `min_hits` mesures et abandonnée après
+    `max_misses` balayages qui couvrent le couloir sans rien y trouver. La
+    vitesse radiale du radar, quand elle est disponible, est mélangée à
+    l'estimation avec le poids `radar_weight`.
+    """
+
+    def __init__(self, alpha=0.5, beta=0.2, gate=3.0, min_hits=2, max_misses=3, radar_weight=0.7):
+        self.alpha = alpha
+        self.beta = beta
+        self.gate = gate
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.radar_weight = radar_weight
+        self.reset()
+
+    def reset(self):
+        self.distance = None
+        self.closing_speed = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.last_time = None
+
+    @property
+    def confirmed(self):
+        return self.distance is not None and self.hits >= self.min_hits
+
+    def update(self, sim_time, distance=None, closing_speed=None, covered=True):
+        """Avance la piste à `sim_time` (s) avec une mesure, ou sans (`distance` None)"""
+        dt = sim_time - self.last_time if self.last_time is not None else 0.0
+        if dt < 0:
+            return  # Mesure plus ancienne que la piste (plusieurs workers) : ignorée
+        self.last_time = sim_time
+
+        predicted = self.distance - self.closing_speed * dt if self.distance is not None else None
+        if distance is None:
+            if predicted is not None:
+                self.distance = predicted
+                if covered:
+                    self.misses += 1
+                if self.misses > self.max_misses:
+                    self.reset()
+                    self.last_time = sim_time
+            return
+
+        if predicted is None or abs(distance - predicted) > self.gate:
+            self.distance = distance
+            self.closing_speed = closing_speed if closing_speed is not None else 0.0
+            self.hits = 1
+        else:
+            residual = distance - predicted
+            self.distance = predicted + self.alpha * residual
+            if dt > 0:
+                self.closing_speed -= self.beta * residual / dt
+            if closing_speed is not None:
+                self.closing_speed += self.radar_weight * (closing_speed - self.closing_speed)
+            self.hits += 1
+        self.misses = 0
+
+
+class LeadPerception:
+    """Véhicule devant estimé à partir du LiDAR et du radar, sans la vérité terrain du simulateur.
+
+    À chaque mesure LiDAR, les points du couloir devant l'ego (`half_width` m
+    de part et d'autre, de `min_range` à `max_range` m, entre `min_height` et
+    `max_height` m au-dessus du sol) sont regroupés le long de l'axe ; le
+    groupe le plus proche d'au moins `min_points` points donne la distance.
+    Les retours radar du même couloir à moins de `association_gate` m de
+    cette distance donnent la vitesse de rapprochement. Un balayage qui ne
+    couvre pas l'avant (rotation partielle) ne compte pas comme un échec ;
+    le radar seul prend alors le relais s'il a au moins `min_radar_returns`
+    retours récents. Les capteurs sont supposés au centre du véhicule :
+    la distance est celle de la face arrière du véhicule devant.
+
+    `update_radar` et `update_lidar` peuvent être appelés depuis des workers
+    différents de pipeline_capteurs.py.
+    """
+
+    def __init__(self, lidar_height, radar_height, half_width=1.5, min_range=2.5, max_range=50.0, min_height=0.3,
+                 max_height=2.5, cluster_gap=1.0, min_points=3, association_gate=2.0, min_radar_returns=2,
+                 radar_max_age=0.1, tracker=None):
+        self.lidar_height = lidar_height
+        self.radar_height = radar_height
+        self.half_width = half_width
+        self.min_range = min_range
+        self.max_range = max_range
+        self.min_height = min_height
+        self.max_height = max_height
+        self.cluster_gap = cluster_gap
+        self.min_points = min_points
+        self.association_gate = association_gate
+        self.min_radar_returns = min_radar_returns
+        self.radar_max_age = radar_max_age
+        self.tracker = tracker if tracker is not None else LeadTracker()
+
+        self._lock = threading.Lock()
+        self._radar_time = None
+        self._radar_forward = np.zeros(0, dtype=np.float32)
+        self._radar_closing = np.zeros(0, dtype=np.float32)
+        self._estimate = self._empty_estimate()
+
+        self.frames = 0
+        self.lidar_detections = 0
+        self.radar_only_detections = 0
+        self.timings = LatencyHistogram()
+
+    @staticmethod
+    def _empty_estimate():
+        return {'sensor_frame': -1, 'detected': 0, 'distance': np.inf, 'closing_speed': 0.0, 'ttc': np.inf,
+                'lidar_points': 0, 'radar_returns': 0, 'track_age': 0}
+
+    def update_radar(self, sim_time, detections):
+        """Garde les retours radar du couloir (tableau structuré de traitement_radar.decode_radar)"""
+        cos_altitude = np.cos(detections['altitude'])
+        forward = detections['depth'] * cos_altitude * np.cos(detections['azimuth'])
+        lateral = detections['depth'] * cos_altitude * np.sin(detections['azimuth'])
+        height = self.radar_height + detections['depth'] * np.sin(detections['altitude'])
+        keep = ((np.abs(lateral) <= self.half_width) & (forward >= self.min_range) & (height >= self.min_height)
+                & (height <= self.max_height))
+        with self._lock:
+            self._radar_time = sim_time
+            self._radar_forward = forward[keep]
+            self._radar_closing = -detections['velocity'][keep]  # Vitesse radiale négative = on se rapproche
+
+    def update_lidar(self, frame, sim_time, points):
+        """Met à jour l'estimation avec un balayage LiDAR brut (N, 4) dans le repère du capteur"""
+        start = time.perf_counter()
+        x, y = points[:, 0], points[:, 1]
+        height = points[:, 2] + self.lidar_height
+        in_corridor = (np.abs(y) <= self.half_width) & (x >= self.min_range) & (x <= self.max_range)
+        # Le sol du couloir n'apparaît que si ce balayage (partiel) est passé devant le véhicule
+        covered = bool(in_corridor.any())
+        obstacle_x = x[in_corridor & (height >= self.min_height) & (height <= self.max_height)]
+
+        distance = None
+        lidar_points = 0
+        for cluster in corridor_clusters(obstacle_x, self.cluster_gap):
+            if len(cluster) >= self.min_points:
+                distance = float(obstacle_x[cluster].min())
+                lidar_points = len(cluster)
+                break
+
+        with self._lock:
+            fresh = self._radar_time is not None and abs(sim_time - self._radar_time) <= self.radar_max_age
+            radar_forward = self._radar_forward if fresh else self._radar_forward[:0]
+            radar_closing = self._radar_closing if fresh else self._radar_closing[:0]
+
+            if distance is not None:
+                associated = np.abs(radar_forward - distance) <= self.association_gate
+                self.lidar_detections += 1
+            elif len(radar_forward) >= self.min_radar_returns:
+                # Avant non couvert par ce balayage ou obstacle trop peu visible : radar seul
+                distance = float(radar_forward.min())
+                associated = np.abs(radar_forward - distance) <= self.association_gate
+                self.radar_only_detections += 1
+            else:
+                associated = np.zeros(len(radar_forward), dtype=bool)
+            radar_returns = int(np.count_nonzero(associated))
+            closing_speed = float(np.median(radar_closing[associated])) if radar_returns else None
+
+            self.tracker.update(sim_time, distance, closing_speed, covered)
+            self.frames += 1
+            estimate = self._empty_estimate()
+            estimate.update(sensor_frame=frame, lidar_points=lidar_points, radar_returns=radar_returns)
+            if self.tracker.confirmed:
+                tracker = self.tracker
+                estimate.update(detected=1, distance=tracker.distance, closing_speed=tracker.closing_speed,
+                                ttc=tracker.distance / tracker.closing_speed if tracker.closing_speed > 0 else np.inf,
+                                track_age=tracker.hits)
+            self._estimate = estimate
+        self.timings.add(time.perf_counter() - start)
+        return estimate
+
+    def estimate(self):
+        """Dernière estimation (dict) : distance en m, vitesse de rapprochement en m/s, TTC en s"""
+        with self._lock:
+            return dict(self._estimate)
+
+    def report(self):
+        time_summary = self.timings.summary()
+        if not self.frames:
+            return time_summary
+        print(f"👁️ Perception : {self.frames} balayages, véhicule devant vu par le LiDAR {self.lidar_detections} fois "
+              f"et par le radar seul {self.radar_only_detections} fois, "
+              f"{time_summary['p50'] * 1e3:.2f} ms p50 / {time_summary['p99'] * 1e3:.2f} ms p99 par balayage")
+        return time_summary
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+
+# Politiques de contre-pression quand la file d'un capteur est pleine
+BLOCK = 'block'              # le callback attend qu'une place se libère (mesure jetée si le pipeline est arrêté)
+DROP_OLDEST = 'drop-oldest'  # on jette la mesure la plus ancienne de la file
+DROP_NEWEST = 'drop-newest'  # on jette la mesure qui arrive
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+
+class _Channel:
+    """File bornée et compteurs d'un capteur"""
+
+    def __init__(self, name, handler, maxsize, policy):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique inconnue : '{policy}' (choix : {', '.join(POLICIES)})")
+        self.name = name
+        self.handler = handler
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.busy = False  # un seul worker à la fois par capteur pour garder l'ordre des frames
+        self.queued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+
+
+class SensorPipeline:
+    """Découple les callbacks `listen` de CARLA du traitement et des écritures disque.
+
+    Les callbacks appellent seulement `submit(capteur, mesure)`, qui range la
+    mesure brute dans une file bornée propre au capteur. Un ou plusieurs
+    workers vident ces files et appellent le traitement enregistré avec
+    `register()`. Les mesures d'un même capteur sont traitées dans l'ordre.
+
+    Avec un `profiler` (profilage.FrameProfiler), chaque capteur enregistre
+    l'attente du verrou dans `submit` ('<capteur>.verrou'), le temps passé en
+    file ('<capteur>.file') et la durée du traitement ('<capteur>.traitement').
+    """
+
+    def __init__(self, maxsize=32, policy=DROP_OLDEST, workers=1, profiler=None):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.n_workers = workers
+        self.profiler = profiler
+        self._channels = {}
+        self._order = []
+        self._next = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads = []
+
+    def register(self, sensor, handler, maxsize=None, policy=None):
+        """Associe un traitement `handler(mesure)` à un capteur"""
+        with self._cond:
+            self._channels[sensor] = _Channel(sensor, handler, maxsize or self.maxsize, policy or self.policy)
+            self._order.append(sensor)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.n_workers):
+            thread = threading.Thread(target=self._work, name=f'sensor-pipeline-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, sensor, measurement):
+        """Ajoute une mesure brute à la file du capteur ; renvoie False si elle a été jetée"""
+        start = time.perf_counter()
+        with self._cond:
+            channel = self._channels[sensor]
+            if len(channel.items) >= channel.maxsize:
+                if channel.policy == DROP_NEWEST:
+                    channel.dropped += 1
+                    return False
+                if channel.policy == DROP_OLDEST:
+                    channel.items.popleft()
+                    channel.dropped += 1
+                else:
+                    while self._running and len(channel.items) >= channel.maxsize:
+                        self._cond.wait()
+                    if len(channel.items) >= channel.maxsize:
+                        # Pipeline pas encore démarré ou arrêté : personne ne videra la file
+                        channel.dropped += 1
+                        return False
+            now = time.perf_counter()
+            channel.items.append((now, measurement))
+            channel.queued += 1
+            channel.max_depth = max(channel.max_depth, len(channel.items))
+            self._cond.notify_all()
+        if self.profiler is not None:
+            self.profiler.record(f'{sensor}.verrou', now - start)
+        return True
+
+    def _take(self):
+        """Choisit (à tour de rôle) un capteur libre avec des mesures en attente"""
+        n = len(self._order)
+        for offset in range(n):
+            channel = self._channels[self._order[(self._next + offset) % n]]
+            if channel.items and not channel.busy:
+                self._next = (self._next + offset + 1) % n
+                channel.busy = True
+                queued_at, measurement = channel.items.popleft()
+                if self.profiler is not None:
+                    self.profiler.record(f'{channel.name}.file', time.perf_counter() - queued_at)
+                return channel, measurement
+        return None, None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                channel, measurement = self._take()
+                while channel is None:
+                    if not self._running:
+                        return
+                    self._cond.wait()
+                    channel, measurement = self._take()
+                # Une place vient de se libérer : réveiller un callback en mode BLOCK
+                self._cond.notify_all()
+
+            start = time.perf_counter()
+            try:
+                channel.handler(measurement)
+                failed = False
+            except Exception as e:
+                print(f"❌ Erreur de traitement {channel.name} : {e}")
+                failed = True
+            if self.profiler is not None:
+                self.profiler.record(f'{channel.name}.traitement', time.perf_counter() - start)
+
+            with self._cond:
+                channel.busy = False
+                channel.processed += 1
+                channel.errors += failed
+                self._cond.notify_all()
+
+    def stop(self, drain=True, timeout=5.0):
+        """Arrête les workers, après avoir traité les mesures en attente si `drain`"""
+        if drain:
+            deadline = time.time() + timeout
+            with self._cond:
+                while any(c.items or c.busy for c in self._channels.values()) and time.time() < deadline:
+                    self._cond.wait(0.05)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self):
+        """Compteurs par capteur : en file, mis en file, traités, jetés, erreurs, profondeur max"""
+        with self._cond:
+            return {
+                name: {
+                    'pending': len(c.items),
+                    'queued': c.queued,
+                    'processed': c.processed,
+                    'dropped': c.dropped,
+                    'errors': c.errors,
+                    'max_depth': c.max_depth,
+                }
+                for name, c in self._channels.items()
+            }
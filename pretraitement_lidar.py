@@ -0,0 +1,110 @@
+import time
+
+import numpy as np
+
+from profilage import LatencyHistogram
+
+
+def voxel_downsample(points, voxel_size):
+    """Garde un point par voxel de `voxel_size` m (le premier rencontré, intensité comprise)"""
+    if voxel_size is None or voxel_size <= 0 or len(points) == 0:
+        return points
+    cells = np.floor(points[:, :3] / voxel_size).astype(np.int64)
+    # Indices de voxel empaquetés dans un seul entier (21 bits par axe : ±1 048 576 voxels)
+    cells += 1 << 20
+    keys = (cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2]
+    _, first = np.unique(keys, return_index=True)
+    first.sort()  # Garder l'ordre d'origine des points
+    return points[first]
+
+
+class LidarPreprocessor:
+    """Réduit un balayage LiDAR (N, 4) float32 avant tout enregistrement.
+
+    Étapes, dans l'ordre : bande de hauteur (z_min, z_max), distance
+    (min_range, max_range), azimut (en degrés, 0 = devant, positif à droite
+    comme dans CARLA), suppression du sol et sous-échantillonnage par voxels.
+    Le sol est supposé plat : ce sont les points à moins de
+    `ground_tolerance` m au-dessus de `-sensor_height` (repère du capteur).
+    Chaque étape désactivée (None) ne coûte rien.
+    """
+
+    def __init__(self, z_min=None, z_max=None, min_range=None, max_range=None, azimuth=None, sensor_height=None,
+                 remove_ground=False, ground_tolerance=0.2, voxel_size=None):
+        self.z_min = z_min
+        self.z_max = z_max
+        self.min_range = min_range
+        self.max_range = max_range
+        self.azimuth = azimuth
+        self.sensor_height = sensor_height
+        self.remove_ground = remove_ground and sensor_height is not None
+        self.ground_tolerance = ground_tolerance
+        self.voxel_size = voxel_size
+
+        self.frames = 0
+        self.points_in = 0
+        self.points_after_roi = 0
+        self.points_after_ground = 0
+        self.points_out = 0
+        self.timings = LatencyHistogram()
+
+    def mask(self, points):
+        """Masque des points gardés par la bande de hauteur, la distance, l'azimut et le sol"""
+        x, y, z = points[:, 0], points[:, 1], points[:, 2]
+        keep = np.ones(len(points), dtype=bool)
+        if self.z_min is not None:
+            keep &= z >= self.z_min
+        if self.z_max is not None:
+            keep &= z <= self.z_max
+        if self.min_range is not None or self.max_range is not None:
+            squared_range = x * x + y * y
+            if self.min_range is not None:
+                keep &= squared_range >= self.min_range ** 2
+            if self.max_range is not None:
+                keep &= squared_range <= self.max_range ** 2
+        if self.azimuth is not None:
+            azimuth = np.degrees(np.arctan2(y, x))
+            low, high = self.azimuth
+            keep &= (azimuth >= low) & (azimuth <= high) if low <= high else (azimuth >= low) | (azimuth <= high)
+        roi_count = int(np.count_nonzero(keep))
+        if self.remove_ground:
+            keep &= z > -self.sensor_height + self.ground_tolerance
+        return keep, roi_count
+
+    def process(self, points):
+        """Renvoie les points gardés (N', 4) et met à jour les compteurs"""
+        start = time.perf_counter()
+        keep, roi_count = self.mask(points)
+        kept = points[keep]
+        ground_count = len(kept)
+        kept = voxel_downsample(kept, self.voxel_size)
+        self.timings.add(time.perf_counter() - start)
+
+        self.frames += 1
+        self.points_in += len(points)
+        self.points_after_roi += roi_count
+        self.points_after_ground += ground_count
+        self.points_out += len(kept)
+        return kept
+
+    def stats(self):
+        """Part des points gardés après chaque étape et durée par balayage (s)"""
+        points_in = max(self.points_in, 1)
+        return {
+            'frames': self.frames,
+            'points_in': self.points_in,
+            'points_out': self.points_out,
+            'roi_ratio': self.points_after_roi / points_in,
+            'ground_ratio': self.points_after_ground / points_in,
+            'output_ratio': self.points_out / points_in,
+            'time': self.timings.summary(),
+        }
+
+    def report(self):
+        s = self.stats()
+        if not s['frames']:
+            return s
+        print(f"🌐 LiDAR : {s['points_in'] / s['frames']:.0f} → {s['points_out'] / s['frames']:.0f} points/balayage "
+              f"(ROI {s['roi_ratio']:.0%}, sans sol {s['ground_ratio']:.0%}, voxels {s['output_ratio']:.0%}), "
+              f"{s['time']['p50'] * 1e3:.2f} ms p50 / {s['time']['p99'] * 1e3:.2f} ms p99 par balayage")
+        return s
@@ -0,0 +1,145 @@
+import bisect
+import contextlib
+import json
+import math
+import threading
+import time
+
+
+class LatencyHistogram:
+    """Histogramme de durées à taille fixe, bornes logarithmiques de `min_seconds` à `max_seconds`.
+
+    La mémoire ne dépend pas du nombre de mesures ; les percentiles sont
+    donnés à la borne haute de leur intervalle (à ~12 % près avec 20
+    intervalles par décade), le maximum est exact.
+    """
+
+    def __init__(self, min_seconds=1e-6, max_seconds=10.0, bins_per_decade=20):
+        decades = math.log10(max_seconds / min_seconds)
+        n_edges = int(round(decades * bins_per_decade)) + 1
+        self.edges = [min_seconds * 10 ** (i / bins_per_decade) for i in range(n_edges)]
+        self.counts = [0] * (n_edges + 1)  # + intervalles sous le min et au-delà du max
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.edges, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Durée sous laquelle se trouvent `q` % des mesures"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        cumulated = 0
+        for i, n in enumerate(self.counts):
+            cumulated += n
+            if cumulated >= rank and n:
+                return min(self.edges[i] if i < len(self.edges) else self.max, self.max)
+        return self.max
+
+    def summary(self):
+        """count, mean, p50, p95, p99 et max (en secondes)"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class FrameProfiler:
+    """Durées par étape de la boucle principale, des callbacks et des files capteurs.
+
+    `stage(nom)` chronomètre un bloc de la frame courante, `record(nom, s)`
+    ajoute une durée mesurée ailleurs (thread capteur, worker). Désactivé,
+    le profileur ne mesure rien et `stage()` ne coûte qu'un appel.
+    """
+
+    def __init__(self, enabled=True, hud_refresh=1.0):
+        self.enabled = enabled
+        self.hud_refresh = hud_refresh
+        self.frames = 0
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._frame_start = None
+        self._hud_lines = []
+        self._hud_time = float('-inf')
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.add(seconds)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def stage(self, name):
+        """Contexte qui chronomètre l'étape `name`"""
+        return self._timed(name) if self.enabled else contextlib.nullcontext()
+
+    def timed(self, name, function):
+        """Enveloppe `function` pour enregistrer la durée de chaque appel sous `name`"""
+        if not self.enabled:
+            return function
+
+        def wrapper(*args, **kwargs):
+            with self._timed(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def frame(self):
+        """Marque le début d'une frame ; la durée depuis la précédente est enregistrée sous 'frame'"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.record('frame', now - self._frame_start)
+        self._frame_start = now
+        self.frames += 1
+
+    def summary(self):
+        """{nom: {count, mean, p50, p95, p99, max}} pour chaque étape mesurée"""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+
+    def hud_lines(self):
+        """Lignes courtes pour le HUD (p50/p95/max en ms), recalculées au plus toutes les `hud_refresh` s"""
+        now = time.perf_counter()
+        if now - self._hud_time >= self.hud_refresh:
+            self._hud_time = now
+            self._hud_lines = [f"{name[:18]:<18} {s['p50'] * 1e3:6.1f} {s['p95'] * 1e3:6.1f} {s['max'] * 1e3:6.1f}"
+                               for name, s in self.summary().items()]
+            self._hud_lines.insert(0, f"{'ms':<18} {'p50':>6} {'p95':>6} {'max':>6}")
+        return self._hud_lines
+
+    def report(self, path=None):
+        """Affiche le résumé (en ms) et l'écrit en JSON dans `path` si fourni"""
+        summary = self.summary()
+        if not summary:
+            return summary
+        print(f"⏱️ Profil sur {self.frames} frames (ms) :")
+        print(f"   {'étape':<22} {'n':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for name, s in summary.items():
+            print(f"   {name:<22} {s['count']:>7} {s['p50'] * 1e3:>8.2f} {s['p95'] * 1e3:>8.2f} "
+                  f"{s['p99'] * 1e3:>8.2f} {s['max'] * 1e3:>8.2f}")
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'frames': self.frames, 'seconds': summary}, f, indent=2)
+            print(f"💾 Profil enregistré dans {path}")
+        return summary
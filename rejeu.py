@@ -0,0 +1,192 @@
+# Rejeu hors ligne : recalcule les métriques de conduite à partir des enregistrements, sans CARLA.
+#
+# code_final.py enregistre à chaque frame la position, la direction et la vitesse de tous les
+# véhicules (acteurs_data). Ce script relit ce flux par morceaux, refait la détection du véhicule
+# devant et le calcul des métriques (metriques.py) sur toutes les frames à la fois, avec d'autres
+# paramètres ou un autre modèle de freinage si besoin (la météo vient de meteo_data), et écrit
+# metrics_data dans --output.
+#
+#   python rejeu.py balayage/Town03_vehicle.tesla.model3_beau_temps_s0 --reaction-time 1.5 --deceleration 4
+#   python rejeu.py balayage/* --braking-model meteo --output rejeu_meteo
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from enregistrement import SENSOR_COLUMNS, default_log_path, open_sensor_log, read_sensor_log
+from metriques import BRAKING_MODELS, make_braking_model, safety_metrics
+
+
+def find_log(directory, sensor):
+    """Chemin du flux `sensor` dans `directory`, quel que soit son format (ou None)"""
+    for backend in ('csv', 'parquet', 'npz', 'archive'):
+        path = os.path.join(directory, default_log_path(sensor, backend))
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def iter_frame_chunks(path, chunk_rows=100000):
+    """Relit un flux par morceaux sans jamais couper une frame en deux"""
+    carry = None
+    for chunk in read_sensor_log(path, chunk_rows=chunk_rows):
+        if carry is not None:
+            chunk = {name: np.concatenate((carry[name], values)) for name, values in chunk.items()}
+        # Les lignes d'une frame se suivent : la dernière frame peut continuer dans le morceau suivant
+        others = np.flatnonzero(chunk['frame'] != chunk['frame'][-1])
+        cut = others[-1] + 1 if len(others) else 0
+        carry = {name: values[cut:] for name, values in chunk.items()}
+        if cut:
+            yield {name: values[:cut] for name, values in chunk.items()}
+    if carry is not None and len(carry['frame']):
+        yield carry
+
+
+def lead_vehicles(frames, ids, positions, forwards, speeds, is_ego, max_distance=20.0, min_alignment=0.5):
+    """Véhicule devant l'ego pour chaque frame, sur tout un morceau à la fois.
+
+    Mêmes critères que detection_vehicules.find_lead_vehicle. Renvoie les
+    indices des lignes ego (une par frame) et, pour chacune, l'identifiant,
+    la distance et la vitesse du véhicule devant (-1 / inf / 0 sinon).
+    """
+    ego_rows = np.flatnonzero(is_ego)
+    n_ego = len(ego_rows)
+    if not n_ego:
+        empty = np.zeros(0)
+        return ego_rows, empty.astype(np.int64), empty, empty
+    # Les lignes d'une frame sont consécutives ; numéroter ces blocs reste correct quand plusieurs
+    # simulations sont ajoutées au même fichier (les numéros de frame repartent alors en arrière)
+    block = np.concatenate(([0], np.cumsum(frames[1:] != frames[:-1])))
+    group = np.minimum(np.searchsorted(block[ego_rows], block), n_ego - 1)
+    ego_of_row = ego_rows[group]
+    same_frame = block[ego_of_row] == block
+
+    distances = np.linalg.norm(positions - positions[ego_of_row], axis=1)
+    alignment = np.einsum('ij,ij->i', forwards, forwards[ego_of_row])
+    candidates = same_frame & ~is_ego & (distances > 0) & (distances < max_distance) & (alignment > min_alignment)
+    candidate_distances = np.where(candidates, distances, np.inf)
+
+    # Le plus proche par frame : tri par (frame ego, distance) puis première ligne de chaque groupe
+    order = np.lexsort((candidate_distances, group))
+    groups, first = np.unique(group[order], return_index=True)
+    closest = np.full(n_ego, -1, dtype=np.int64)
+    closest[groups] = order[first]
+
+    found = np.zeros(n_ego, dtype=bool)
+    found[groups] = np.isfinite(candidate_distances[order[first]])
+    lead = np.where(found, closest, 0)
+    lead_id = np.where(found, ids[lead], -1)
+    distance = np.where(found, distances[lead], np.inf)
+    lead_speed = np.where(found, speeds[lead], 0.0)
+    return ego_rows, lead_id, distance, lead_speed
+
+
+def load_weather(path):
+    """Relit tout meteo_data (quelques lignes par minute simulée) en un dict de colonnes"""
+    chunks = list(read_sensor_log(path))
+    if not chunks:
+        return None
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def weather_at(weather, timestamps):
+    """Dernier relevé météo avant chaque horodatage (le premier relevé avant le début du fichier)"""
+    rows = np.maximum(np.searchsorted(weather['timestamp'], timestamps, side='right') - 1, 0)
+    return {name: values[rows] for name, values in weather.items()}
+
+
+def compute_metrics(chunk, model=None, max_distance=20.0, min_alignment=0.5, weather=None):
+    """Métriques du véhicule ego pour toutes les frames d'un morceau d'acteurs_data.
+
+    `weather` : colonnes de meteo_data (voir load_weather), associées à chaque
+    frame par horodatage, pour les modèles de freinage qui dépendent de la météo.
+    """
+    positions = np.column_stack((chunk['x'], chunk['y'], chunk['z'])).astype(np.float64)
+    forwards = np.column_stack((chunk['forward_x'], chunk['forward_y'])).astype(np.float64)
+    velocities = np.column_stack((chunk['vx'], chunk['vy'], chunk['vz'])).astype(np.float64)
+    speeds = 3.6 * np.linalg.norm(velocities, axis=1)
+    is_ego = chunk['is_ego'] > 0.5
+
+    ego_rows, lead_id, distance, lead_speed = lead_vehicles(
+        chunk['frame'], chunk['actor_id'].astype(np.int64), positions, forwards, speeds, is_ego,
+        max_distance, min_alignment)
+    ego_speed = speeds[ego_rows]
+    if weather is not None:
+        weather = weather_at(weather, chunk['timestamp'][ego_rows])
+    metrics = {
+        'frame': chunk['frame'][ego_rows],
+        'sim_time': chunk['sim_time'][ego_rows],
+        'speed': ego_speed,
+        'lead_id': lead_id,
+        'distance': distance,
+        'lead_speed': lead_speed,
+    }
+    metrics.update(safety_metrics(ego_speed, distance, lead_speed, weather, model))
+    return metrics
+
+
+def replay(run_dir, output_dir=None, log_format='csv', chunk_rows=100000, model=None, **parameters):
+    """Recalcule metrics_data pour un dossier de simulation ; renvoie (frames, secondes simulées, durée)"""
+    actors_path = find_log(run_dir, 'acteurs')
+    if actors_path is None:
+        raise FileNotFoundError(f"Aucun enregistrement acteurs_data dans {run_dir}")
+    meteo_path = find_log(run_dir, 'meteo')
+    weather = load_weather(meteo_path) if meteo_path is not None else None
+    output_dir = output_dir or os.path.join(run_dir, 'rejeu')
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, default_log_path('metrics', log_format))
+    # Les enregistreurs ajoutent à la fin du fichier ou du répertoire (npz, archive) : repartir de zéro
+    if os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+    elif os.path.exists(output_path):
+        os.remove(output_path)
+
+    start = time.perf_counter()
+    n_frames = 0
+    first_time = last_time = None
+    with open_sensor_log('metrics', log_format, path=output_path) as writer:
+        for chunk in iter_frame_chunks(actors_path, chunk_rows):
+            metrics = compute_metrics(chunk, model, weather=weather, **parameters)
+            if not len(metrics['frame']):
+                continue
+            values = np.column_stack([metrics[name] for name in SENSOR_COLUMNS['metrics']]).astype(np.float32)
+            # Une écriture par frame pour garder le numéro de frame de chaque ligne
+            for frame, sim_time, row in zip(metrics['frame'].tolist(), metrics['sim_time'].tolist(), values):
+                writer.write(row[np.newaxis], frame, sim_time=sim_time)
+            n_frames += len(values)
+            first_time = metrics['sim_time'][0] if first_time is None else first_time
+            last_time = metrics['sim_time'][-1]
+    elapsed = time.perf_counter() - start
+    sim_seconds = float(last_time - first_time) if n_frames else 0.0
+    print(f"🔁 {n_frames} frames rejouées ({sim_seconds:.1f} s simulées) en {elapsed:.2f} s "
+          f"(x{sim_seconds / elapsed if elapsed > 0 else float('inf'):.0f} temps réel) — {output_path}")
+    return n_frames, sim_seconds, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcule les métriques de conduite à partir des enregistrements")
+    parser.add_argument("runs", nargs="+", help="Dossier(s) de simulation contenant acteurs_data")
+    parser.add_argument("--braking-model", default="constant", choices=list(BRAKING_MODELS),
+                        help="Modèle de freinage (meteo : adhérence et temps de réaction selon meteo_data)")
+    parser.add_argument("--reaction-time", type=float, default=1.0, help="Temps de réaction (s)")
+    parser.add_argument("--deceleration", type=float, default=6.0, help="Décélération de freinage sur route sèche (m/s²)")
+    parser.add_argument("--max-distance", type=float, default=20.0, help="Portée de détection du véhicule devant (m)")
+    parser.add_argument("--min-alignment", type=float, default=0.5, help="Produit scalaire minimal des directions")
+    parser.add_argument("--output", default=None, help="Dossier de sortie (par défaut <dossier>/rejeu)")
+    parser.add_argument("--format", default="csv", choices=["csv", "npz", "parquet", "archive"])
+    args = parser.parse_args()
+
+    model = make_braking_model(args.braking_model, reaction_time=args.reaction_time, deceleration=args.deceleration)
+    failed = 0
+    for run_dir in args.runs:
+        output_dir = os.path.join(args.output, os.path.basename(os.path.normpath(run_dir))) if args.output else None
+        try:
+            replay(run_dir, output_dir, args.format, model=model, max_distance=args.max_distance,
+                   min_alignment=args.min_alignment)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            failed += 1
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,201 @@
+# Scénarios décrits par un fichier JSON ou YAML plutôt que par les arguments positionnels de code_final.py.
+#
+# Un fichier contient un scénario (objet), une liste de scénarios, ou {"defaults": {...}, "scenarios": [...]}.
+# Tous les scénarios d'un fichier sont exécutés les uns après les autres dans ce processus : carla
+# et pygame ne sont importés qu'une fois et la ville n'est rechargée que si elle change.
+#
+#   {"town_name": "Town03", "vehicle_model": "vehicle.tesla.model3", "pluie": 80, "brouillard": 50,
+#    "spawn_index": 5, "options": {"headless": true, "duration": 60}}
+#
+#   python scenario.py scenarios.json --output campagne
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+# Valeurs météo dans l'ordre des arguments positionnels de code_final.py
+WEATHER_FIELDS = ("nuages", "pluie", "flaques", "vent", "brouillard", "distance_brouillard", "soleil")
+
+
+@dataclass
+class ScenarioSpec:
+    """Un scénario : ville, véhicule, météo (%, m et degrés comme les curseurs de l'interface),
+    point d'apparition et options de code_final.py ({"headless": True, "duration": 60, ...})"""
+
+    town_name: str = "Town03"
+    vehicle_model: str = "vehicle.tesla.model3"
+    nuages: float = 0.0
+    pluie: float = 0.0
+    flaques: float = 0.0
+    vent: float = 0.0
+    brouillard: float = 0.0
+    distance_brouillard: float = 100.0
+    soleil: float = 60.0
+    spawn_index: int = 0
+    options: dict = field(default_factory=dict)
+    name: str = None
+
+    def __post_init__(self):
+        for name in WEATHER_FIELDS:
+            setattr(self, name, float(getattr(self, name)))
+        self.spawn_index = int(self.spawn_index)
+        self.options = dict(self.options or {})
+
+    @classmethod
+    def from_dict(cls, data):
+        """Scénario depuis un dict (fichier JSON/YAML) ; une clé inconnue lève ValueError"""
+        known = {f.name for f in dataclasses.fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Clés de scénario inconnues : {', '.join(sorted(unknown))} "
+                             f"(attendues : {', '.join(sorted(known))})")
+        return cls(**data)
+
+    @classmethod
+    def from_argv(cls, argv):
+        """Scénario depuis les arguments historiques de code_final.py (ville, véhicule, 7 valeurs météo,
+        spawn index, puis options --cle=valeur)"""
+        # Ville choisie via interface
+        if len(argv) >= 2:
+            town_name = argv[1]  # Ville sélectionnée envoyée par l'interface
+        else:
+            print("⚠️ Aucune ville spécifiée, utilisation par défaut: Town03")
+            town_name = "Town03"
+
+        # Vérification de l'argument (Blueprint_ID)
+        if len(argv) < 3:
+            print("⚠️ Aucun véhicule spécifié, utilisation du modèle par défaut: Tesla Model 3")
+            vehicle_model = "vehicle.tesla.model3"
+        else:
+            vehicle_model = argv[2]
+
+        if len(argv) < 11:
+            raise ValueError("⚠️ Nombre d'arguments insuffisant, vérifiez l'appel depuis interface.py")
+
+        # ✅ Options facultatives après les arguments positionnels, sous la forme --cle=valeur
+        options = {}
+        for arg in argv[11:]:
+            if arg.startswith("--"):
+                key, separator, value = arg[2:].partition("=")
+                options[key] = value if separator else True
+        return cls(town_name, vehicle_model, *argv[3:10], spawn_index=argv[10], options=options)
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
+
+    def scenario(self):
+        """Paramètres attendus par code_final.run_simulation"""
+        data = self.to_dict()
+        del data["options"], data["name"]
+        return data
+
+    def string_options(self):
+        """Options au format de code_final.py : drapeaux vides, valeurs en texte, False/None omis"""
+        return {key: "" if value is True else str(value)
+                for key, value in self.options.items() if value is not None and value is not False}
+
+    def to_argv(self, script="code_final.py"):
+        """Arguments historiques de code_final.py (pour un sous-processus ou faux_carla.py)"""
+        options = [f"--{key}" if value is True else f"--{key}={value}"
+                   for key, value in self.options.items() if value is not None and value is not False]
+        return ([script, self.town_name, self.vehicle_model] + [f"{getattr(self, name):g}" for name in WEATHER_FIELDS]
+                + [str(self.spawn_index)] + options)
+
+    def with_options(self, **options):
+        """Copie du scénario avec des options ajoutées ou remplacées"""
+        return dataclasses.replace(self, options={**self.options, **options})
+
+
+def load_scenarios(path):
+    """Liste de ScenarioSpec depuis un fichier .json, .yaml ou .yml"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Les scénarios YAML nécessitent PyYAML : pip install pyyaml")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    defaults = {}
+    if isinstance(data, dict) and "scenarios" in data:
+        defaults = data.get("defaults", {})
+        data = data["scenarios"]
+    if isinstance(data, dict):
+        data = [data]
+    specs = []
+    for entry in data:
+        merged = {**defaults, **entry}
+        merged["options"] = {**defaults.get("options", {}), **entry.get("options", {})}
+        specs.append(ScenarioSpec.from_dict(merged))
+    return specs
+
+
+def save_scenarios(specs, path):
+    """Écrit une liste de scénarios en JSON (relisible par load_scenarios)"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([spec.to_dict() for spec in specs], f, indent=2, ensure_ascii=False)
+
+
+_default_worker = None
+
+
+def run_scenario(spec, worker=None):
+    """Exécute un scénario dans ce processus ; renvoie le statut et les durées de serveur_simulation.
+
+    Sans `worker`, un SimulationWorker partagé garde le client CARLA et la
+    ville chargée d'un appel à l'autre.
+    """
+    global _default_worker
+    if worker is None:
+        if _default_worker is None:
+            from serveur_simulation import SimulationWorker
+            _default_worker = SimulationWorker()
+        worker = _default_worker
+    return worker.run_scenario(spec)
+
+
+def run_batch(specs, output_dir=None, worker=None):
+    """Exécute des scénarios les uns après les autres ; un échec n'arrête pas les suivants.
+
+    Avec `output_dir`, chaque scénario écrit dans <output_dir>/<nom ou numéro>.
+    """
+    results = []
+    for i, spec in enumerate(specs):
+        if output_dir is not None:
+            spec = spec.with_options(output=os.path.join(output_dir, spec.name or f"scenario_{i:03d}"))
+        label = spec.name or f"{spec.town_name} / {spec.vehicle_model} / spawn {spec.spawn_index}"
+        print(f"🎬 Scénario {i + 1}/{len(specs)} : {label}")
+        start = time.perf_counter()
+        try:
+            result = run_scenario(spec, worker)
+        except Exception as e:
+            print(f"❌ Scénario en échec : {e}")
+            result = {"status": "error", "error": str(e)}
+        result.setdefault("run_seconds", time.perf_counter() - start)
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exécute des scénarios décrits en JSON ou YAML, dans un seul processus")
+    parser.add_argument("files", nargs="+", help="Fichiers de scénarios (.json, .yaml, .yml)")
+    parser.add_argument("--output", default=None, help="Dossier racine des données (un sous-dossier par scénario)")
+    parser.add_argument("--fake", action="store_true", help="Utilise faux_carla.py au lieu de CARLA")
+    args = parser.parse_args()
+
+    specs = [spec for path in args.files for spec in load_scenarios(path)]
+    worker = None
+    if args.fake:
+        from serveur_simulation import SimulationWorker
+        worker = SimulationWorker(fake=True)
+    results = run_batch(specs, args.output, worker)
+    failed = sum(result["status"] != "ok" for result in results)
+    setup = [result["setup_seconds"] for result in results if "setup_seconds" in result]
+    print(f"🏁 {len(results) - failed}/{len(results)} scénarios réussis"
+          + (f", mise en place moyenne {sum(setup) / len(setup):.2f} s" if setup else ""))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,227 @@
+# Worker de simulation persistant : garde le client CARLA et la ville chargée entre deux simulations.
+#
+# Le worker écoute sur une socket locale et reçoit un scénario ({"scenario": {...}}, voir scenario.py)
+# ou les mêmes arguments que `code_final.py` ({"argv": [...]}). carla et pygame ne sont importés qu'une fois, le CSV des
+# véhicules n'est relu que s'il a changé et `client.load_world()` n'est rappelé que si la ville change ;
+# seuls la météo, le véhicule, la circulation et les capteurs sont remis en place à chaque
+# simulation. La réponse donne le temps de mise en place de la simulation.
+#
+# Les messages sont des objets pickle : seul un client qui connaît la clé du worker peut se connecter.
+# La clé est tirée au hasard au premier lancement et gardée dans ~/.serveur_simulation.key, lisible
+# seulement par l'utilisateur (mode 0600), où les clients la relisent.
+#
+#   python serveur_simulation.py serve                       # à lancer une fois, CARLA démarré
+#   python serveur_simulation.py run Town03 vehicle.tesla.model3 10 0 0 5 0 100 60 0 --headless --duration=60
+import argparse
+import os
+import secrets
+import stat
+import sys
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from scenario import ScenarioSpec
+
+DEFAULT_ADDRESS = ("localhost", 6100)
+# Clé d'authentification du worker, propre à l'utilisateur (jamais dans le code source)
+AUTHKEY_PATH = os.path.join(os.path.expanduser("~"), ".serveur_simulation.key")
+
+
+def load_authkey(path=AUTHKEY_PATH, create=False):
+    """Clé du worker lue dans `path` ; avec `create`, une clé aléatoire y est écrite si le fichier n'existe pas.
+
+    FileNotFoundError si la clé n'existe pas encore (worker jamais lancé),
+    PermissionError si le fichier est lisible par d'autres utilisateurs.
+    """
+    if create:
+        try:
+            # O_EXCL : deux workers lancés en même temps ne s'écrasent pas la clé
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            print(f"🔑 Clé du worker créée dans {path}")
+
+    if os.name == "posix":
+        info = os.stat(path)
+        if info.st_uid != os.getuid() or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            raise PermissionError(f"La clé {path} doit appartenir à l'utilisateur et n'être lisible que par lui "
+                                  f"(chmod 600 {path})")
+    with open(path, encoding="ascii") as f:
+        key = f.read().strip()
+    if not key:
+        raise PermissionError(f"La clé {path} est vide : supprimez le fichier et relancez le worker")
+    return key.encode("ascii")
+
+
+def parse_address(text):
+    """'hote:port' -> (hote, port)"""
+    host, _, port = text.rpartition(":")
+    return host or "localhost", int(port)
+
+
+class SimulationWorker:
+    """Exécute les simulations les unes après les autres en réutilisant le monde déjà chargé"""
+
+    def __init__(self, fake=False):
+        self.fake = fake
+        self.runs = 0
+        self._servers = {}  # (hôte, port) -> [client, world, ville chargée]
+        if fake:
+            import faux_carla
+            self._module = faux_carla
+        else:
+            import code_final
+            self._module = code_final
+
+    def run(self, argv):
+        """Lance une simulation décrite par les arguments de code_final.py"""
+        return self.run_scenario(ScenarioSpec.from_argv(argv))
+
+    def run_scenario(self, spec):
+        """Lance une simulation (scenario.ScenarioSpec) ; renvoie un dictionnaire de statut et de durées"""
+        start = time.perf_counter()
+        self.runs += 1
+        if self.fake:
+            returncode = self._module.main(spec.to_argv())
+            return {"status": "ok" if returncode == 0 else "error", "world_reloaded": False,
+                    "load_seconds": 0.0, "setup_seconds": time.perf_counter() - start,
+                    "run_seconds": time.perf_counter() - start}
+
+        code_final = self._module
+        scenario, options = spec.scenario(), spec.string_options()
+        key = (options.get("host", "localhost"), int(options.get("port", 2000)))
+        state = self._servers.get(key)
+        if state is None:
+            state = self._servers[key] = [code_final.connect(options), None, None]
+        client, world, current_town = state
+
+        world, reloaded = code_final.load_town(client, scenario["town_name"], current_town)
+        state[1], state[2] = world, scenario["town_name"]
+        load_seconds = time.perf_counter() - start
+        print(f"🌍 {scenario['town_name']} {'chargée' if reloaded else 'déjà chargée'} en {load_seconds:.2f} s")
+
+        try:
+            result = code_final.run_simulation(client, world, scenario, options)
+        except Exception:
+            # État du serveur inconnu : la ville sera rechargée à la prochaine simulation
+            del self._servers[key]
+            raise
+        finally:
+            if "headless" not in options and "pygame" in vars(code_final):
+                code_final.pygame.display.quit()
+
+        return {"status": "ok", "world_reloaded": reloaded, "load_seconds": load_seconds,
+                "setup_seconds": load_seconds + (result["setup_seconds"] or 0.0),
+                "sim_seconds": result["sim_seconds"], "run_seconds": time.perf_counter() - start}
+
+    def serve(self, address=DEFAULT_ADDRESS, authkey=None):
+        """Traite les demandes jusqu'à recevoir {"command": "stop"} (clé de AUTHKEY_PATH par défaut)"""
+        if authkey is None:
+            authkey = load_authkey(create=True)
+        with Listener(address, authkey=authkey) as listener:
+            print(f"🛰️ Worker de simulation en attente sur {address[0]}:{address[1]}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError) as e:
+                    print(f"⚠️ Connexion refusée : {e}")
+                    continue
+                with conn:
+                    try:
+                        request = conn.recv()
+                    except EOFError:
+                        continue
+                    if request.get("command") == "stop":
+                        conn.send({"status": "stopped", "runs": self.runs})
+                        print("🛑 Arrêt du worker de simulation")
+                        return
+                    try:
+                        if "scenario" in request:
+                            reply = self.run_scenario(ScenarioSpec.from_dict(request["scenario"]))
+                        else:
+                            reply = self.run(request["argv"])
+                    except Exception as e:
+                        print(f"❌ Simulation en échec : {e}")
+                        reply = {"status": "error", "error": str(e)}
+                    if "setup_seconds" in reply:
+                        print(f"⚙️ Simulation {self.runs} : mise en place en {reply['setup_seconds']:.2f} s "
+                              f"(ville {'rechargée' if reply['world_reloaded'] else 'réutilisée'})")
+                    try:
+                        conn.send(reply)
+                    except OSError:
+                        pass  # Le client n'attend plus la réponse
+
+
+def connect_worker(address=DEFAULT_ADDRESS, authkey=None):
+    """Connexion au worker (clé de AUTHKEY_PATH par défaut) ; lève ConnectionRefusedError s'il n'est pas lancé,
+    FileNotFoundError s'il n'a jamais été lancé et PermissionError si la clé est refusée"""
+    if authkey is None:
+        authkey = load_authkey()
+    try:
+        return Client(address, authkey=authkey)
+    except AuthenticationError as e:
+        raise PermissionError(f"Clé refusée par le worker {address[0]}:{address[1]} : {e}")
+
+
+def request_simulation(argv, address=DEFAULT_ADDRESS, authkey=None, conn=None):
+    """Envoie une simulation au worker et attend sa réponse"""
+    conn = conn if conn is not None else connect_worker(address, authkey)
+    with conn:
+        conn.send({"argv": list(argv)})
+        return conn.recv()
+
+
+def request_scenario(spec, address=DEFAULT_ADDRESS, authkey=None, conn=None):
+    """Envoie un scenario.ScenarioSpec au worker et attend sa réponse"""
+    conn = conn if conn is not None else connect_worker(address, authkey)
+    with conn:
+        conn.send({"scenario": spec.to_dict()})
+        return conn.recv()
+
+
+def stop_worker(address=DEFAULT_ADDRESS, authkey=None):
+    with connect_worker(address, authkey) as conn:
+        conn.send({"command": "stop"})
+        return conn.recv()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker de simulation CARLA persistant")
+    parser.add_argument("--address", default="{}:{}".format(*DEFAULT_ADDRESS), help="hote:port de la socket locale")
+    parser.add_argument("--key-file", default=AUTHKEY_PATH, help="Fichier de la clé du worker (créé par serve)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Lance le worker")
+    serve_parser.add_argument("--fake", action="store_true", help="Utilise faux_carla.py au lieu de CARLA")
+
+    run_parser = subparsers.add_parser("run", help="Envoie une simulation au worker (mêmes arguments que code_final.py)")
+    run_parser.add_argument("argv", nargs=argparse.REMAINDER)
+
+    subparsers.add_parser("stop", help="Arrête le worker")
+    args = parser.parse_args()
+    address = parse_address(args.address)
+    key_file = os.path.abspath(args.key_file)
+
+    try:
+        authkey = load_authkey(key_file, create=args.command == "serve")
+    except FileNotFoundError:
+        print(f"❌ Clé {key_file} introuvable : lancez d'abord `python serveur_simulation.py serve`")
+        sys.exit(1)
+    except PermissionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.command == "serve":
+        # Les chemins relatifs (CSV des véhicules, données) sont ceux du dépôt, comme pour code_final.py
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        SimulationWorker(fake=args.fake).serve(address, authkey)
+    elif args.command == "run":
+        reply = request_simulation(["code_final.py"] + args.argv, address, authkey)
+        print(reply)
+        sys.exit(0 if reply["status"] == "ok" else 1)
+    else:
+        print(stop_worker(address, authkey))
@@ -0,0 +1,92 @@
+import threading
+import time
+
+
+class FrameBarrier:
+    """Attend que chaque capteur ait livré ses données pour une frame donnée"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._last_frame = {}
+        self.timeouts = 0
+
+    def expect(self, sensor):
+        """Déclare un capteur à attendre à chaque frame"""
+        with self._cond:
+            self._last_frame.setdefault(sensor, -1)
+
+    def arrived(self, sensor, frame):
+        """Signale que les données `frame` du capteur ont été traitées"""
+        with self._cond:
+            if frame > self._last_frame.get(sensor, -1):
+                self._last_frame[sensor] = frame
+                self._cond.notify_all()
+
+    def wait(self, frame, timeout=2.0):
+        """Bloque jusqu'à ce que tous les capteurs aient atteint `frame` ; renvoie les capteurs manquants"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                missing = [sensor for sensor, last in self._last_frame.items() if last < frame]
+                remaining = deadline - time.monotonic()
+                if not missing or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        if missing:
+            self.timeouts += 1
+        return missing
+
+
+class SynchronousRunner:
+    """Fait avancer CARLA en mode synchrone, à pas de temps fixe.
+
+    C'est le script qui appelle `world.tick()` : le serveur ne calcule la
+    frame suivante qu'une fois toutes les données capteurs de la frame
+    courante reçues, ce qui rend les enregistrements alignables par numéro
+    de frame et les exécutions reproductibles.
+    """
+
+    def __init__(self, world, traffic_manager=None, delta_seconds=0.05, sensor_timeout=2.0, barrier=None,
+                 no_rendering=False):
+        self.world = world
+        self.traffic_manager = traffic_manager
+        self.delta_seconds = delta_seconds
+        self.sensor_timeout = sensor_timeout
+        self.no_rendering = no_rendering
+        self.barrier = barrier if barrier is not None else FrameBarrier()
+        self.frame = None
+        self.ticks = 0
+        self._original_settings = None
+
+    def start(self):
+        """Active le mode synchrone (les réglages d'origine sont restaurés par `stop()`)"""
+        self._original_settings = self.world.get_settings()
+        settings = self.world.get_settings()
+        settings.synchronous_mode = True
+        settings.fixed_delta_seconds = self.delta_seconds
+        if self.no_rendering:
+            settings.no_rendering_mode = True
+        self.world.apply_settings(settings)
+        if self.traffic_manager is not None:
+            self.traffic_manager.set_synchronous_mode(True)
+        print(f"⏱️ Mode synchrone activé : pas fixe de {self.delta_seconds} s"
+              f"{', rendu serveur désactivé' if self.no_rendering else ''}")
+
+    def tick(self):
+        """Avance d'une frame et attend les capteurs ; renvoie le snapshot de la frame"""
+        self.frame = self.world.tick()
+        self.ticks += 1
+        missing = self.barrier.wait(self.frame, self.sensor_timeout)
+        if missing:
+            print(f"⚠️ Frame {self.frame} : données manquantes pour {', '.join(missing)}")
+        return self.world.get_snapshot()
+
+    def stop(self):
+        if self._original_settings is None:
+            return
+        if self.traffic_manager is not None:
+            self.traffic_manager.set_synchronous_mode(False)
+        self.world.apply_settings(self._original_settings)
+        self._original_settings = None
+        print(f"⏱️ Mode synchrone désactivé après {self.ticks} frames "
+              f"({self.barrier.timeouts} attentes capteurs expirées)")
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+def weather_row(weather):
+    """Colonnes météo de meteo_data (sans la vitesse), dans l'ordre de SENSOR_COLUMNS['meteo']"""
+    # ✅ fog_distance est converti comme à l'affichage : (1 - valeur) * 100, jamais négatif
+    if weather.fog_distance is not None:
+        recorded_fog_distance = max(0, (1.0 - weather.fog_distance) * 100)
+    else:
+        recorded_fog_distance = 0
+    values = [
+        weather.cloudiness,
+        weather.precipitation,
+        weather.precipitation_deposits,
+        weather.wind_intensity,
+        weather.sun_azimuth_angle,
+        weather.sun_altitude_angle,
+        weather.fog_density,
+    ]
+    return [value if value is not None else 0 for value in values] + [recorded_fog_distance]
+
+
+class WeatherSampler:
+    """Échantillonne la météo et la vitesse du véhicule à intervalle fixe de temps simulé.
+
+    La dernière météo connue est gardée en cache : `world.get_weather()`
+    n'est rappelé qu'après un changement signalé par `set_weather()` ou
+    `invalidate()`. La vitesse vient du snapshot de la frame, et les lignes
+    partent dans un enregistreur déjà ouvert (écriture en arrière-plan).
+    """
+
+    def __init__(self, world, writer, period=2.0, weather=None):
+        self.world = world
+        self.writer = writer
+        self.period = period
+        self.samples = 0
+        self.queries = 0
+        self._weather = None
+        self._row = None
+        self._last_time = float('-inf')
+        if weather is not None:
+            self._cache(weather)
+
+    def _cache(self, weather):
+        self._weather = weather
+        self._row = weather_row(weather)
+
+    def set_weather(self, weather):
+        """Applique une nouvelle météo ; elle sera relue une fois au prochain accès"""
+        self.world.set_weather(weather)
+        self.invalidate()
+
+    def invalidate(self):
+        self._weather = None
+
+    def _refresh(self):
+        if self._weather is None:
+            self.queries += 1
+            self._cache(self.world.get_weather())
+
+    @property
+    def weather(self):
+        """Dernière météo connue (une requête au serveur seulement après un changement)"""
+        self._refresh()
+        return self._weather
+
+    def sample(self, elapsed_seconds, frame, speed):
+        """Enregistre une ligne si `period` secondes simulées se sont écoulées ; renvoie True si c'est le cas"""
+        if elapsed_seconds - self._last_time < self.period:
+            return False
+        self._last_time = elapsed_seconds
+        self._refresh()
+        speed = speed if not np.isnan(speed) else 0  # Gérer le cas où la vitesse est NaN
+        self.writer.write(np.array([self._row + [speed]], dtype=np.float32), frame, sim_time=elapsed_seconds)
+        self.samples += 1
+        return True
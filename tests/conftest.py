@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Les modules du projet sont à la racine du dépôt, sans paquet
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from archive import SensorArchive
+from enregistrement import open_sensor_log, read_sensor_log
+
+
+def test_frame_vide_indexee(tmp_path):
+    path = str(tmp_path / 'radar_data_archive')
+    with open_sensor_log('radar', 'archive', path=path) as writer:
+        for frame in range(5):
+            n_rows = 0 if frame in (2, 4) else 3
+            writer.write(np.full((n_rows, 4), frame, dtype=np.float32), frame, sim_time=frame * 0.05)
+
+    archive = SensorArchive(path)
+    assert len(archive) == 5
+    assert archive.n_rows == 9
+    assert archive.frame(2).shape == (0, 4)
+    assert archive.frame(4).shape == (0, 4)
+    assert (archive.frame(3) == 3).all()
+    with pytest.raises(KeyError):
+        archive.frame(5)
+    rows, entries = archive.window(0.0, 0.2)
+    assert list(entries['frame']) == [0, 1, 2, 3]
+    assert [len(view) for view in archive.split(rows, entries)] == [3, 3, 0, 3]
+    assert sum(len(chunk['frame']) for chunk in read_sensor_log(path)) == 9
+
+
+def test_frame_vide_ignoree_en_csv(tmp_path):
+    path = str(tmp_path / 'radar_data.csv')
+    with open_sensor_log('radar', 'csv', path=path) as writer:
+        writer.write(np.zeros((0, 4), dtype=np.float32), 0)
+        writer.write(np.ones((2, 4), dtype=np.float32), 1)
+    assert list(next(read_sensor_log(path))['frame']) == [1, 1]
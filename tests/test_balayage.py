@@ -0,0 +1,24 @@
+import os
+
+from balayage import expand_grid, run_sweep
+FAKE_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "faux_carla.py")
+
+
+def test_combinaison_invalide_en_echec(tmp_path):
+    grid = {"town": ["Town03"], "vehicle": ["vehicle.tesla.model3"], "weather": ["beau_temps", "inconnu"],
+            "spawn": [0]}
+    manifest = run_sweep(expand_grid(grid), [("localhost", 2000, 8000)], str(tmp_path), retries=0,
+                         script=FAKE_SCRIPT, extra_args=["--sim-seconds=0"], timeout=30, poll_interval=0.2)
+
+    runs = manifest["runs"]
+    assert runs["Town03_vehicle.tesla.model3_beau_temps_s0"]["status"] == "ok"
+    invalid = runs["Town03_vehicle.tesla.model3_inconnu_s0"]
+    assert invalid["status"] == "failed"
+    assert "inconnu" in invalid["error"]
+    assert invalid["attempts"] == []
+
+
+def test_toutes_invalides_sans_worker(tmp_path):
+    grid = {"town": ["Town03"], "vehicle": ["vehicle.tesla.model3"], "weather": [[1, 2, 3]], "spawn": [0]}
+    manifest = run_sweep(expand_grid(grid), [("localhost", 2000, 8000)], str(tmp_path), script=FAKE_SCRIPT)
+    assert [entry["status"] for entry in manifest["runs"].values()] == ["failed"]
@@ -0,0 +1,34 @@
+import asyncio
+
+from client_async import AsyncWorld
+from faux_carla import FakeWorld
+
+
+def test_un_snapshot_par_tick():
+    world = FakeWorld(n_vehicles=5)
+
+    async def run(n_ticks):
+        async_world = AsyncWorld(world, tick=world.wait_for_tick)
+        frames = []
+        try:
+            for _ in range(n_ticks):
+                snapshot = await async_world.next_snapshot()
+                # Toutes les questions de la frame sont servies par le même snapshot
+                answers = await asyncio.gather(*(query(actor_id) for actor_id in world.actors
+                                                 for query in (async_world.get_location, async_world.get_forward,
+                                                               async_world.get_velocity, async_world.get_speed)))
+                assert len(answers) == 4 * len(world.actors)
+                assert await async_world.snapshot() is snapshot
+                frames.append(snapshot.frame)
+            # Deux coroutines qui attendent la frame suivante partagent le même tick
+            first, second = await asyncio.gather(async_world.next_snapshot(), async_world.next_snapshot())
+            assert first is second
+            frames.append(first.frame)
+        finally:
+            async_world.close()
+        return frames, async_world.snapshots
+
+    frames, snapshots = asyncio.run(run(10))
+    assert frames == list(range(1, 12))
+    assert snapshots == 11
+    assert world.calls['tick'] == world.calls['get_snapshot'] == 11
@@ -0,0 +1,104 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from detection_vehicules import VehicleRegistry, find_lead_vehicle, take_vehicle_snapshot
+from faux_carla import FakeWorld
+
+
+def legacy_detect_vehicle_ahead(world, ego_id):
+    """Ancien `detect_vehicle_ahead` de code_final.py : une requête par acteur, (id, distance, vitesse, TTC)"""
+    ego = world.actors[ego_id]
+
+    def speed_kmh(actor):
+        velocity = actor.get_velocity()
+        return 3.6 * np.linalg.norm([velocity.x, velocity.y, velocity.z])
+
+    def forward(actor):
+        rotation = actor.get_transform().rotation
+        pitch, yaw = math.radians(rotation.pitch), math.radians(rotation.yaw)
+        return math.cos(pitch) * math.cos(yaw), math.cos(pitch) * math.sin(yaw)
+
+    my_speed = speed_kmh(ego)
+    min_distance = float('inf')
+    found = None
+    found_speed = None
+    ttc = float('inf')
+    for other in world.get_actors().filter('vehicle.*'):
+        if other.id == ego_id:
+            continue
+        a, b = ego.get_transform().location, other.get_transform().location
+        distance = math.sqrt((a.x - b.x) ** 2 + (a.y - b.y) ** 2 + (a.z - b.z) ** 2)
+        if 0 < distance < 20:
+            my_forward, other_forward = forward(ego), forward(other)
+            if my_forward[0] * other_forward[0] + my_forward[1] * other_forward[1] > 0.5:
+                if distance < min_distance:
+                    min_distance = distance
+                    found = other
+                    found_speed = speed_kmh(other)
+                    relative_speed = (my_speed - found_speed) / 3.6
+                    ttc = distance / relative_speed if relative_speed > 0 else float('inf')
+    if found is None:
+        return None
+    return found.id, min_distance, found_speed, ttc
+
+
+def random_scene(seed, n_vehicles=12):
+    """Faux monde aux positions, caps et vitesses tirés au hasard autour de l'ego (acteur 1)"""
+    rng = random.Random(seed)
+    world = FakeWorld(n_vehicles=n_vehicles, seed=seed)
+    for actor in world.actors.values():
+        actor.x, actor.y = rng.uniform(-25, 25), rng.uniform(-25, 25)
+        actor.yaw = rng.choice([0.0, 90.0, 180.0, rng.uniform(-180, 180)])
+        actor.speed = rng.uniform(0, 20)
+    return world
+
+
+def assert_same(world, ego_id=1):
+    expected = legacy_detect_vehicle_ahead(world, ego_id)
+    lead = find_lead_vehicle(take_vehicle_snapshot(world, VehicleRegistry(world)), ego_id)
+    if expected is None:
+        assert lead is None
+        return None
+    assert lead is not None
+    assert lead.actor_id == expected[0]
+    assert lead.distance == pytest.approx(expected[1], rel=1e-12)
+    assert lead.speed == pytest.approx(expected[2], rel=1e-12)
+    assert lead.ttc == pytest.approx(expected[3], rel=1e-12)
+    return lead
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_meme_resultat_que_l_ancienne_boucle(seed):
+    assert_same(random_scene(seed))
+
+
+def test_aucun_vehicule_devant():
+    world = FakeWorld(n_vehicles=3)
+    world.actors[2].x, world.actors[2].y = 0.0, 50.0   # trop loin
+    world.actors[3].x, world.actors[3].yaw = 10.0, 180.0  # sens inverse
+    world.actors[1].x, world.actors[1].y, world.actors[1].yaw = 0.0, 0.0, 0.0
+    assert legacy_detect_vehicle_ahead(world, 1) is None
+    assert assert_same(world) is None
+
+
+def test_vehicule_devant_plus_rapide():
+    world = FakeWorld(n_vehicles=2)
+    ego, lead = world.actors[1], world.actors[2]
+    ego.x, ego.y, ego.yaw, ego.speed = 0.0, 0.0, 0.0, 10.0
+    lead.x, lead.y, lead.yaw, lead.speed = 12.0, 0.0, 0.0, 15.0
+    result = assert_same(world)
+    assert result.actor_id == 2
+    assert result.distance == pytest.approx(12.0)
+    assert result.ttc == float('inf')
+
+
+def test_vehicule_devant_plus_lent():
+    world = FakeWorld(n_vehicles=2)
+    ego, lead = world.actors[1], world.actors[2]
+    ego.x, ego.y, ego.yaw, ego.speed = 0.0, 0.0, 0.0, 15.0
+    lead.x, lead.y, lead.yaw, lead.speed = 10.0, 0.0, 0.0, 10.0
+    result = assert_same(world)
+    assert result.ttc == pytest.approx(10.0 / 5.0)
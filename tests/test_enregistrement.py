@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from enregistrement import SensorLogWriter, check_log_options
+
+
+class FailingBackend:
+    def __init__(self):
+        self.closed = False
+
+    def write_batch(self, items):
+        raise OSError("disque plein")
+
+    def close(self):
+        self.closed = True
+
+
+def test_erreur_du_backend_relancee():
+    backend = FailingBackend()
+    writer = SensorLogWriter(backend, flush_rows=1, flush_interval=0.01)
+    writer.write(np.zeros((2, 3), dtype=np.float32), 1)
+    writer._thread.join(timeout=5)
+    assert not writer._thread.is_alive()
+
+    # Plus rien n'est accepté une fois le backend en échec
+    with pytest.raises(OSError, match="disque plein"):
+        writer.write(np.zeros((2, 3), dtype=np.float32), 2)
+    assert writer._pending == []
+    with pytest.raises(OSError, match="disque plein"):
+        writer.close()
+    assert backend.closed
+    assert writer.rows_written == 0
+
+
+def test_options_verifiees_avant_ouverture():
+    check_log_options('csv', 'gzip')
+    check_log_options('npz', None)
+    with pytest.raises(ValueError, match='inconnu'):
+        check_log_options('hdf5')
+    with pytest.raises(ValueError, match='non supportée'):
+        check_log_options('npz', 'gzip')
+    with pytest.raises(ValueError, match='non supportée'):
+        check_log_options('archive', 'deflate')
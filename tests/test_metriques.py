@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from metriques import ConstantBraking, WeatherBraking, make_braking_model, safety_metrics
+
+SPEEDS = np.array([0.0, 10.0, 30.0, 50.0, 90.0, 130.0])  # km/h
+
+
+def carla_weather(precipitation=0.0, precipitation_deposits=0.0, fog_density=0.0):
+    """Météo au format carla.WeatherParameters (seuls les champs lus par les modèles)"""
+    return SimpleNamespace(cloudiness=30.0, precipitation=precipitation, precipitation_deposits=precipitation_deposits,
+                           wind_intensity=10.0, fog_density=fog_density, fog_distance=100.0, sun_altitude_angle=60.0)
+
+
+def test_constant_formule_historique():
+    metrics = safety_metrics(SPEEDS, np.inf, 0.0, model=ConstantBraking())
+    expected = SPEEDS / 3.6 * 1.0 + (SPEEDS / 3.6) ** 2 / 12
+    np.testing.assert_allclose(metrics['stopping_distance'], expected, rtol=1e-12)
+    # Modèle par défaut : le même calcul
+    np.testing.assert_allclose(safety_metrics(SPEEDS, np.inf, 0.0)['stopping_distance'], expected, rtol=1e-12)
+
+
+def test_meteo_seche_egale_constant():
+    for weather in (carla_weather(), None, {}):
+        dry = safety_metrics(SPEEDS, 15.0, 20.0, weather, WeatherBraking())
+        constant = safety_metrics(SPEEDS, 15.0, 20.0, weather, ConstantBraking())
+        for name in ('reaction_time', 'deceleration', 'stopping_distance', 'ttc', 'required_deceleration'):
+            np.testing.assert_allclose(dry[name], constant[name], rtol=1e-12)
+
+
+def test_flaques_reduisent_la_deceleration():
+    model = WeatherBraking(deceleration=6.0, wet_friction_ratio=0.6)
+    reaction_time, deceleration = model.parameters(carla_weather(precipitation_deposits=100.0))
+    assert deceleration == pytest.approx(6.0 * 0.6)
+    assert reaction_time == pytest.approx(1.0)
+    # Moitié de route mouillée : moitié de la perte d'adhérence
+    assert model.parameters(carla_weather(precipitation_deposits=50.0))[1] == pytest.approx(6.0 * 0.8)
+
+
+def test_brouillard_et_pluie_allongent_la_reaction():
+    model = WeatherBraking(reaction_time=1.0, fog_reaction_penalty=0.5, rain_reaction_penalty=0.2)
+    assert model.parameters(carla_weather(fog_density=100.0))[0] == pytest.approx(1.5)
+    assert model.parameters(carla_weather(fog_density=40.0))[0] == pytest.approx(1.2)
+    reaction_time, deceleration = model.parameters(carla_weather(precipitation=100.0))
+    assert reaction_time == pytest.approx(1.2)
+    assert deceleration == pytest.approx(6.0 * (1 - 0.4 * 0.5))  # La pluie seule mouille la route à moitié
+    assert model.parameters(carla_weather(precipitation=100.0, fog_density=100.0))[0] == pytest.approx(1.7)
+
+
+def test_colonnes_meteo_data_sur_tableaux():
+    weather = {
+        'precipitation': np.array([0.0, 100.0, 0.0, 0.0, 50.0, 0.0]),
+        'precipitation_deposits': np.array([0.0, 0.0, 100.0, 0.0, 0.0, 50.0]),
+        'fog_density': np.array([0.0, 0.0, 0.0, 100.0, 0.0, 0.0]),
+    }
+    model = make_braking_model('meteo')
+    metrics = safety_metrics(SPEEDS, np.full(6, 15.0), np.zeros(6), weather, model)
+    assert metrics['stopping_distance'].shape == SPEEDS.shape
+    # Chaque vitesse avec la météo de sa frame, comme un appel scalaire
+    for i in range(len(SPEEDS)):
+        row = carla_weather(*(float(weather[name][i]) for name in
+                              ('precipitation', 'precipitation_deposits', 'fog_density')))
+        single = safety_metrics(SPEEDS[i], 15.0, 0.0, row, model)
+        for name in ('reaction_time', 'deceleration', 'stopping_distance'):
+            assert metrics[name][i] == pytest.approx(float(single[name]))
+    np.testing.assert_allclose(metrics['reaction_time'], [1.0, 1.2, 1.0, 1.5, 1.1, 1.0])
+    np.testing.assert_allclose(metrics['deceleration'], [6.0, 4.8, 3.6, 6.0, 5.4, 4.8])
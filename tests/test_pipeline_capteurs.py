@@ -0,0 +1,33 @@
+import threading
+
+from pipeline_capteurs import BLOCK, SensorPipeline
+
+
+def test_block_sans_worker_ne_depasse_pas_maxsize():
+    pipeline = SensorPipeline(maxsize=2, policy=BLOCK)
+    pipeline.register('lidar', lambda measurement: None)
+    results = [pipeline.submit('lidar', i) for i in range(5)]
+    assert results == [True, True, False, False, False]
+    stats = pipeline.stats()['lidar']
+    assert stats['pending'] == 2
+    assert stats['dropped'] == 3
+
+
+def test_block_attend_puis_traite_tout():
+    processed = []
+    release = threading.Event()
+
+    def handler(measurement):
+        release.wait(5)
+        processed.append(measurement)
+
+    pipeline = SensorPipeline(maxsize=1, policy=BLOCK)
+    pipeline.register('radar', handler)
+    pipeline.start()
+    producer = threading.Thread(target=lambda: [pipeline.submit('radar', i) for i in range(4)])
+    producer.start()
+    release.set()
+    producer.join(5)
+    pipeline.stop()
+    assert processed == [0, 1, 2, 3]
+    assert pipeline.stats()['radar']['max_depth'] <= 1
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from detection_vehicules import VehicleRegistry, take_vehicle_snapshot
+from enregistrement import default_log_path, open_sensor_log, read_sensor_log
+from faux_carla import FakeWorld
+from rejeu import replay
+
+
+def record_run(run_dir, n_frames=50):
+    """acteurs_data d'un faux monde, comme l'écrit code_final.py (ego = premier véhicule)"""
+    world = FakeWorld(n_vehicles=5)
+    registry = VehicleRegistry(world)
+    with open_sensor_log('acteurs', 'csv', path=str(run_dir / default_log_path('acteurs', 'csv'))) as writer:
+        for _ in range(n_frames):
+            world.tick()
+            snapshot = take_vehicle_snapshot(world, registry)
+            writer.write(snapshot.as_rows(1), snapshot.frame, sim_time=snapshot.elapsed_seconds)
+
+
+def count_rows(path):
+    return sum(len(chunk['frame']) for chunk in read_sensor_log(path, columns=['frame']))
+
+
+@pytest.mark.parametrize('log_format', ['csv', 'npz', 'archive'])
+def test_rejeu_deux_fois_meme_sortie(tmp_path, log_format):
+    run_dir = tmp_path / 'run'
+    run_dir.mkdir()
+    record_run(run_dir)
+    output_dir = tmp_path / 'rejeu'
+    output_path = str(output_dir / default_log_path('metrics', log_format))
+
+    first = replay(str(run_dir), str(output_dir), log_format)
+    rows = count_rows(output_path)
+    second = replay(str(run_dir), str(output_dir), log_format)
+
+    assert first[0] == second[0] == 50
+    assert count_rows(output_path) == rows == 50
+    frames = np.concatenate([chunk['frame'] for chunk in read_sensor_log(output_path, columns=['frame'])])
+    assert list(frames) == list(range(1, 51))
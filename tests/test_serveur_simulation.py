@@ -0,0 +1,27 @@
+import os
+import stat
+
+import pytest
+
+from serveur_simulation import load_authkey
+
+
+def test_cle_creee_une_fois(tmp_path):
+    path = str(tmp_path / "cle")
+    with pytest.raises(FileNotFoundError):
+        load_authkey(path)
+    key = load_authkey(path, create=True)
+    assert len(key) == 64
+    assert load_authkey(path) == load_authkey(path, create=True) == key
+    assert load_authkey(str(tmp_path / "autre"), create=True) != key
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+@pytest.mark.skipif(os.name != "posix", reason="droits POSIX")
+def test_cle_lisible_par_tous_refusee(tmp_path):
+    path = str(tmp_path / "cle")
+    load_authkey(path, create=True)
+    os.chmod(path, 0o644)
+    with pytest.raises(PermissionError):
+        load_authkey(path)
@@ -0,0 +1,65 @@
+import random
+
+
+def candidate_spawn_points(spawn_points, center, radius=100.0, exclude=None):
+    """Points d'apparition classés pour la circulation : ceux à moins de `radius` m de `center`
+    (dans un ordre aléatoire), puis les autres du plus proche au plus lointain"""
+    others = [point for point in spawn_points if exclude is None or point.location.distance(exclude.location) > 0.1]
+    by_distance = sorted(zip((point.location.distance(center) for point in others), range(len(others))))
+    near = [others[i] for distance, i in by_distance if distance < radius]
+    far = [others[i] for distance, i in by_distance if distance >= radius]
+    random.shuffle(near)
+    return near + far
+
+
+class TrafficPopulation:
+    """Véhicules de circulation (PNJ) créés et détruits par lots.
+
+    Un seul `apply_batch_sync` fait apparaître tous les véhicules, active
+    l'autopilote et allume les feux ; un seul autre les détruit à la fin.
+    """
+
+    def __init__(self, client, traffic_manager):
+        self.client = client
+        self.traffic_manager = traffic_manager
+        self.actor_ids = []
+        self.failed = 0
+
+    def spawn(self, world, count, spawn_points, blueprints, max_speed_difference=5.0):
+        """Fait apparaître jusqu'à `count` véhicules sur `spawn_points` (un véhicule par point)"""
+        import carla
+
+        tm_port = self.traffic_manager.get_port()
+        SpawnActor = carla.command.SpawnActor
+        SetAutopilot = carla.command.SetAutopilot
+        SetVehicleLightState = carla.command.SetVehicleLightState
+        FutureActor = carla.command.FutureActor
+        lights = carla.VehicleLightState(carla.VehicleLightState.All)  # Activer les feux des véhicules
+
+        batch = [SpawnActor(random.choice(blueprints), point)
+                 .then(SetAutopilot(FutureActor, True, tm_port))
+                 .then(SetVehicleLightState(FutureActor, lights))
+                 for point in spawn_points[:count]]
+        new_ids = [response.actor_id for response in self.client.apply_batch_sync(batch) if not response.error]
+        self.failed += len(batch) - len(new_ids)
+        self.actor_ids.extend(new_ids)
+
+        # Réglages du Traffic Manager : les pourcentages ignore_* valent déjà 0 par défaut
+        # (feux, panneaux, piétons et véhicules respectés), seule la vitesse varie d'un véhicule à l'autre
+        for actor in world.get_actors(new_ids):
+            self.traffic_manager.vehicle_percentage_speed_difference(actor, random.uniform(0, max_speed_difference))
+        return new_ids
+
+    def destroy(self):
+        """Détruit tous les véhicules créés, en un seul lot"""
+        if not self.actor_ids:
+            return 0
+        import carla
+
+        self.client.apply_batch_sync([carla.command.DestroyActor(actor_id) for actor_id in self.actor_ids])
+        destroyed = len(self.actor_ids)
+        self.actor_ids = []
+        return destroyed
+
+    def __len__(self):
+        return len(self.actor_ids)
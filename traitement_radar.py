@@ -0,0 +1,46 @@
+import numpy as np
+
+# Disposition mémoire de carla.RadarMeasurement.raw_data : 4 float32 par détection
+# (vitesse radiale en m/s, azimut et altitude en rad, profondeur en m)
+RADAR_DTYPE = np.dtype([('velocity', np.float32), ('azimuth', np.float32),
+                        ('altitude', np.float32), ('depth', np.float32)])
+
+# Intervalles de vitesse de rapprochement (m/s) de l'histogramme par frame ; le dernier est ouvert
+# (colonnes closing_* de 'radar_resume' dans enregistrement.SENSOR_COLUMNS)
+CLOSING_SPEED_BINS = (0.0, 2.0, 5.0, 10.0, 20.0)
+
+
+def decode_radar(raw_data):
+    """Tableau structuré des détections, lu directement dans le tampon (sans copie ni boucle Python)"""
+    return np.frombuffer(raw_data, dtype=RADAR_DTYPE)
+
+
+def radar_rows(detections):
+    """Tableau (N, 4) float32 dans l'ordre des colonnes 'radar' : depth, velocity, azimuth, altitude"""
+    rows = np.empty((len(detections), 4), dtype=np.float32)
+    rows[:, 0] = detections['depth']
+    rows[:, 1] = detections['velocity']
+    rows[:, 2] = detections['azimuth']
+    rows[:, 3] = detections['altitude']
+    return rows
+
+
+def radar_summary(detections, bins=CLOSING_SPEED_BINS):
+    """Agrégats d'une frame radar, dans l'ordre des colonnes 'radar_resume'.
+
+    Nombre de détections, retour le plus proche (profondeur, vitesse,
+    azimut), vitesse de rapprochement maximale et histogramme des
+    détections qui se rapprochent (vitesse radiale négative).
+    """
+    n_bins = len(bins)
+    if len(detections) == 0:
+        return np.array([0, np.inf, 0, 0, 0] + [0] * n_bins, dtype=np.float32)
+    closest = np.argmin(detections['depth'])
+    closing_speed = -detections['velocity']
+    approaching = closing_speed[closing_speed > bins[0]]
+    histogram = np.bincount(np.searchsorted(bins, approaching, side='right') - 1, minlength=n_bins)
+    return np.concatenate((
+        [len(detections), detections['depth'][closest], detections['velocity'][closest],
+         detections['azimuth'][closest], max(float(closing_speed.max()), 0.0)],
+        histogram,
+    )).astype(np.float32)